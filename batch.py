@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import time
+import argparse
+from design import Design
+from scanner import (Scanner,  DEFAULT_SOURCE_EXTENSIONS,  DEFAULT_EXCLUDED_DIRS)
+from profiler import PROFILER
+
+""""
+Command line entry point of the design explorer: reads the Verilog files of a
+directory, elaborates their hierarchy and prints it as JSON, without importing Qt, so
+it can be used from scripts and CI.
+
+    python3 batch.py DIRECTORY [--dag] [--workers N] [--cache] [--indent N] [--output FILE]
+        [--extensions .v,.sv,...] [--exclude NAME,...] [--profile FILE [--cprofile]]
+"""
+
+# returns the parsed command line arguments
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Print the module hierarchy of a directory of Verilog files as JSON.")
+    parser.add_argument("directory",  help="root directory of the design")
+    parser.add_argument("--dag",  action="store_true",
+        help="print each unique elaboration once, with its children referring to others by index")
+    parser.add_argument("--workers",  type=int,  default=None,  help="processes used to parse files (default: CPU count)")
+    parser.add_argument("--cache",  action="store_true",  help="reuse the parse results cached by the explorer")
+    parser.add_argument("--indent",  type=int,  default=None,  help="indentation of the JSON output (default: compact)")
+    parser.add_argument("--output",  default=None,  help="file to write the JSON to (default: standard output)")
+    parser.add_argument("--extensions",  default=",".join(DEFAULT_SOURCE_EXTENSIONS),
+        help="comma separated extensions of the files to read (default: %(default)s)")
+    parser.add_argument("--exclude",  default=",".join(DEFAULT_EXCLUDED_DIRS),
+        help="comma separated glob patterns of directory names never scanned (default: %(default)s)")
+    parser.add_argument("--profile",  default=None,  help="file to write the time of each phase to, as JSON")
+    parser.add_argument("--cprofile",  action="store_true",  help="add a cProfile capture to the --profile file")
+    return parser.parse_args(argv)
+
+# returns the items of a comma separated argument, without blanks
+def splitList(text):
+    return tuple(item.strip() for item in text.split(",") if item.strip() != "")
+
+def main(argv):
+    args = parseArguments(argv)
+    if (args.profile is not None):
+        PROFILER.start(args.cprofile)
+    parseCache = None
+    if (args.cache):
+        from parseCache import ParseCache
+        parseCache = ParseCache()
+    start = time.perf_counter()
+    scanner = Scanner(splitList(args.extensions),  excludedDirs=splitList(args.exclude))
+    design = Design(args.workers,  parseCache,  scanner)
+    design.load(args.directory)
+    root = design.elaborate()
+    result = {"directory": args.directory,  "files": len(design.files),  "modules": len(design.modules)}
+    if (args.dag):
+        result.update(design.hierarchyGraph(root))
+    else:
+        result["top"] = design.hierarchyTree(root)
+    result["missing"] = design.elaborator.missing
+    result["seconds"] = round(time.perf_counter() - start,  3)
+    if (args.output is None):
+        json.dump(result,  sys.stdout,  indent=args.indent)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output,  'w') as f:
+            json.dump(result,  f,  indent=args.indent)
+    if (args.profile is not None):
+        PROFILER.stop()
+        PROFILER.export(args.profile)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
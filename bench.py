@@ -0,0 +1,323 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import resource
+import tracemalloc
+from design import Design
+from scanner import Scanner
+from fileParser import parseFiles
+from parseCache import ParseCache
+from searchIndex import SearchIndex
+from pathQuery import PathQuery
+
+""""
+Benchmark suite of the design explorer: generates a synthetic Verilog design, then
+times each phase of reading and exploring it separately and writes the wall time and
+peak memory of every phase to a JSON file, so runs can be compared.
+
+    python3 bench.py [--files N] [--modules-per-file N] [--depth N] [--fanout N]
+        [--overrides PERCENT] [--loops PERCENT] [--conditions PERCENT]
+        [--define-files N] [--defines-per-file N] [--include-defines] [--seed N] [--design DIRECTORY]
+        [--workers N] [--repeat N] [--gui] [--tracemalloc] [--output FILE] [--compare FILE]
+
+Phases of the Qt-free core: scan (Scanner), parse (parseFiles, without cache), parse
+cached (the same files from a ParseCache), collect (define variables and parameter
+evaluation), elaborate (parameter overrides and generate if/for blocks), index
+(SearchIndex) and search (name searches as typed, and path queries). With --gui the
+window is created offscreen and FileTree.generateTree, Hierarchy.readFiles and the
+search bar are timed as well.
+"""
+
+# file the results are written to by default
+DEFAULT_OUTPUT = "bench_output.txt"
+
+# copies made by each generate for loop
+LOOP_COPIES = 4
+
+# values a parameter override takes, few so the number of unique elaborations stays bounded
+OVERRIDE_VALUES = ("WIDTH",  "8",  "16")
+
+# texts searched by name, one character more each time as when typed in the search bar
+SEARCH_TEXTS = ("b",  "bm",  "bm_",  "bm_1",  "bm_12",  "u_",  "u_1",  "g_for")
+
+# path queries run on the hierarchy
+PATH_QUERIES = ("*.u_0",  "**.u_1",  "*.*.g_for*",  "**.*:bm_1*")
+
+# returns the parsed command line arguments
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Time the phases of the design explorer on a synthetic Verilog design.")
+    parser.add_argument("--files",  type=int,  default=500,  help="Verilog files with modules (default: %(default)s)")
+    parser.add_argument("--modules-per-file",  type=int,  default=2,  help="modules declared in each file (default: %(default)s)")
+    parser.add_argument("--depth",  type=int,  default=6,  help="levels of the hierarchy below the top modules (default: %(default)s)")
+    parser.add_argument("--fanout",  type=int,  default=4,  help="instantiations in each module above the last level (default: %(default)s)")
+    parser.add_argument("--overrides",  type=int,  default=50,  help="percent of the instantiations overriding parameters (default: %(default)s)")
+    parser.add_argument("--loops",  type=int,  default=20,  help="percent of the instantiations in a generate for block (default: %(default)s)")
+    parser.add_argument("--conditions",  type=int,  default=20,  help="percent of the instantiations in a generate if/else block (default: %(default)s)")
+    parser.add_argument("--define-files",  type=int,  default=2,  help="files of define variables only (default: %(default)s)")
+    parser.add_argument("--defines-per-file",  type=int,  default=200,  help="define variables in each of them (default: %(default)s)")
+    parser.add_argument("--include-defines",  action="store_true",
+        help="make every file include the define files, each behind an include guard")
+    parser.add_argument("--seed",  type=int,  default=1,  help="seed of the random choices of the generator (default: %(default)s)")
+    parser.add_argument("--design",  default=None,  help="directory of a design to time instead of generating one")
+    parser.add_argument("--keep",  default=None,  help="generate the design in this directory and keep it")
+    parser.add_argument("--workers",  type=int,  default=None,  help="processes used to parse files (default: CPU count)")
+    parser.add_argument("--repeat",  type=int,  default=1,  help="times the phases are run, the best time is reported (default: %(default)s)")
+    parser.add_argument("--gui",  action="store_true",  help="also time the GUI phases, with an offscreen window")
+    parser.add_argument("--tracemalloc",  action="store_true",
+        help="also record the peak of Python allocations in each phase (slows every phase down)")
+    parser.add_argument("--output",  default=DEFAULT_OUTPUT,  help="JSON file the results are written to (default: %(default)s)")
+    parser.add_argument("--compare",  default=None,  help="results of an earlier run to compare the phase times with")
+    return parser.parse_args(argv)
+
+""""
+Writes a synthetic design to directory. The modules are spread evenly over depth + 1
+levels; each module above the last level instantiates fanout modules of the next one,
+chosen at random, directly, with parameter overrides, in a generate for loop or in
+both branches of a generate if. Parameters take their defaults from the define
+variables of the define files, and files are split into directories of 100. With
+--include-defines every file includes the define files, as designs sharing a header do.
+Returns the number of files written.
+"""
+def generateDesign(directory,  args):
+    rng = random.Random(args.seed)
+    total = args.files * args.modules_per_file
+    levels = [[] for level in range(args.depth + 1)]
+    for index in range(total):
+        levels[index * (args.depth + 1) // total].append(index)
+    defineFiles = max(args.define_files,  0)
+    for number in range(defineFiles):
+        lines = ["`define BM_DEPTH_" + str(number) + " " + str(number + 2)]
+        for define in range(args.defines_per_file):
+            lines.append("`define BM_" + str(number) + "_" + str(define) + " " + str(define))
+        if (args.include_defines):
+            guard = "BM_DEFINES_" + str(number) + "_VH"
+            lines = ["`ifndef " + guard,  "`define " + guard] + lines + ["`endif"]
+        writeFile(os.path.join(directory,  "include",  "defines_" + str(number) + ".vh"),  lines)
+    for fileIndex in range(args.files):
+        lines = []
+        if (args.include_defines):
+            lines.extend("`include \"defines_" + str(number) + ".vh\"" for number in range(defineFiles))
+        for index in range(fileIndex * args.modules_per_file,  (fileIndex + 1) * args.modules_per_file):
+            level = index * (args.depth + 1) // total
+            children = levels[level + 1] if level < args.depth else []
+            lines.extend(moduleText(index,  children,  rng,  args,  defineFiles))
+        writeFile(os.path.join(directory,  "rtl",  "d" + str(fileIndex // 100),  "f" + str(fileIndex) + ".v"),  lines)
+    return args.files + defineFiles
+
+# returns the lines of the synthetic module number index, instantiating modules among children
+def moduleText(index,  children,  rng,  args,  defineFiles):
+    depthDefault = "`BM_DEPTH_" + str(index % defineFiles) if defineFiles > 0 else "2"
+    lines = ["module bm_" + str(index) + " #(parameter WIDTH = 8, parameter DEPTH = " + depthDefault + ") (",
+        "    input clk,",
+        "    input [WIDTH-1:0] d,",
+        "    output [WIDTH-1:0] q",
+        ");",
+        "    localparam HALF = WIDTH / 2;",
+        "    reg [WIDTH-1:0] r;",
+        "    always @(posedge clk) r <= d;",
+        "    assign q = r;"]
+    if (len(children) == 0):
+        lines.append("endmodule")
+        lines.append("")
+        return lines
+    generate = []
+    for number in range(args.fanout):
+        child = "bm_" + str(rng.choice(children))
+        name = "u_" + str(number)
+        override = ""
+        if (rng.randrange(100) < args.overrides):
+            override = " #(.WIDTH(" + rng.choice(OVERRIDE_VALUES) + "))"
+        ports = " (.clk(clk), .d(d[HALF-1:0]), .q())"
+        kind = rng.randrange(100)
+        if (kind < args.loops):
+            generate.extend(["    for (i = 0; i < " + str(LOOP_COPIES) + "; i = i + 1) begin : g_for_" + str(number),
+                "        " + child + override + " " + name + ports + ";",
+                "    end"])
+        elif (kind < args.loops + args.conditions):
+            generate.extend(["    if (WIDTH > 8) begin : g_if_" + str(number),
+                "        " + child + override + " " + name + ports + ";",
+                "    end else begin : g_else_" + str(number),
+                "        " + child + " " + name + "_narrow" + ports + ";",
+                "    end"])
+        else:
+            lines.append("    " + child + override + " " + name + ports + ";")
+    if (len(generate) > 0):
+        lines.append("    genvar i;")
+        lines.append("    generate")
+        lines.extend(generate)
+        lines.append("    endgenerate")
+    lines.append("endmodule")
+    lines.append("")
+    return lines
+
+# writes lines to the file at path, making its directory if needed
+def writeFile(path,  lines):
+    os.makedirs(os.path.dirname(path),  exist_ok=True)
+    with open(path,  'w') as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+
+""""
+Class Name: PhaseTimer
+Class Description: Runs the phases of a benchmark and records, for each, its wall times
+over the repeats, the peak resident memory of the process (and of the worker processes)
+once it has run, and with tracemalloc the peak of the Python allocations made during it.
+"""
+class PhaseTimer:
+    def __init__(self,  useTracemalloc=False):
+        self.useTracemalloc = useTracemalloc
+        self.phases = {} # key = phase name, value = its results, in the order the phases first ran
+        if (useTracemalloc):
+            tracemalloc.start()
+
+    # runs function and records its time under name; returns what function returns
+    def run(self,  name,  function,  *arguments):
+        if (self.useTracemalloc):
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = function(*arguments)
+        seconds = time.perf_counter() - start
+        phase = self.phases.setdefault(name,  {"name": name,  "seconds": []})
+        phase["seconds"].append(round(seconds,  6))
+        phase["best"] = min(phase["seconds"])
+        phase["peakRssKB"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        phase["workersPeakRssKB"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        if (self.useTracemalloc):
+            phase["pythonPeakKB"] = max(phase.get("pythonPeakKB",  0),  tracemalloc.get_traced_memory()[1] // 1024)
+        print("%-22s %10.3f s" % (name,  seconds),  file=sys.stderr)
+        return result
+
+# times the phases of the Qt-free core on directory, returning counts that describe the design
+def runCore(timer,  directory,  workers,  cachePath):
+    scanner = Scanner()
+    design = Design(workers,  None,  scanner)
+    scan = timer.run("scan",  scanner.scan,  directory)
+    paths = scan.sources
+    results = timer.run("parse",  parseFiles,  paths,  design.workers)
+    cache = ParseCache(cachePath) # filled with the results just parsed
+    cached,  stamps = cache.lookup(paths)
+    cache.store(results,  stamps)
+    timer.run("parse cached",  parseFiles,  paths,  design.workers,  cache)
+    design.files = dict(zip(paths,  results))
+    timer.run("collect",  design.collect)
+    root = timer.run("elaborate",  design.elaborate)
+    searchIndex = SearchIndex()
+    timer.run("index",  searchIndex.build,  root)
+    timer.run("search",  runSearches,  searchIndex)
+    timer.run("path query",  runPathQueries,  root)
+    return {"files": len(paths),  "modules": len(design.modules),  "elaborations": design.elaborator.misses,
+        "instances": instanceCount(root)}
+
+# searches SEARCH_TEXTS as typed in the search bar, each narrowing the previous one when it can
+def runSearches(searchIndex):
+    previous = None
+    for text in SEARCH_TEXTS:
+        previous = searchIndex.search(text,  previous)
+
+# counts the matches of each of PATH_QUERIES below root
+def runPathQueries(root):
+    return [PathQuery(text).count(root) for text in PATH_QUERIES]
+
+# returns the number of instances below root, counting every copy of shared elaborations
+def instanceCount(root):
+    counts = {}
+    def count(elaborated):
+        if (not elaborated in counts):
+            counts[elaborated] = sum(copies * (1 + count(child)) for name,  child,  copies in elaborated.children)
+        return counts[elaborated]
+    sys.setrecursionlimit(max(sys.getrecursionlimit(),  10000))
+    return count(root)
+
+# times the GUI phases on directory with an offscreen main window
+def runGui(timer,  directory,  workers,  app):
+    import main
+    window = main.Main()
+    fileTree = window.fileTree
+    fileTree.parseCache = None # every run parses, as in the parse phase
+    if (workers is not None):
+        fileTree.workers = workers
+    timer.run("gui generateTree",  fileTree.generateTree,  directory)
+    timer.run("gui readFiles",  waitForGeneration,  window.hierarchy,  app)
+    timer.run("gui searchModule",  runGuiSearches,  fileTree)
+    window.hierarchy.stopGeneration()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+# generates the hierarchy and waits for its background thread to finish
+def waitForGeneration(hierarchy,  app):
+    hierarchy.readFiles()
+    while (hierarchy.isGenerating()):
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents()
+
+# types SEARCH_TEXTS in the search bar's search, then clears it
+def runGuiSearches(fileTree):
+    for text in SEARCH_TEXTS:
+        fileTree.searchModule(text)
+    fileTree.searchModule("")
+
+# prints the times of the phases of results next to those of the run in the file at path
+def compare(results,  path):
+    with open(path,  'r') as f:
+        earlier = {phase["name"]: phase for phase in json.load(f)["phases"]}
+    print("%-22s %10s %10s %8s" % ("phase",  "before",  "now",  "ratio"))
+    for phase in results["phases"]:
+        before = earlier.get(phase["name"])
+        if (before is None):
+            print("%-22s %10s %10.3f" % (phase["name"],  "-",  phase["best"]))
+        else:
+            ratio = phase["best"] / before["best"] if before["best"] > 0 else float("inf")
+            print("%-22s %10.3f %10.3f %7.2fx" % (phase["name"],  before["best"],  phase["best"],  ratio))
+
+def main(argv):
+    args = parseArguments(argv)
+    work = tempfile.mkdtemp(prefix="bench_")
+    try:
+        config = {key: value for key,  value in vars(args).items() if not key in ("output",  "compare")}
+        start = time.perf_counter()
+        directory = args.design
+        generated = None
+        if (directory is None):
+            directory = args.keep if args.keep is not None else os.path.join(work,  "design")
+            if (args.keep is not None and os.path.isdir(directory)):
+                shutil.rmtree(directory)
+            begin = time.perf_counter()
+            generated = {"files": generateDesign(directory,  args),  "seconds": round(time.perf_counter() - begin,  3)}
+        app = None
+        if (args.gui):
+            os.environ.setdefault("QT_QPA_PLATFORM",  "offscreen")
+            from PyQt5.QtWidgets import QApplication
+            app = QApplication.instance() or QApplication([])
+        timer = PhaseTimer(args.tracemalloc)
+        design = None
+        for run in range(max(args.repeat,  1)):
+            design = runCore(timer,  directory,  args.workers,  os.path.join(work,  "cache" + str(run) + ".sqlite"))
+            if (app is not None):
+                runGui(timer,  directory,  args.workers,  app)
+        results = {"config": config,  "generated": generated,  "design": design,
+            "python": platform.python_version(),  "platform": platform.platform(),  "cpus": os.cpu_count(),
+            "phases": list(timer.phases.values()),
+            "wallSeconds": round(time.perf_counter() - start,  3),
+            "peakRssKB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "workersPeakRssKB": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}
+        with open(args.output,  'w') as f:
+            json.dump(results,  f,  indent=1)
+        if (args.compare is not None):
+            compare(results,  args.compare)
+    finally:
+        shutil.rmtree(work,  ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,298 @@
+import re
+
+# matches a based Verilog number: optional size, optional sign flag, radix and digits
+NUMBER_RE = re.compile(r"^\s*([0-9][0-9_]*)?\s*'([sS]?)([bBoOdDhH])\s*([0-9a-fA-FxXzZ?_]+)\s*$")
+
+# matches a plain decimal number; only ASCII digits, str.isdigit also accepts other scripts' digits and superscripts
+DECIMAL_RE = re.compile(r"[0-9][0-9_]*")
+
+# radix of each base letter
+RADIX = {"b": 2,  "o": 8,  "d": 10,  "h": 16}
+
+# width of unsized numbers
+INTEGER_WIDTH = 32
+
+# widest value in bits a number, a replication, a concatenation or a select can make
+MAX_WIDTH = 1 << 20
+
+""""
+Class Name: ExpressionError
+Class Description: Raised when an expression cannot be parsed, or cannot be evaluated
+in a scope because it uses a name or a construct whose value is unknown.
+"""
+class ExpressionError(ValueError):
+    pass
+
+# returns width, raising ExpressionError if it is wider than MAX_WIDTH
+def checkWidth(width):
+    if (width > MAX_WIDTH):
+        raise ExpressionError("width " + str(width) + " is wider than " + str(MAX_WIDTH) + " bits")
+    return width
+
+""""
+Class Name: BitVector
+Class Description: A constant Verilog value: an int holding the bits, the width in bits
+and whether the value is signed. value is always kept in range (0 <= value < 2**width)
+so every operator is a single big-int operation whatever the width. Operands are
+extended to the wider of the two widths, and signed arithmetic is only used when both
+are signed, as in Verilog. x and z bits are read as 0 and division by zero gives 0,
+since only known constant values are evaluated.
+"""
+class BitVector:
+    __slots__ = ("value",  "width",  "signed")
+
+    def __init__(self,  value=0,  width=INTEGER_WIDTH,  signed=False):
+        width = max(1,  width)
+        self.value = value & ((1 << width) - 1)
+        self.width = width
+        self.signed = signed
+
+    """"
+    Returns the BitVector of a Verilog number (5, 8'hA5, 'b1, 4'sd3 ...), None if text
+    is not one. Raises ExpressionError for digits the radix does not have and for
+    numbers wider than MAX_WIDTH.
+    """
+    @staticmethod
+    def parse(text):
+        text = text.strip()
+        if (DECIMAL_RE.fullmatch(text)): # plain decimal numbers are signed integers
+            try:
+                value = int(text.replace("_",  ""))
+            except ValueError: # more digits than Python converts
+                raise ExpressionError("bad number " + text)
+            return BitVector(value,  max(INTEGER_WIDTH,  checkWidth(value.bit_length() + 1)),  True)
+        match = NUMBER_RE.match(text)
+        if (match is None):
+            if (text in ("'0",  "'1")): # fill literals
+                return BitVector(int(text[1]),  1)
+            return None
+        if (match.group(1) is not None):
+            width = checkWidth(int(match.group(1).replace("_",  "")))
+        digits = re.sub(r'[xXzZ?]',  "0",  match.group(4).replace("_",  ""))
+        try:
+            value = int(digits,  RADIX[match.group(3).lower()])
+        except ValueError: # digits the radix does not have, such as 2 in 'b12
+            raise ExpressionError("bad number " + text)
+        if (match.group(1) is None):
+            width = max(INTEGER_WIDTH,  checkWidth(value.bit_length()))
+        return BitVector(value,  width,  match.group(2) != "")
+
+    # returns a 1 bit value, 1 if flag is true and 0 otherwise
+    @staticmethod
+    def boolean(flag):
+        return BitVector(1 if flag else 0,  1)
+
+    # returns the value as a string of binary digits, width characters long
+    def binary(self):
+        return format(self.value,  "0" + str(self.width) + "b")
+
+    # returns the value as a Python int, negative if signed and the sign bit is set
+    def toInt(self):
+        if (self.signed and self.value >> (self.width - 1)):
+            return self.value - (1 << self.width)
+        return self.value
+
+    def __int__(self):
+        return self.toInt()
+
+    def __index__(self):
+        return self.toInt()
+
+    def __bool__(self):
+        return self.value != 0
+
+    def __eq__(self,  other):
+        return (isinstance(other,  BitVector) and self.value == other.value and self.width == other.width
+            and self.signed == other.signed)
+
+    def __hash__(self):
+        return hash((self.value,  self.width,  self.signed))
+
+    def __repr__(self):
+        return "BitVector(%d'%sh%x)" % (self.width,  "s" if self.signed else "",  self.value)
+
+    # returns the width, signedness and Python ints of both operands in the context of a binary operator
+    def context(self,  other):
+        width = max(self.width,  other.width)
+        signed = self.signed and other.signed
+        if (signed):
+            return width,  signed,  self.toInt(),  other.toInt()
+        return width,  signed,  self.value,  other.value
+
+    def add(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a + b,  width,  signed)
+
+    def subtract(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a - b,  width,  signed)
+
+    def multiply(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a * b,  width,  signed)
+
+    # integer division truncating towards zero
+    def divide(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        if (b == 0):
+            return BitVector(0,  width,  signed)
+        quotient = abs(a) // abs(b)
+        if ((a < 0) != (b < 0)):
+            quotient = -quotient
+        return BitVector(quotient,  width,  signed)
+
+    # remainder with the sign of the dividend
+    def modulo(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        if (b == 0):
+            return BitVector(0,  width,  signed)
+        remainder = abs(a) % abs(b)
+        if (a < 0):
+            remainder = -remainder
+        return BitVector(remainder,  width,  signed)
+
+    # power, with the width of the base; computed modulo 2**width so large exponents stay cheap
+    def power(self,  other):
+        signed = self.signed and other.signed
+        base = self.toInt() if signed else self.value
+        exponent = other.toInt() if other.signed else other.value
+        if (exponent < 0):
+            if (base == 1):
+                return BitVector(1,  self.width,  signed)
+            if (base == -1):
+                return BitVector(-1 if exponent % 2 else 1,  self.width,  signed)
+            return BitVector(0,  self.width,  signed)
+        return BitVector(pow(base,  exponent,  1 << self.width),  self.width,  signed)
+
+    def negate(self):
+        return BitVector(-self.value,  self.width,  self.signed)
+
+    def plus(self):
+        return self
+
+    def bitAnd(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a & b,  width,  signed)
+
+    def bitOr(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a | b,  width,  signed)
+
+    def bitXor(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(a ^ b,  width,  signed)
+
+    def bitXnor(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector(~(a ^ b),  width,  signed)
+
+    def bitNot(self):
+        return BitVector(~self.value,  self.width,  self.signed)
+
+    def logicalNot(self):
+        return BitVector.boolean(self.value == 0)
+
+    def logicalAnd(self,  other):
+        return BitVector.boolean(self.value != 0 and other.value != 0)
+
+    def logicalOr(self,  other):
+        return BitVector.boolean(self.value != 0 or other.value != 0)
+
+    # shifts keep the width and signedness of the shifted value, the amount is unsigned
+    def shiftLeft(self,  other):
+        if (other.value >= self.width):
+            return BitVector(0,  self.width,  self.signed)
+        return BitVector(self.value << other.value,  self.width,  self.signed)
+
+    def shiftRight(self,  other):
+        return BitVector(self.value >> other.value,  self.width,  self.signed)
+
+    def arithmeticShiftRight(self,  other):
+        if (self.signed):
+            return BitVector(self.toInt() >> other.value,  self.width,  self.signed)
+        return self.shiftRight(other)
+
+    def equal(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a == b)
+
+    def notEqual(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a != b)
+
+    def less(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a < b)
+
+    def lessEqual(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a <= b)
+
+    def greater(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a > b)
+
+    def greaterEqual(self,  other):
+        width,  signed,  a,  b = self.context(other)
+        return BitVector.boolean(a >= b)
+
+    def reduceAnd(self):
+        return BitVector.boolean(self.value == (1 << self.width) - 1)
+
+    def reduceOr(self):
+        return BitVector.boolean(self.value != 0)
+
+    def reduceXor(self):
+        return BitVector.boolean(bin(self.value).count("1") & 1)
+
+    def reduceNand(self):
+        return BitVector.boolean(self.value != (1 << self.width) - 1)
+
+    def reduceNor(self):
+        return BitVector.boolean(self.value == 0)
+
+    def reduceXnor(self):
+        return BitVector.boolean(not bin(self.value).count("1") & 1)
+
+    # returns bits msb down to lsb of the value, counting from 0 at the least significant bit; raises ExpressionError for bounds out of order or below 0
+    def select(self,  msb,  lsb):
+        if (lsb < 0 or msb < lsb):
+            raise ExpressionError("bad select [" + str(msb) + ":" + str(lsb) + "]")
+        return BitVector(self.value >> lsb,  checkWidth(msb - lsb + 1))
+
+    # returns the value repeated count times, {count{value}}; raises ExpressionError if it is wider than MAX_WIDTH
+    def replicate(self,  count):
+        if (count <= 0):
+            return BitVector(0,  1)
+        checkWidth(count * self.width)
+        return BitVector.concat([self] * count)
+
+    # returns the concatenation of values, the first one being the most significant, {a, b, ...}; raises ExpressionError if it is wider than MAX_WIDTH
+    @staticmethod
+    def concat(values):
+        width = checkWidth(sum(part.width for part in values))
+        value = 0
+        for part in values:
+            value = (value << part.width) | part.value
+        return BitVector(value,  width)
+
+    # returns a if condition is true, b otherwise: condition ? a : b
+    @staticmethod
+    def choose(condition,  a,  b):
+        if (condition.value != 0):
+            return a
+        return b
+
+# the function of each binary Verilog operator
+BINARY_OPERATORS = {"+": BitVector.add,  "-": BitVector.subtract,  "*": BitVector.multiply,  "/": BitVector.divide,
+    "%": BitVector.modulo,  "**": BitVector.power,  "&": BitVector.bitAnd,  "|": BitVector.bitOr,
+    "^": BitVector.bitXor,  "~^": BitVector.bitXnor,  "^~": BitVector.bitXnor,  "<<": BitVector.shiftLeft,
+    ">>": BitVector.shiftRight,  "<<<": BitVector.shiftLeft,  ">>>": BitVector.arithmeticShiftRight,
+    "==": BitVector.equal,  "!=": BitVector.notEqual,  "===": BitVector.equal,  "!==": BitVector.notEqual,
+    "<": BitVector.less,  "<=": BitVector.lessEqual,  ">": BitVector.greater,  ">=": BitVector.greaterEqual,
+    "&&": BitVector.logicalAnd,  "||": BitVector.logicalOr}
+
+# the function of each unary Verilog operator
+UNARY_OPERATORS = {"-": BitVector.negate,  "+": BitVector.plus,  "~": BitVector.bitNot,  "!": BitVector.logicalNot,
+    "&": BitVector.reduceAnd,  "|": BitVector.reduceOr,  "^": BitVector.reduceXor,  "~&": BitVector.reduceNand,
+    "~|": BitVector.reduceNor,  "~^": BitVector.reduceXnor,  "^~": BitVector.reduceXnor}
@@ -0,0 +1,269 @@
+from functools import lru_cache
+from tokenizer import TOKEN_RE
+from bitVector import (BitVector,  ExpressionError,  BINARY_OPERATORS,  UNARY_OPERATORS)
+
+# number of compiled expressions kept by compileExpression
+CACHE_SIZE = 65536
+
+# precedence of each binary operator, higher binds tighter; ?: is below all of them
+PRECEDENCE = {"**": 11,  "*": 10,  "/": 10,  "%": 10,  "+": 9,  "-": 9,  "<<": 8,  ">>": 8,  "<<<": 8,
+    ">>>": 8,  "<": 7,  "<=": 7,  ">": 7,  ">=": 7,  "==": 6,  "!=": 6,  "===": 6,  "!==": 6,  "&": 5,
+    "^": 4,  "~^": 4,  "^~": 4,  "|": 3,  "&&": 2,  "||": 1}
+
+# returns the ceiling of the base 2 logarithm of value, as $clog2 does
+def clog2(value):
+    n = value.toInt()
+    if (n <= 1):
+        return BitVector(0,  32,  True)
+    return BitVector((n - 1).bit_length(),  32,  True)
+
+# system functions that can be used in constant expressions
+SYSTEM_FUNCTIONS = {"$clog2": clog2,  "$signed": lambda value: BitVector(value.value,  value.width,  True),
+    "$unsigned": lambda value: BitVector(value.value,  value.width,  False)}
+
+""""
+Class Name: ExpressionParser
+Class Description: Parses the text of a Verilog constant expression into a tree of
+tuples, folding every subexpression whose operands are all constants. Nodes are
+("const", BitVector), ("name", name), ("macro", name), ("unary", function, node),
+("binary", function, node, node), ("ternary", node, node, node), ("select", node,
+msb node, lsb node, mode), ("concat", [nodes]), ("replicate", node, node) and
+("call", function, [nodes]).
+"""
+class ExpressionParser:
+    def __init__(self,  text):
+        self.text = text
+        self.tokens = [tok.lstrip() for tok in TOKEN_RE.findall(text.strip())]
+        self.pos = 0
+
+    # returns the current token, "" at the end of the expression
+    def peek(self):
+        if (self.pos < len(self.tokens)):
+            return self.tokens[self.pos]
+        return ""
+
+    # consumes tok, raising an ExpressionError if it is not the current token
+    def expect(self,  tok):
+        if (self.peek() != tok):
+            raise ExpressionError("expected " + tok + " in " + self.text)
+        self.pos = self.pos + 1
+
+    # parses the whole text
+    def parse(self):
+        if (len(self.tokens) == 0):
+            raise ExpressionError("empty expression")
+        node = self.expression(0)
+        if (self.pos != len(self.tokens)):
+            raise ExpressionError("unexpected " + self.peek() + " in " + self.text)
+        return node
+
+    # parses an expression made of operators of at least minPrecedence (precedence climbing)
+    def expression(self,  minPrecedence):
+        left = self.unary()
+        while (True):
+            tok = self.peek()
+            if (tok == "?" and minPrecedence == 0):
+                self.pos = self.pos + 1
+                a = self.expression(0)
+                self.expect(":")
+                b = self.expression(0)
+                if (left[0] == "const"):
+                    left = a if left[1] else b
+                else:
+                    left = ("ternary",  left,  a,  b)
+                continue
+            precedence = PRECEDENCE.get(tok)
+            if (precedence is None or precedence < minPrecedence):
+                return left
+            self.pos = self.pos + 1
+            # ** is right associative, every other operator left associative
+            right = self.expression(precedence if tok == "**" else precedence + 1)
+            function = BINARY_OPERATORS[tok]
+            if (left[0] == "const" and right[0] == "const"):
+                left = ("const",  function(left[1],  right[1]))
+            else:
+                left = ("binary",  function,  left,  right)
+
+    # parses a unary operator and its operand, or a primary
+    def unary(self):
+        tok = self.peek()
+        if (tok in UNARY_OPERATORS):
+            self.pos = self.pos + 1
+            operand = self.unary()
+            function = UNARY_OPERATORS[tok]
+            if (operand[0] == "const"):
+                return ("const",  function(operand[1]))
+            return ("unary",  function,  operand)
+        return self.primary()
+
+    # parses a number, a name with an optional select, a macro, a call or a bracketed expression
+    def primary(self):
+        tok = self.peek()
+        self.pos = self.pos + 1
+        if (tok == "("):
+            node = self.expression(0)
+            self.expect(")")
+            return node
+        if (tok == "{"):
+            return self.concatenation()
+        if (tok == ""):
+            raise ExpressionError("incomplete expression " + self.text)
+        if (tok[0].isdigit() or tok[0] == "'"):
+            number = BitVector.parse(tok)
+            if (number is None):
+                raise ExpressionError("bad number " + tok)
+            return ("const",  number)
+        if (tok[0] == "`"):
+            return ("macro",  tok[1:])
+        if (tok == "$"): # system function
+            name = "$" + self.peek()
+            self.pos = self.pos + 1
+            if (not name in SYSTEM_FUNCTIONS):
+                raise ExpressionError("unsupported function " + name)
+            args = self.arguments()
+            if (len(args) != 1):
+                raise ExpressionError(name + " takes one argument")
+            if (args[0][0] == "const"):
+                return ("const",  SYSTEM_FUNCTIONS[name](args[0][1]))
+            return ("call",  SYSTEM_FUNCTIONS[name],  args)
+        if (tok[0].isalpha() or tok[0] == "_" or tok[0] == "\\"):
+            if (self.peek() == "("):
+                raise ExpressionError("unsupported function " + tok)
+            node = ("name",  tok)
+            while (self.peek() == "["):
+                node = self.select(node)
+            return node
+        raise ExpressionError("unexpected " + tok + " in " + self.text)
+
+    # parses the parenthesized arguments of a call
+    def arguments(self):
+        self.expect("(")
+        args = [self.expression(0)]
+        while (self.peek() == ","):
+            self.pos = self.pos + 1
+            args.append(self.expression(0))
+        self.expect(")")
+        return args
+
+    # parses a bit select [i], a part select [msb:lsb] or an indexed part select [base+:width] / [base-:width]
+    def select(self,  node):
+        self.expect("[")
+        first = self.expression(0)
+        mode = self.peek()
+        if (mode == ":" or mode == "+:" or mode == "-:"):
+            self.pos = self.pos + 1
+            second = self.expression(0)
+        else:
+            mode = ":"
+            second = first
+        self.expect("]")
+        return ("select",  node,  first,  second,  mode)
+
+    # parses a concatenation {a, b, ...} or a replication {n{a, b, ...}}, after its opening brace
+    def concatenation(self):
+        first = self.expression(0)
+        if (self.peek() == "{"):
+            self.pos = self.pos + 1
+            inner = self.concatenation()
+            self.expect("}")
+            if (first[0] == "const" and inner[0] == "const"):
+                return ("const",  inner[1].replicate(first[1].toInt()))
+            return ("replicate",  first,  inner)
+        parts = [first]
+        while (self.peek() == ","):
+            self.pos = self.pos + 1
+            parts.append(self.expression(0))
+        self.expect("}")
+        if (all(part[0] == "const" for part in parts)):
+            return ("const",  BitVector.concat([part[1] for part in parts]))
+        return ("concat",  parts)
+
+""""
+Turns a tree made by ExpressionParser into a function of a scope returning the value
+of the expression. Names and macros are looked up through the scope's lookup and
+macro methods, so the same compiled expression serves every scope.
+"""
+def compileNode(node):
+    kind = node[0]
+    if (kind == "const"):
+        value = node[1]
+        return lambda scope: value
+    if (kind == "name"):
+        name = node[1]
+        return lambda scope: scope.lookup(name)
+    if (kind == "macro"):
+        name = node[1]
+        return lambda scope: scope.macro(name)
+    if (kind == "unary"):
+        function = node[1]
+        operand = compileNode(node[2])
+        return lambda scope: function(operand(scope))
+    if (kind == "binary"):
+        function = node[1]
+        left = compileNode(node[2])
+        right = compileNode(node[3])
+        return lambda scope: function(left(scope),  right(scope))
+    if (kind == "ternary"):
+        condition = compileNode(node[1])
+        a = compileNode(node[2])
+        b = compileNode(node[3])
+        return lambda scope: a(scope) if condition(scope) else b(scope)
+    if (kind == "select"):
+        return compileSelect(compileNode(node[1]),  compileNode(node[2]),  compileNode(node[3]),  node[4])
+    if (kind == "concat"):
+        parts = [compileNode(part) for part in node[1]]
+        return lambda scope: BitVector.concat([part(scope) for part in parts])
+    if (kind == "replicate"):
+        count = compileNode(node[1])
+        inner = compileNode(node[2])
+        return lambda scope: inner(scope).replicate(count(scope).toInt())
+    if (kind == "call"):
+        function = node[1]
+        args = [compileNode(arg) for arg in node[2]]
+        return lambda scope: function(*[arg(scope) for arg in args])
+    raise ExpressionError("unknown node " + kind)
+
+# returns the width of an indexed part select, raising ExpressionError if it is not positive
+def selectWidth(width):
+    width = width.toInt()
+    if (width <= 0):
+        raise ExpressionError("bad part select width " + str(width))
+    return width
+
+# returns the function of a bit or part select of value; selects out of order or below bit 0 raise ExpressionError
+def compileSelect(value,  first,  second,  mode):
+    if (mode == "+:"):
+        def select(scope):
+            base = first(scope).toInt()
+            return value(scope).select(base + selectWidth(second(scope)) - 1,  base)
+    elif (mode == "-:"):
+        def select(scope):
+            base = first(scope).toInt()
+            return value(scope).select(base,  base - selectWidth(second(scope)) + 1)
+    else:
+        def select(scope):
+            return value(scope).select(first(scope).toInt(),  second(scope).toInt())
+    return select
+
+""""
+Class Name: Expression
+Class Description: A compiled constant expression. constant is its value if it folded
+down to a constant when compiled, None if its value depends on the scope.
+"""
+class Expression:
+    def __init__(self,  text):
+        self.text = text
+        self.tree = ExpressionParser(text).parse()
+        self.constant = self.tree[1] if self.tree[0] == "const" else None
+        self.function = compileNode(self.tree)
+
+    # returns the value of the expression in scope (an object with lookup(name) and macro(name) methods)
+    def evaluate(self,  scope):
+        if (self.constant is not None):
+            return self.constant
+        return self.function(scope)
+
+# returns the compiled Expression of text, parsed only the first time text is seen
+@lru_cache(maxsize=CACHE_SIZE)
+def compileExpression(text):
+    return Expression(text)
@@ -0,0 +1,217 @@
+import os
+from fileParser import (parseFiles,  readSlice)
+from evaluator import Evaluator
+from bitVector import (BitVector,  ExpressionError)
+from elaborate import (ModuleDef,  Elaborator)
+from scanner import Scanner
+from preprocessor import Preprocessor
+from profiler import PROFILER
+
+""""
+Evaluates the parameter declarations of a module, given as a dictionary of parameter
+name to unevaluated expression in declaration order. Declarations without a value and
+strings are kept as they are, and parameters whose value cannot be evaluated are None.
+"""
+def evaluateParameters(expressions,  macros):
+    parameters = dict(expressions)
+    evaluator = Evaluator(parameters,  macros)
+    for param in parameters:
+        value = parameters[param]
+        if (value == "" or "\"" in value): # declaration without a value, or a string
+            continue
+        try:
+            parameters[param] = evaluator.evaluate(value)
+        except ExpressionError: # unknown or bad value, expressions that use it cannot be evaluated
+            parameters[param] = None
+    return parameters
+
+# returns the (size, modification time) of the file at path, None if it no longer exists
+def fileStamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size,  stat.st_mtime_ns)
+
+# returns a parameter value as JSON can hold it: an int for evaluated values, the text or None otherwise
+def jsonValue(value):
+    if (isinstance(value,  BitVector)):
+        return value.toInt()
+    return value
+
+""""
+Class Name: Design
+Class Description: The Qt-free core of the explorer: the Verilog files of a directory,
+the define variables and modules declared in them, and their elaborated hierarchy.
+The GUI's FileTree and Hierarchy show a Design, and batch.py uses it on its own to
+print hierarchies without starting Qt.
+"""
+class Design:
+    def __init__(self,  workers=None,  parseCache=None,  scanner=None):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1) # processes used to parse files
+        self.parseCache = parseCache # ParseCache of unchanged files' results, None disables it
+        self.scanner = scanner if scanner is not None else Scanner() # finds the source files of a directory
+        self.files = {} # key = path of a verilog file, value = its FileParser, in scan order
+        self.stamps = {} # key = path of a verilog file, value = its fileStamp when it was read
+        self.defineVars = {} # key = define variable, value = corresponding value, of the defines files
+        self.preprocessor = None # Preprocessor of the files read
+        self.defineTable = None # MacroTable of the defines files, every file starts with it
+        self.modules = {} # key = module name, value = ModuleDef of the module
+        self.elaborator = None # Elaborator of the last elaboration
+
+    # returns the paths of the source files under directory that the scanner does not ignore, in walk order
+    def findFiles(self,  directory):
+        return self.scanner.scan(directory).sources
+
+    # reads every verilog file under directory
+    def load(self,  directory,  progress=None):
+        return self.readFiles(self.findFiles(directory),  progress)
+
+    """"
+    Parses the files in paths and collects their define variables and modules. Files
+    without module declarations are defines files, whose define variables every file
+    sees; all define variables are collected before any parameter is evaluated. Returns
+    the FileParsers in the order of paths.
+    progress, if given, is called with (files done, total files) as in parseFiles.
+    """
+    def readFiles(self,  paths,  progress=None):
+        self.stamps = {path: fileStamp(path) for path in paths} # before parsing, so changes made meanwhile show later
+        results = parseFiles(paths,  self.workers,  self.parseCache,  progress)
+        self.files = dict(zip(paths,  results))
+        self.collect()
+        return results
+
+    # compares the files read with paths, the files now present: returns the paths added, removed and modified since they were read
+    def changedFiles(self,  paths):
+        added = [path for path in paths if not path in self.files]
+        kept = set(paths)
+        removed = [path for path in self.files if not path in kept]
+        modified = [path for path in paths if path in self.files and fileStamp(path) != self.stamps.get(path)]
+        return added,  removed,  modified
+
+    """"
+    Brings the design up to date with paths, the verilog files now under its directory:
+    only the files added or changed since they were read are parsed, then the define
+    variables and modules are collected again. Returns the paths that were parsed.
+    """
+    def refreshFiles(self,  paths):
+        added,  removed,  modified = self.changedFiles(paths)
+        stale = added + modified
+        for path in stale:
+            self.stamps[path] = fileStamp(path)
+        parsed = dict(zip(stale,  parseFiles(stale,  self.workers,  self.parseCache)))
+        self.files = {path: parsed[path] if path in parsed else self.files[path] for path in paths}
+        for path in removed:
+            del self.stamps[path]
+        self.collect()
+        return stale
+
+    """"
+    Collects the define variables and modules of the files read. The defines files are
+    preprocessed first, then each file starting with their define variables, so every
+    module gets the MacroTable of the defines it sees before any parameter is evaluated.
+    """
+    def collect(self):
+        with PROFILER.phase("collect modules"):
+            self.defineVars.clear()
+            self.modules.clear()
+            self.elaborator = None
+            with PROFILER.phase("preprocess directives"):
+                self.preprocessor = Preprocessor(self.files)
+                self.defineTable = self.preprocessor.defineTable()
+                tables = {path: self.preprocessor.moduleTables(path,  self.defineTable)
+                    for path,  result in self.files.items() if len(result.modules) > 0}
+            self.defineVars.update(self.defineTable.allValues())
+            for path,  result in self.files.items():
+                for name,  info in result.modules.items():
+                    macros = tables[path][0][name]
+                    self.modules[name] = ModuleDef(name,  path,  os.path.basename(path),  info.instances,
+                        evaluateParameters(info.parameters,  macros),  info.overridable,  info.parameters,
+                        (info.start,  info.end,  info.line),  macros,  tables[path][1])
+        if (PROFILER.enabled):
+            PROFILER.count("headers preprocessed",  self.preprocessor.runs)
+            PROFILER.count("includes reusing a preprocessed header",  self.preprocessor.reuses)
+
+    # returns True if the file at path is included by another file, so a change to it can change other files' defines
+    def isIncluded(self,  path):
+        return self.preprocessor is not None and path in self.preprocessor.included
+
+    # replaces the modules declared in the file at path by those of result, a new FileParser of it
+    def updateFile(self,  path,  result):
+        self.files[path] = result
+        self.stamps[path] = fileStamp(path)
+        tables,  guardTables = self.preprocessor.moduleTables(path,  self.defineTable)
+        for name,  info in result.modules.items():
+            module = self.modules[name]
+            module.instances = info.instances
+            module.macros = tables[name]
+            module.guardMacros = guardTables
+            module.parameters = evaluateParameters(info.parameters,  module.macros)
+            module.overridable = info.overridable
+            module.expressions = info.parameters
+            module.start,  module.end,  module.line = info.start,  info.end,  info.line
+        return list(result.modules)
+
+    # returns the text of the declaration of module name, read from its file only now
+    def moduleText(self,  name):
+        module = self.modules[name]
+        return readSlice(module.path,  module.start,  module.end)
+
+    # elaborates the design, returning an Elaborated whose children are the top modules
+    def elaborate(self):
+        self.elaborator = Elaborator(self.modules,  self.defineVars)
+        return self.elaborator.elaborateTop()
+
+    """"
+    Returns the elaborated hierarchy as a tree of dictionaries that JSON can hold: one
+    per instantiation with its instance name, module, number of copies (made by
+    generate for loops and instance arrays), parameters and children. Shared
+    elaborations are repeated wherever they are instantiated.
+    """
+    def hierarchyTree(self,  root=None):
+        if (root is None):
+            root = self.elaborate()
+        return [self.treeEntry(name,  child,  count) for name,  child,  count in root.children]
+
+    # returns the dictionary of one instantiation and everything below it
+    def treeEntry(self,  name,  elaborated,  count):
+        entry = {"instance": name,  "module": elaborated.name,  "count": count}
+        if (elaborated.module is None):
+            entry["missing"] = True
+        entry["parameters"] = {param: jsonValue(value) for param,  value in elaborated.parameters.items()}
+        if (elaborated.recursive):
+            entry["recursive"] = True
+        entry["children"] = [self.treeEntry(childName,  child,  childCount)
+            for childName,  child,  childCount in elaborated.children]
+        return entry
+
+    """"
+    Returns the elaborated hierarchy as the DAG the elaborator built: a list of unique
+    elaborations (module, parameters and children as [instance name, index of the
+    child's elaboration, number of copies]) and the indexes of the top modules. Its size
+    depends on the number of unique parameterizations, not on the number of instances.
+    """
+    def hierarchyGraph(self,  root=None):
+        if (root is None):
+            root = self.elaborate()
+        indexes = {} # key = Elaborated, value = its index in nodes
+        nodes = []
+        stack = [child for name,  child,  count in reversed(root.children)]
+        while (len(stack) > 0):
+            elaborated = stack.pop()
+            if (elaborated in indexes):
+                continue
+            indexes[elaborated] = len(nodes)
+            nodes.append(elaborated)
+            stack.extend(child for name,  child,  count in reversed(elaborated.children))
+        graph = []
+        for elaborated in nodes:
+            entry = {"module": elaborated.name,
+                "parameters": {param: jsonValue(value) for param,  value in elaborated.parameters.items()},
+                "children": [[name,  indexes[child],  count] for name,  child,  count in elaborated.children]}
+            if (elaborated.module is None):
+                entry["missing"] = True
+            if (elaborated.recursive):
+                entry["recursive"] = True
+            graph.append(entry)
+        return {"top": [[name,  indexes[child]] for name,  child,  count in root.children],  "elaborations": graph}
@@ -1,20 +1,47 @@
 from PyQt5.QtGui import *
-from PyQt5.Qsci import QsciScintilla, QsciLexerVerilog, QsciLexerVHDL
-from PyQt5.QtWidgets import QAction, QLineEdit, QGridLayout, QPushButton, QDialog, QLabel
-from PyQt5.QtCore import Qt
+from PyQt5.Qsci import QsciScintilla, QsciLexerVerilog, QsciLexerVHDL, QsciAPIs
+from PyQt5.QtWidgets import QAction, QLineEdit, QGridLayout, QPushButton, QDialog, QLabel, QCheckBox
+from PyQt5.QtCore import (Qt,  QTimer)
+import re
+from findInFiles import searchRegex
+
+# files larger than this many bytes open in large-file mode
+LARGE_FILE_SIZE = 8 * 1024 * 1024
+
+# files larger than this many bytes open read-only
+READ_ONLY_SIZE = 64 * 1024 * 1024
+
+# files larger than this many bytes are shown without syntax highlighting, which has to style all the text above the view
+PLAIN_TEXT_SIZE = 64 * 1024 * 1024
+
+# bytes added to the editor at each step of a progressive load
+LOAD_CHUNK_SIZE = 4 * 1024 * 1024
 
 """"
 Class Name: CodeEditor
 Class Description: Uses QsciScintilla to make a code editor for verilog files.
 Can search currently open files for words + replace them and undo/redo edits.
+Completes the words of the document and the symbols of the project given by
+setSymbols. In large-file mode (largeFile=True, for files above LARGE_FILE_SIZE)
+wrapping, folding, completion from the document and brace matching are off, as
+each of them works on the whole text, and the file is loaded progressively by loadFile.
 """
 class CodeEditor(QsciScintilla):
     ARROW_MARKER_NUM = 8
 
-    def __init__(self, type, parent=None):
+    def __init__(self, type, parent=None,  largeFile=False):
         super(CodeEditor, self).__init__(parent)
         self.parent = parent
         self.type = type
+        self.largeFile = largeFile
+        self.loadStream = None # file being loaded progressively, None once it is loaded
+        self.loadTimer = None
+        self.eventMask = 0 # modification events sent by the editor, turned off while a file loads
+        self.pendingLine = None # line to show once it is loaded
+        self.pendingCursor = None # line to put the cursor on once the whole file is loaded
+        self.lockedReadOnly = False # True if the file stays read-only after its load
+        self.apis = None # QsciAPIs holding the project symbols, made by the first setSymbols
+        self.symbolsVersion = None # SymbolIndex version of the symbols in apis
         
         # indent settings
         self.setIndentationsUseTabs(True)
@@ -22,8 +49,9 @@ class CodeEditor(QsciScintilla):
         self.setIndentationGuides(True)
         self.setAutoIndent(True)
         
-        self.setWrapMode(QsciScintilla.WrapWord)
-        self.setWrapIndentMode(QsciScintilla.WrapIndentIndented)
+        if (not largeFile):
+            self.setWrapMode(QsciScintilla.WrapWord)
+            self.setWrapIndentMode(QsciScintilla.WrapIndentIndented)
         
         self.setCaretForegroundColor(QColor("#ff0000ff"))
         self.setCaretLineVisible(True)
@@ -42,7 +70,8 @@ class CodeEditor(QsciScintilla):
         self.setFont(font)
         self.setMarginsFont(font)
 
-        self.setBraceMatching(QsciScintilla.SloppyBraceMatch)
+        if (not largeFile):
+            self.setBraceMatching(QsciScintilla.SloppyBraceMatch)
         
         # set what lexer this editor will use
         self.vhdlLexer = QsciLexerVHDL()
@@ -58,12 +87,13 @@ class CodeEditor(QsciScintilla):
         self.lexer().setDefaultFont(font)
         self.lexer().setFont(font)
 
-        self.lexer().setFoldAtElse(True)
-        self.lexer().setFoldComments(True)
-        self.setFolding(QsciScintilla.BoxedTreeFoldStyle)
+        if (not largeFile):
+            self.lexer().setFoldAtElse(True)
+            self.lexer().setFoldComments(True)
+            self.setFolding(QsciScintilla.BoxedTreeFoldStyle)
 
-        # auto complete settings
-        self.setAutoCompletionSource(QsciScintilla.AcsDocument)
+        # auto complete settings: the project symbols, and the words of the document unless it is large
+        self.setAutoCompletionSource(QsciScintilla.AcsAPIs if largeFile else QsciScintilla.AcsAll)
         self.setAutoCompletionThreshold(2)
         self.setAutoCompletionCaseSensitivity(False)
         self.setAutoCompletionReplaceWord(False)
@@ -74,6 +104,95 @@ class CodeEditor(QsciScintilla):
 
         self.SendScintilla(QsciScintilla.SCI_SETHSCROLLBAR, 0)
 
+    """"
+    Loads the file at path progressively: LOAD_CHUNK_SIZE bytes are added to the
+    editor at each turn of the event loop, so the window stays responsive and the start
+    of the file can be read while the rest loads. The bytes go to the editor as they
+    are, and no modification event is sent while it loads: handling them costs time in
+    proportion to the whole text at each chunk. The editor is read-only while it loads
+    and stays so if the file is larger than READ_ONLY_SIZE.
+    """
+    def loadFile(self,  path,  size):
+        self.stopLoading()
+        self.clear()
+        self.lockedReadOnly = size > READ_ONLY_SIZE
+        if (size > PLAIN_TEXT_SIZE):
+            self.setLexer(None)
+        self.setReadOnly(True)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION,  0) # the load cannot be undone
+        self.eventMask = self.SendScintilla(QsciScintilla.SCI_GETMODEVENTMASK)
+        self.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK,  0)
+        self.loadStream = open(path,  'rb')
+        self.loadTimer = QTimer(self)
+        self.loadTimer.timeout.connect(self.loadChunk)
+        self.loadTimer.start(0)
+
+    # adds the next chunk of the file being loaded, and finishes the load at its end
+    def loadChunk(self):
+        data = self.loadStream.read(LOAD_CHUNK_SIZE)
+        if (len(data) > 0): # a chunk may end inside a character, the next one completes it
+            self.SendScintilla(QsciScintilla.SCI_SETREADONLY,  0)
+            self.SendScintilla(QsciScintilla.SCI_APPENDTEXT,  len(data),  data)
+            self.SendScintilla(QsciScintilla.SCI_SETREADONLY,  1)
+        else:
+            self.stopLoading()
+            self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+            self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION,  1)
+            self.setModified(False)
+            self.setReadOnly(self.lockedReadOnly)
+            if (self.pendingCursor is not None):
+                self.setCursorPosition(self.pendingCursor,  0)
+                self.pendingCursor = None
+        if (self.pendingLine is not None and (self.pendingLine < self.lines() - 1 or not self.isLoading())):
+            line = self.pendingLine
+            self.pendingLine = None
+            self.goToLine(line)
+
+    """"
+    Offers words, the symbols of the project at version of its SymbolIndex, as
+    completions. QsciAPIs prepares them on its own thread into a sorted list, so a
+    lookup costs the same however many files the project has; the symbols prepared
+    before stay in use until then. Does nothing if the editor has these symbols
+    already, or no lexer for them (a file shown as plain text).
+    """
+    def setSymbols(self,  words,  version):
+        if (self.lexer() is None or version == self.symbolsVersion):
+            return
+        self.symbolsVersion = version
+        if (self.apis is None):
+            self.apis = QsciAPIs(self.lexer())
+        self.apis.clear()
+        for word in words:
+            self.apis.add(word)
+        self.apis.prepare()
+
+    # returns True while the file is still being loaded
+    def isLoading(self):
+        return self.loadStream is not None
+
+    # stops a progressive load, leaving what was loaded so far
+    def stopLoading(self):
+        if (self.loadStream is not None):
+            self.loadTimer.stop()
+            self.loadStream.close()
+            self.loadStream = None
+            self.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK,  self.eventMask)
+
+    """"
+    Puts the cursor on line and scrolls it to the top of the view. While the file
+    loads, the view scrolls as soon as the line is loaded but the cursor only moves at
+    the end, as a cursor far into the text slows down every chunk added after it.
+    """
+    def goToLine(self,  line):
+        if (self.isLoading()):
+            self.pendingCursor = line
+            if (line >= self.lines() - 1):
+                self.pendingLine = line
+                return
+        else:
+            self.setCursorPosition(line,  0)
+        self.setFirstVisibleLine(line)
+
     # adds shortcuts to find words in file
     def contextMenuEvent(self, event):
         cmenu = self.createStandardContextMenu()
@@ -83,6 +202,14 @@ class CodeEditor(QsciScintilla):
         find.triggered.connect(self.findText)
 
         cmenu.addAction(find)
+        
+        # lets the user edit a file opened read-only because of its size
+        readOnly = QAction('Read Only', self)
+        readOnly.setCheckable(True)
+        readOnly.setChecked(self.isReadOnly())
+        readOnly.setEnabled(not self.isLoading())
+        readOnly.toggled.connect(self.setReadOnly)
+        cmenu.addAction(readOnly)
         cmenu.exec_(self.mapToGlobal(event.pos()))
 
     def findText(self):
@@ -111,6 +238,12 @@ class TextFinder(QDialog):
         self.replace.setAlignment(Qt.AlignLeft)
         self.replace.setFixedWidth(200)
 
+        # search options, used by the find buttons and the replacements alike
+        self.regex = QCheckBox("Regular expression")
+        self.regex.setToolTip("Search for a Python regular expression; the replacement can use \\1 or \\g<name>")
+        self.wholeWord = QCheckBox("Whole word")
+        self.status = QLabel()
+
         enter = QPushButton("Find Next")
         enter.clicked.connect(self.findNextText)
         findPrev = QPushButton("Find Previous")
@@ -134,23 +267,146 @@ class TextFinder(QDialog):
         self.grid.addWidget(self.replace, 2, 1)
         self.grid.addWidget(replaceB, 2, 2)
         self.grid.addWidget(replaceAll, 3, 2)
+        self.grid.addWidget(self.regex, 1, 1)
+        self.grid.addWidget(self.wholeWord, 3, 1)
+        self.grid.addWidget(self.status, 4, 0, 1, 3)
         self.setLayout(self.grid)
         self.show()
 
+    # selects the next match after the selection, going on from the start at the end of the file
     def findNextText(self):
-        if len(self.input.text()) > 0:
-            self.editor.findFirst(self.input.text(), False, False, False, True)
+        self.findMatch(True)
 
+    # selects the previous match before the selection, going on from the end at the start of the file
     def findPrevText(self):
-        if len(self.input.text()) > 0:
-            self.editor.findFirst(self.input.text(), False, False, False, True)
+        self.findMatch(False)
+
+    """"
+    Selects the match of searchPattern() next to the selection, the same search the
+    replace buttons use, run on the editor's UTF-8 bytes. Empty matches are skipped, so
+    the search always moves on.
+    """
+    def findMatch(self, forward):
+        if len(self.input.text()) == 0:
+            return
+        try:
+            pattern = self.searchPattern()
+        except re.error as error:
+            self.status.setText("Invalid regular expression: " + str(error))
+            return
+        data = self.documentBytes()
+        start = self.editor.SendScintilla(QsciScintilla.SCI_GETSELECTIONSTART)
+        end = self.editor.SendScintilla(QsciScintilla.SCI_GETSELECTIONEND)
+        if forward:
+            match = self.firstMatch(pattern, data, end) or self.firstMatch(pattern, data, 0)
+        else:
+            match = self.lastMatch(pattern, data, 0, start) or self.lastMatch(pattern, data, start, len(data))
+        if match is None:
+            self.status.setText("No match")
+            return
+        self.status.setText("")
+        self.editor.SendScintilla(QsciScintilla.SCI_SETSEL, match.start(), match.end())
+
+    # yields the non-empty matches of pattern in data from offset start, the matches the find and replace buttons all use
+    def matches(self, pattern, data, start):
+        for match in pattern.finditer(data, start):
+            if match.end() > match.start():
+                yield match
+
+    # returns the first non-empty match of pattern in data from offset start, None if there is none
+    def firstMatch(self, pattern, data, start):
+        return next(self.matches(pattern, data, start), None)
+
+    # returns the last non-empty match of pattern in data between offsets start and end, None if there is none
+    def lastMatch(self, pattern, data, start, end):
+        last = None
+        for match in self.matches(pattern, data, start): # not ended at end, so a whole word is checked past it
+            if match.end() > end:
+                break
+            last = match
+        return last
+
+    # returns the text of the editor as UTF-8 bytes, the offsets Scintilla uses
+    def documentBytes(self):
+        return bytes(self.editor.bytes(0, self.editor.length()))[:self.editor.length()]
+
+    # returns the compiled search of the dialog, on the editor's UTF-8 bytes; case insensitive like the find buttons
+    def searchPattern(self):
+        return searchRegex(self.input.text(), self.regex.isChecked(), self.wholeWord.isChecked())
+
+    # returns the replacement as a template of re: group references are only expanded if the search is a regular expression
+    def replacementTemplate(self):
+        text = self.replace.text().encode("utf-8")
+        if self.regex.isChecked():
+            return text
+        return text.replace(b"\\", b"\\\\")
 
     def replaceText(self):
-        if self.editor.selectedText() != "" and self.editor.selectedText() == self.input.text():
-            self.editor.replace(self.replace.text())
-            self.editor.findFirst(self.input.text(), False, False, False, True)
+        if len(self.input.text()) == 0 or self.editor.selectedText() == "":
+            return
+        try:
+            pattern = self.searchPattern()
+        except re.error as error:
+            self.status.setText("Invalid regular expression: " + str(error))
+            return
+        # the selection is replaced if it is a match where it is, as the find buttons select them
+        start = self.editor.SendScintilla(QsciScintilla.SCI_GETSELECTIONSTART)
+        end = self.editor.SendScintilla(QsciScintilla.SCI_GETSELECTIONEND)
+        match = pattern.match(self.documentBytes(), start)
+        if match is not None and match.end() == end:
+            self.editor.replaceSelectedText(match.expand(self.replacementTemplate()).decode("utf-8", "replace"))
+            self.findNextText()
 
+    """"
+    Replaces every match in one pass: the document is copied out once, rebuilt with
+    every match the find buttons would select replaced (empty matches are skipped, as
+    they are there), and the text from the first match on is replaced in a single edit,
+    so the whole replacement is one undo action. Replacements are never searched again,
+    so a replacement that contains the search text does not loop.
+    """
     def replaceTextAll(self):
-        self.editor.findFirst(self.input.text(), False, False, False, True)
-        while self.input.text() in self.editor.text():
-            self.replaceText()
+        if len(self.input.text()) == 0:
+            return
+        if self.editor.isReadOnly():
+            self.status.setText("The file is read-only")
+            return
+        try:
+            pattern = self.searchPattern()
+        except re.error as error:
+            self.status.setText("Invalid regular expression: " + str(error))
+            return
+        data = self.documentBytes()
+        template = self.replacementTemplate()
+        # a replacement without group references is the same for every match, and expanding it for each is slow
+        replacement = self.replace.text().encode("utf-8")
+        literal = replacement if not self.regex.isChecked() or b"\\" not in replacement else None
+        pieces = [] # the text from the first match on, with every match replaced
+        start = None
+        position = 0
+        try:
+            for match in self.matches(pattern, data, 0):
+                if start is None:
+                    start = position = match.start()
+                pieces.append(data[position:match.start()])
+                pieces.append(literal if literal is not None else match.expand(template))
+                position = match.end()
+        except (re.error, IndexError) as error: # bad group reference in the replacement
+            self.status.setText("Invalid replacement: " + str(error))
+            return
+        count = len(pieces) // 2
+        if start is not None:
+            pieces.append(data[position:])
+            end = len(data)
+            text = b"".join(pieces)
+            line, index = self.editor.getCursorPosition()
+            # with word wrap on, Scintilla wraps every line of an edit at once; turned off and on, it wraps them when idle
+            wrapMode = self.editor.wrapMode()
+            self.editor.setWrapMode(QsciScintilla.WrapNone)
+            self.editor.beginUndoAction()
+            self.editor.SendScintilla(QsciScintilla.SCI_SETTARGETSTART, start)
+            self.editor.SendScintilla(QsciScintilla.SCI_SETTARGETEND, end)
+            self.editor.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(text), text)
+            self.editor.endUndoAction()
+            self.editor.setWrapMode(wrapMode)
+            self.editor.setCursorPosition(min(line, self.editor.lines() - 1), 0)
+        self.status.setText("Replaced " + str(count) + " occurrences")
@@ -0,0 +1,508 @@
+import re
+from evaluator import Evaluator
+from preprocessor import MacroTable
+from constExpr import (compileExpression,  compileNode)
+from bitVector import (BitVector,  ExpressionError,  INTEGER_WIDTH)
+from profiler import PROFILER
+
+# most iterations a generate for loop without a closed form trip count is stepped through
+MAX_LOOP_ITERATIONS = 1 << 16
+
+# most levels of modules being elaborated inside one another, deeper instantiations are cut off as recursive
+MAX_HIERARCHY_DEPTH = 128
+
+# matches the initialization of a generate for loop: [genvar] name = expression
+LOOP_INIT_RE = re.compile(r'^\s*(?:genvar\s+)?([A-Za-z_]\w*)\s*=(.*)$',  re.S)
+
+# matches the step of a generate for loop: name = expression, or name op= expression
+LOOP_STEP_RE = re.compile(r'^\s*([A-Za-z_]\w*)\s*(\+|-|\*|/|<<<|>>>|<<|>>)?=(.*)$',  re.S)
+
+# returned by Elaborator.closedForm for a loop that never ends
+ENDLESS = object()
+
+# the comparison of each comparison operator a loop condition can use, with its operands swapped
+COMPARISONS = {BitVector.less: ("<",  ">"),  BitVector.lessEqual: ("<=",  ">="),  BitVector.greater: (">",  "<"),
+    BitVector.greaterEqual: (">=",  "<="),  BitVector.notEqual: ("!=",  "!="),  BitVector.equal: ("==",  "==")}
+
+# the test of each comparison on Python ints
+LOOP_TESTS = {"<": lambda a,  b: a < b,  "<=": lambda a,  b: a <= b,  ">": lambda a,  b: a > b,
+    ">=": lambda a,  b: a >= b,  "!=": lambda a,  b: a != b,  "==": lambda a,  b: a == b}
+
+# the next value of the genvar for each multiplicative step, None if the step is not valid
+MULTIPLICATIVE_STEPS = {BitVector.multiply: lambda a,  b: a * b,
+    BitVector.shiftLeft: lambda a,  b: a << b if 0 <= b < 64 else None,
+    BitVector.divide: lambda a,  b: (abs(a) // abs(b)) * (1 if (a < 0) == (b < 0) else -1) if b != 0 else None,
+    BitVector.shiftRight: lambda a,  b: a >> b if b >= 0 else None}
+
+# guards that remove their instance when their condition is true
+NEGATED_GUARDS = {"ifnot",  "ifndef"}
+
+# returns True if the expression tree node made by constExpr refers to the parameter name
+def usesName(node,  name):
+    if (node[0] == "name"):
+        return node[1] == name
+    for part in node[1:]:
+        if (isinstance(part,  tuple) and usesName(part,  name)):
+            return True
+        if (isinstance(part,  list) and any(usesName(item,  name) for item in part)):
+            return True
+    return False
+
+# returns the name the hierarchy shows for the copy index of the instantiation name: name[index]
+def indexedName(name,  index):
+    return name + "[" + str(index) + "]"
+
+""""
+Class Name: ModuleDef
+Class Description: A module declared in one of the directory's files, with the data
+needed to elaborate it: its instantiations (with the generate constructs around them)
+and its parameters, both their default values and the expressions they come from,
+with the MacroTable of the defines it sees and those its `ifdef guards see.
+"""
+class ModuleDef:
+    def __init__(self,  name,  path,  fileName,  instances,  parameters,  overridable=(),  expressions=None,  span=(0,  0,  0), 
+            macros=None,  guardMacros=None):
+        self.name = name
+        self.path = path # path of the file the module is declared in
+        self.fileName = fileName
+        self.instances = instances # Instances found by the tokenizer's Scanner
+        self.parameters = parameters # key = parameter name, value = default binary value
+        self.overridable = list(overridable) # parameter names in order, for positional overrides
+        self.expressions = expressions if expressions is not None else {} # key = parameter name, value = its expression
+        self.start,  self.end,  self.line = span # offsets of the declaration in the file, and its first line
+        self.macros = macros # MacroTable of the defines the module sees, None for those of the Elaborator
+        self.guardMacros = guardMacros if guardMacros is not None else {} # key = number of an `ifdef directive of the file, value = MacroTable seen at it
+
+""""
+Class Name: Elaborated
+Class Description: One elaboration of a module for one set of parameter values. It is
+shared by every instance with that module and those parameters, so the elaborated
+hierarchy is a DAG whose size depends on the number of unique parameterizations
+rather than on the number of instances. module is None for modules that were
+instantiated but never declared.
+"""
+class Elaborated:
+    def __init__(self,  module,  name,  parameters):
+        self.module = module # ModuleDef, None if the module was not found
+        self.name = name # module name
+        self.parameters = parameters # key = parameter name, value = resolved value
+        self.children = [] # (instance name, Elaborated, number of copies) of every instantiation
+        self.recursive = False # True if the module instantiates itself or is MAX_HIERARCHY_DEPTH deep, children are then cut off
+        self.truncated = False # True if the hierarchy below it was cut off at MAX_HIERARCHY_DEPTH, it then depends on its depth
+        self.outcomes = {} # key = (generate guard, genvar values), value = its GenerateLoop or truth
+
+    # returns the number of child instances, counting every copy made by generate for loops
+    def childCount(self):
+        return sum(count for name,  child,  count in self.children)
+
+""""
+Class Name: GenerateLoop
+Class Description: The iterations of a generate for loop in one scope: the name of its
+genvar and the value the genvar takes in each iteration. values is a range when the
+loop steps by a constant amount, so counting the copies of a long loop costs nothing,
+and the values let the guards nested in the loop be evaluated for each iteration.
+"""
+class GenerateLoop:
+    def __init__(self,  genvar,  values):
+        self.genvar = genvar
+        self.values = values # sequence of the genvar's value (an int) in each iteration
+        self.count = len(values)
+
+""""
+Class Name: Elaborator
+Class Description: Builds the elaborated hierarchy of a set of modules. Every unique
+(module, parameter values) pair is elaborated once and cached; instantiations resolve
+their parameter overrides in the parent's scope, apply the parent's generate if/for
+conditions, and then refer to the shared elaboration of the child. Elaborations are
+also memoized by their signature, the module and its resolved overrides, so an
+instantiation seen before finds its child without deriving the child's parameters
+again. hits and misses count the signatures found in and added to that memo.
+"""
+class Elaborator:
+    def __init__(self,  modules,  defineVars):
+        self.modules = modules # key = module name, value = ModuleDef
+        self.defineVars = defineVars # key = define variable, value = corresponding value
+        self.macros = MacroTable(defineVars) # defines of the modules without a MacroTable of their own
+        self.cache = {} # key = (module name, parameter values), and its depth if truncated, value = Elaborated
+        self.signatures = {} # key = (module name, resolved overrides sorted by name), value = Elaborated
+        self.hits = 0
+        self.misses = 0
+        self.building = set() # keys being elaborated, to cut off recursive instantiations and too deep hierarchies
+        self.missing = {} # key = undeclared module, value = name of a file that instantiates it
+        self.progress = None # if set, called with the number of elaborations made so far after each one
+
+    # returns an Elaborated with no module whose children are the elaborations of the top modules
+    def elaborateTop(self):
+        hits,  misses = self.hits,  self.misses
+        with PROFILER.phase("elaborate hierarchy"):
+            root = Elaborated(None,  "",  {})
+            for name in self.topModules():
+                root.children.append((name,  self.elaborate(name),  1))
+        if (PROFILER.enabled):
+            PROFILER.count("elaborations made",  self.misses - misses)
+            PROFILER.count("instantiations reusing an elaboration",  self.hits - hits)
+            PROFILER.count("generate guards evaluated",  sum(len(elaborated.outcomes) for elaborated in self.cache.values()))
+        return root
+
+    # returns the names of the modules that are not instantiated by any other module
+    def topModules(self):
+        instantiated = set()
+        for module in self.modules.values():
+            for inst in module.instances:
+                instantiated.add(inst.module)
+        return [name for name in self.modules if not name in instantiated]
+
+    """"
+    Returns the shared elaboration of module name with its parameters in overrides (key
+    = parameter name, value = resolved value) set instead of their defaults. Looked up
+    by signature first; on a miss the module's parameters are derived for the overrides
+    and the elaboration is shared with any other signature that gives the same values.
+    """
+    def elaborate(self,  name,  overrides=None):
+        signature = (name,  tuple(sorted(overrides.items())) if overrides else ())
+        if (signature in self.signatures):
+            self.hits = self.hits + 1
+            return self.signatures[signature]
+        self.misses = self.misses + 1
+        elaborated = self.elaborateParameters(name,  overrides)
+        if (self.progress is not None):
+            self.progress(self.misses,  0)
+        if (not elaborated.recursive and not elaborated.truncated):
+            self.signatures[signature] = elaborated
+        return elaborated
+
+    """"
+    Returns the shared elaboration of module name for the parameter values its overrides
+    give. An elaboration with a hierarchy cut off at MAX_HIERARCHY_DEPTH below it is
+    only shared at the depth it was made at, so the same module met higher up is
+    elaborated again with the levels it has left.
+    """
+    def elaborateParameters(self,  name,  overrides):
+        if (not name in self.modules):
+            key = (name,  None)
+            if (not key in self.cache):
+                self.cache[key] = Elaborated(None,  name,  {})
+            return self.cache[key]
+        module = self.modules[name]
+        parameters = self.deriveParameters(module,  overrides)
+        key = (name,  tuple(parameters.items()))
+        depthKey = key + (len(self.building), )
+        if (key in self.cache):
+            return self.cache[key]
+        if (depthKey in self.cache):
+            return self.cache[depthKey]
+        elaborated = Elaborated(module,  name,  parameters)
+        if (key in self.building): # the module instantiates itself, stop here
+            elaborated.recursive = True
+            return elaborated
+        if (len(self.building) >= MAX_HIERARCHY_DEPTH): # instantiates itself with other parameters each time, stop here
+            elaborated.recursive = True
+            elaborated.truncated = True
+            return elaborated
+        self.building.add(key)
+        try:
+            self.readInstances(elaborated)
+        finally:
+            self.building.discard(key)
+        elaborated.truncated = any(child.truncated for instanceName,  child,  count in elaborated.children)
+        self.cache[depthKey if elaborated.truncated else key] = elaborated
+        return elaborated
+
+    """"
+    Returns the parameter values of module when it is instantiated with overrides. The
+    parameters are evaluated again in declaration order, so parameters and localparams
+    computed from an overridden one follow it; those that cannot be evaluated keep their
+    default value.
+    """
+    def deriveParameters(self,  module,  overrides):
+        if (not overrides):
+            return dict(module.parameters)
+        parameters = {}
+        scope = Evaluator(parameters,  module.macros or self.macros)
+        for name,  default in module.parameters.items():
+            if (name in overrides):
+                parameters[name] = overrides[name]
+                continue
+            parameters[name] = default
+            if (isinstance(default,  str)): # declared without a value, or a string
+                continue
+            value = self.resolveParameter(scope,  module.expressions.get(name,  ""))
+            if (value is not None):
+                parameters[name] = value
+        return parameters
+
+    # returns the share of instantiations whose elaboration was found by its signature, between 0 and 1
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    """"
+    Elaborates each module instantiated by elaborated's module once. When the parameter
+    overrides of an instantiation use the genvar of an enclosing for loop, they are
+    resolved for each iteration; if the iterations do not all give the same child, each
+    gets its own instantiation, named after the instance with the values of the genvars
+    of the iteration, u[3] or u[1][2], followed by a copy index if it has several copies.
+    """
+    def readInstances(self,  elaborated):
+        module = elaborated.module
+        scope = Evaluator(dict(elaborated.parameters),  module.macros or self.macros,  module.guardMacros)
+        outcomes = elaborated.outcomes # each guard is evaluated once per elaboration
+        for inst in module.instances:
+            if (not inst.module in self.modules):
+                count = self.instanceCount(scope,  inst,  outcomes)
+                if (count <= 0): # removed by a generate if statement or an empty for loop
+                    continue
+                self.missing.setdefault(inst.module,  module.fileName)
+                elaborated.children.append((inst.name,  self.elaborate(inst.module),  count))
+                continue
+            copies = self.instanceScopes(scope,  inst,  outcomes,  [value for name,  value in inst.overrides])
+            children = [] # (Elaborated, genvar values, number of copies) of each iteration
+            signatures = {} # key = resolved overrides of an iteration, value = its Elaborated
+            for copyScope,  bindings,  count in copies:
+                overrides = self.resolveOverrides(copyScope,  inst)
+                signature = tuple(sorted(overrides.items()))
+                if (not signature in signatures):
+                    signatures[signature] = self.elaborate(inst.module,  overrides)
+                children.append((signatures[signature],  bindings,  count))
+            if (len(signatures) == 1):
+                elaborated.children.append((inst.name,  children[0][0],  sum(count for child,  bindings,  count in children)))
+            else:
+                for child,  bindings,  count in children:
+                    name = inst.name
+                    for genvar,  value in bindings:
+                        name = indexedName(name,  value)
+                    elaborated.children.append((name,  child,  count))
+
+    # returns the values of the parameter overrides of inst, key = parameter name, evaluated in scope
+    def resolveOverrides(self,  scope,  inst):
+        childDef = self.modules[inst.module]
+        overrides = {}
+        for index,  (name,  value) in enumerate(inst.overrides):
+            if (name is None): # positional override, in declaration order
+                if (index >= len(childDef.overridable)):
+                    continue
+                name = childDef.overridable[index]
+            if (value != "" and name in childDef.parameters):
+                overrides[name] = self.resolveParameter(scope,  value)
+        return overrides
+
+    # returns the value of a parameter override, evaluated in the scope of the instantiating module
+    def resolveParameter(self,  scope,  value):
+        try:
+            return scope.evaluate(value)
+        except ExpressionError: # unknown or bad value, expressions that use it cannot be evaluated
+            return None
+
+    """"
+    Returns how many copies of inst its generate constructs produce in scope: the
+    product of the trip counts of the enclosing for loops and of the size of an
+    instance array, or 0 if an enclosing if statement (or the if of an enclosing else)
+    is false or cannot be evaluated. A for loop that cannot be evaluated counts once.
+    """
+    def instanceCount(self,  scope,  inst,  outcomes):
+        return sum(count for copyScope,  bindings,  count in self.instanceScopes(scope,  inst,  outcomes,  ()))
+
+    """"
+    Returns the copies of inst its generate constructs produce in scope as (scope of
+    the copies, genvar values set in it, number of copies) triples. There is one triple
+    unless the guards of inst or the texts, such as its parameter overrides, use the
+    genvar of a for loop; the loop then gives a triple for each of its iterations, with
+    the genvar set in their scope.
+    """
+    def instanceScopes(self,  scope,  inst,  outcomes,  texts):
+        return self.guardScopes(scope,  inst,  0,  outcomes,  (),  texts)
+
+    """"
+    Returns the (scope, bindings, number of copies) triples of inst made by its guards
+    from position on. When a loop's genvar is used by the guards nested in it or by
+    texts, they are counted again for each of its values with the genvar set in scope;
+    bindings holds the genvar values scope was made with, which are part of the key of
+    outcomes.
+    """
+    def guardScopes(self,  scope,  inst,  position,  outcomes,  bindings,  texts):
+        guards = inst.guards
+        count = 1
+        while (position < len(guards)):
+            guard = guards[position]
+            key = (guard,  bindings)
+            if (not key in outcomes):
+                outcomes[key] = self.evalGuard(scope,  guard)
+            outcome = outcomes[key]
+            position = position + 1
+            if (guard[0] == "for"):
+                if (outcome is None): # unknown trip count, counts once
+                    continue
+                if (outcome.count > 0 and self.usesGenvar(inst,  position,  outcome.genvar,  texts)):
+                    copies = []
+                    for value in outcome.values:
+                        copies.extend(self.guardScopes(scope.bind(outcome.genvar,  value),  inst,  position,  outcomes, 
+                            bindings + ((outcome.genvar,  value), ),  texts))
+                    return [(copyScope,  copyBindings,  count * copyCount) for copyScope,  copyBindings,  copyCount in copies]
+                count = count * outcome.count
+            elif (outcome is None or outcome == (guard[0] in NEGATED_GUARDS)):
+                count = 0
+            if (count <= 0):
+                return []
+        if (inst.arrayRange != ""):
+            count = count * self.arraySize(scope,  inst.arrayRange)
+        return [(scope,  bindings,  count)] if count > 0 else []
+
+    # returns True if the guards of inst from position on, its array range or one of texts use genvar
+    def usesGenvar(self,  inst,  position,  genvar,  texts=()):
+        pattern = re.compile(r'(?<![\w$])' + re.escape(genvar) + r'(?![\w$])')
+        if (pattern.search(inst.arrayRange) or any(pattern.search(text) for text in texts)):
+            return True
+        return any(pattern.search(guard[1]) for guard in inst.guards[position:])
+
+    # evaluates a guard: the GenerateLoop of a for loop, the truth of an if or whether an `ifdef macro is defined, None if unknown
+    def evalGuard(self,  scope,  guard):
+        try:
+            if (guard[0] == "for"):
+                return self.evalLoop(scope,  guard[1])
+            if (guard[0] == "ifdef" or guard[0] == "ifndef"):
+                return scope.defined(guard[1],  guard[2])
+            return scope.condition(guard[1])
+        except (IndexError,  KeyError,  ValueError,  TypeError,  AttributeError):
+            return None
+
+    # returns the number of instances in an array of instances declared with arrayRange, [msb:lsb]
+    def arraySize(self,  scope,  arrayRange):
+        bounds = arrayRange.strip()[1:-1].split(":")
+        try:
+            if (len(bounds) != 2):
+                return 1
+            msb = self.resolveParameter(scope,  bounds[0].strip()).toInt()
+            lsb = self.resolveParameter(scope,  bounds[1].strip()).toInt()
+        except (IndexError,  KeyError,  ValueError,  TypeError,  AttributeError):
+            return 1
+        return abs(msb - lsb) + 1
+
+    """"
+    Given the header of a generate for loop, (init; condition; step), returns its
+    GenerateLoop in scope, None if the loop cannot be evaluated. Loops whose genvar is
+    compared to a bound and stepped by a constant amount are counted without running
+    them; any other loop is stepped through, up to MAX_LOOP_ITERATIONS iterations.
+    """
+    def evalLoop(self,  scope,  header):
+        parts = header.strip()[1:-1].split(";")
+        init = LOOP_INIT_RE.match(parts[0])
+        if (len(parts) != 3 or init is None):
+            return None
+        genvar = init.group(1)
+        start = scope.evaluate(init.group(2)).toInt()
+        step = self.loopStep(genvar,  parts[2])
+        if (step is None):
+            return None
+        values = self.closedForm(scope,  genvar,  start,  compileExpression(parts[1]).tree,  step.tree)
+        if (values is None):
+            values = self.stepThrough(scope,  genvar,  start,  parts[1],  step)
+        if (values is None or values is ENDLESS):
+            return None
+        return GenerateLoop(genvar,  values)
+
+    # returns the compiled expression of the next value of genvar given the step of a loop, None if it is not one
+    def loopStep(self,  genvar,  text):
+        text = text.strip()
+        compact = text.replace(" ",  "")
+        if (compact == genvar + "++" or compact == "++" + genvar):
+            return compileExpression(genvar + " + 1")
+        if (compact == genvar + "--" or compact == "--" + genvar):
+            return compileExpression(genvar + " - 1")
+        match = LOOP_STEP_RE.match(text)
+        if (match is None or match.group(1) != genvar):
+            return None
+        if (match.group(2) is None):
+            return compileExpression(match.group(3))
+        return compileExpression(genvar + " " + match.group(2) + " (" + match.group(3) + ")")
+
+    """"
+    Returns the values of genvar in each iteration of a loop starting at start whose
+    condition and step are the expression trees condition and step, without stepping
+    through the loop if the step adds a constant; None if the loop has no closed form
+    and ENDLESS if it is known never to end.
+    """
+    def closedForm(self,  scope,  genvar,  start,  condition,  step):
+        bound = self.loopBound(scope,  genvar,  condition)
+        if (bound is None or step[0] != "binary"):
+            return None
+        op,  end = bound
+        test = LOOP_TESTS[op]
+        if (not test(start,  end)):
+            return range(start,  start)
+        if (step[2] == ("name",  genvar) and not usesName(step[3],  genvar)):
+            amount = compileNode(step[3])(scope).toInt()
+        elif (step[3] == ("name",  genvar) and not usesName(step[2],  genvar)
+            and (step[1] is BitVector.add or step[1] is BitVector.multiply)):
+            amount = compileNode(step[2])(scope).toInt()
+        else:
+            return None
+        if (step[1] is BitVector.add or step[1] is BitVector.subtract):
+            delta = amount if step[1] is BitVector.add else -amount
+            if (delta > 0 and (op == "<" or op == "<=")):
+                return range(start,  end + 1 if op == "<=" else end,  delta)
+            if (delta < 0 and (op == ">" or op == ">=")):
+                return range(start,  end - 1 if op == ">=" else end,  delta)
+            if (delta != 0 and op == "!=" and (end - start) % delta == 0 and (end - start) // delta > 0):
+                return range(start,  end,  delta)
+            if (op == "=="): # runs once if the step moves the genvar off the bound, stepped through otherwise
+                return range(start,  start + 1) if delta != 0 else None
+            return ENDLESS # the loop never ends, or only ends when the genvar wraps around
+        nextValue = MULTIPLICATIVE_STEPS.get(step[1])
+        if (nextValue is None):
+            return None
+        # the genvar grows or shrinks geometrically, so this takes a logarithmic number of steps
+        values = []
+        value = start
+        while (test(value,  end)):
+            values.append(value)
+            following = nextValue(value,  amount)
+            if (following is None or following == value or len(values) >= MAX_LOOP_ITERATIONS):
+                return None
+            value = following
+        return values
+
+    # returns (comparison operator, bound) if the tree condition compares genvar to a value known in scope
+    def loopBound(self,  scope,  genvar,  condition):
+        if (condition[0] != "binary" or not condition[1] in COMPARISONS):
+            return None
+        if (condition[2] == ("name",  genvar) and not usesName(condition[3],  genvar)):
+            return COMPARISONS[condition[1]][0],  compileNode(condition[3])(scope).toInt()
+        if (condition[3] == ("name",  genvar) and not usesName(condition[2],  genvar)):
+            return COMPARISONS[condition[1]][1],  compileNode(condition[2])(scope).toInt()
+        return None
+
+    # returns the values of genvar in each iteration found by running the loop, None if it runs too long
+    def stepThrough(self,  scope,  genvar,  start,  condition,  step):
+        values = []
+        value = start
+        inner = scope.bind(genvar,  value)
+        while (len(values) < MAX_LOOP_ITERATIONS):
+            if (not inner.condition(condition)):
+                return values
+            values.append(value)
+            value = step.evaluate(inner).toInt()
+            inner.parameters[genvar] = BitVector(value,  INTEGER_WIDTH,  True)
+        return None
+
+    """"
+    Drops the cached elaborations of the modules in names and of every module that
+    instantiates them, directly or not, so they are elaborated again from their
+    current ModuleDefs. Returns the names of all modules that were dropped.
+    """
+    def invalidate(self,  names):
+        parents = {} # key = module name, value = names of modules that instantiate it
+        for elaborated in self.cache.values():
+            for instanceName,  child,  count in elaborated.children:
+                parents.setdefault(child.name,  set()).add(elaborated.name)
+        affected = set(names)
+        stack = list(names)
+        while (len(stack) > 0):
+            for parent in parents.get(stack.pop(),  ()):
+                if (not parent in affected):
+                    affected.add(parent)
+                    stack.append(parent)
+        for key in [key for key in self.cache if key[0] in affected]:
+            del self.cache[key]
+        for key in [key for key in self.signatures if key[0] in affected]:
+            del self.signatures[key]
+        return affected
@@ -0,0 +1,87 @@
+from bitVector import (BitVector,  INTEGER_WIDTH)
+from constExpr import (compileExpression,  ExpressionError)
+from preprocessor import (MacroTable,  SCOPED)
+
+""""
+Class Name: Evaluator
+Class Description: The scope Verilog constant expressions (parameter values, generate
+conditions and loop bounds) are evaluated in: the parameters (and genvars) visible to
+them and the define variables of the directory. Expressions are compiled once by constExpr and
+cached by their text, so evaluating one again, in this scope or any other, only runs
+its compiled form. The value of a define is evaluated once per MacroTable and kept
+there, unless it depends on the scope. Does not depend on Qt so it can be used by the
+elaboration of the hierarchy and by the file view alike.
+"""
+class Evaluator:
+    def __init__(self,  parameters,  macros,  guardMacros=None):
+        self.parameters = parameters # key = parameter name, value = parameter's current value (BitVector)
+        self.macros = macros if isinstance(macros,  MacroTable) else MacroTable(macros) # the define variables visible
+        self.guardMacros = guardMacros if guardMacros is not None else {} # key = number of an `ifdef directive, value = MacroTable seen at it
+        self.expanding = set() # define variables being evaluated, to catch defines that refer to themselves
+        self.uses = None # names of the defines used, collected while a define is evaluated to be kept
+
+    # evaluates value, the text of an expression, to a BitVector; raises ExpressionError if it cannot be evaluated
+    def evaluate(self,  value):
+        return compileExpression(value).evaluate(self)
+
+    # returns a scope with the same parameters and define variables, and the genvar name set to value (an int)
+    def bind(self,  name,  value):
+        parameters = dict(self.parameters)
+        parameters[name] = BitVector(value,  INTEGER_WIDTH,  True)
+        return Evaluator(parameters,  self.macros,  self.guardMacros)
+
+    # evaluates value, the text of a condition, to a boolean
+    def condition(self,  value):
+        return bool(self.evaluate(value))
+
+    # given a string value, returns the BitVector of the number it holds, None if it is not a number
+    def extractNumber(self,  value):
+        return BitVector.parse(value)
+
+    # returns the value of the parameter name, used by compiled expressions
+    def lookup(self,  name):
+        value = self.parameters.get(name)
+        if (not isinstance(value,  BitVector)):
+            raise ExpressionError("unknown value of " + name)
+        return value
+
+    # returns True if the define variable name is defined at the directive numbered directive, for `ifdef guards
+    def defined(self,  name,  directive=None):
+        return self.guardMacros.get(directive,  self.macros).get(name) is not None
+
+    """"
+    Returns the value of the define variable name, used by compiled expressions. The
+    first use evaluates it without parameters and keeps the value in the MacroTable for
+    every later use; a define that needs the parameters of the scope is evaluated in it
+    each time.
+    """
+    def macro(self,  name):
+        macros = self.macros
+        entry = macros.cached(name)
+        if (entry is not None and entry[0] is not SCOPED):
+            if (self.uses is not None):
+                self.uses.add(name)
+                self.uses.update(entry[1])
+            return entry[0]
+        text = macros.get(name)
+        if (text is None or name in self.expanding):
+            raise ExpressionError("unknown value of `" + name)
+        self.expanding.add(name)
+        try:
+            if (entry is None):
+                unscoped = Evaluator({},  macros)
+                unscoped.expanding = self.expanding
+                unscoped.uses = set()
+                try:
+                    value = unscoped.evaluate(text)
+                except ExpressionError:
+                    macros.store(name,  (SCOPED,  frozenset(unscoped.uses)))
+                else:
+                    macros.store(name,  (value,  frozenset(unscoped.uses)))
+                    if (self.uses is not None):
+                        self.uses.add(name)
+                        self.uses.update(unscoped.uses)
+                    return value
+            return self.evaluate(text)
+        finally:
+            self.expanding.discard(name)
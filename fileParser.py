@@ -0,0 +1,115 @@
+import mmap
+import time
+from tokenizer import scanText
+from profiler import PROFILER
+
+# bump whenever FileParser's output changes so cached results from older versions are dropped
+PARSER_VERSION = 6
+
+# encoding source files are decoded with: one character per byte, so offsets in the text are file offsets
+SOURCE_ENCODING = "latin-1"
+
+# minimum number of files before a process pool is worth its startup cost
+PARALLEL_THRESHOLD = 64
+
+""""
+Returns the text of the file at path. The file is memory-mapped and decoded straight
+from the map, so its contents are copied only once however large it is. Every byte
+becomes one character, so offsets in the text are offsets in the file and no file
+fails to decode.
+"""
+def readSource(path):
+    with open(path,  'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(),  0,  access=mmap.ACCESS_READ) as data:
+                return str(data,  SOURCE_ENCODING)
+        except ValueError: # empty files cannot be mapped
+            return ""
+
+# returns the text of the file at path from offset start to offset end; only the pages of that part are read
+def readSlice(path,  start,  end):
+    with open(path,  'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(),  0,  access=mmap.ACCESS_READ) as data:
+                return str(data[start:end],  SOURCE_ENCODING)
+        except ValueError:
+            return ""
+
+""""
+Class Name: FileParser
+Class Description: Qt-free scan of a single Verilog file. Finds all module declarations
+with their raw (unevaluated) parameters and their instantiations, along with the
+generate if/for regions around them, and the define declarations, all in one pass of
+the tokenizer. Instances are plain data so they can be created in worker processes
+and sent back to the GUI. Modules are recorded as offsets in the file (ModuleInfo.start
+and end) and their text is only read when it is needed, by readSlice.
+"""
+class FileParser:
+    def __init__(self,  path):
+        self.path = path
+        self.modules = {} # key = module name, value = ModuleInfo of the module
+        self.defines = [] # (name, value) of every define found, in file order
+        self.directives = [] # preprocessor directives in file order, as recorded by the tokenizer's Scanner
+        self.seconds = 0.0 # time taken to read and scan the file, shown by the profiler
+
+    # reads the file and scans it for its modules and defines
+    def scan(self):
+        start = time.perf_counter()
+        scanner = scanText(readSource(self.path))
+        for info in scanner.modules:
+            self.modules[info.name] = info
+        self.defines = scanner.defines
+        self.directives = scanner.directives
+        self.seconds = time.perf_counter() - start
+        return self.modules
+
+# scans the file at path and returns its FileParser, the unit of work for parseFiles
+def parseFile(path):
+    result = FileParser(path)
+    result.scan()
+    return result
+
+""""
+Parses every file in paths and returns their FileParsers in the same order as paths.
+With more than one worker the files are spread over a process pool; the results are
+identical to the serial path because every file is scanned independently. If a
+ParseCache is given, unchanged files are taken from it instead of being parsed. If
+progress is given it is called with (files done, total files) as files are parsed; an
+exception it raises stops the parse, and files not yet started are dropped.
+"""
+def parseFiles(paths,  workers=1,  cache=None,  progress=None):
+    with PROFILER.phase("parse files"):
+        cached = {}
+        stamps = {}
+        if (cache is not None):
+            cached,  stamps = cache.lookup(paths)
+        missing = [path for path in paths if not path in cached]
+        parsed = []
+        if (progress is not None):
+            progress(len(cached),  len(paths))
+        if (workers <= 1 or len(missing) < PARALLEL_THRESHOLD):
+            for path in missing:
+                parsed.append(parseFile(path))
+                if (progress is not None):
+                    progress(len(cached) + len(parsed),  len(paths))
+        else:
+            from concurrent.futures import ProcessPoolExecutor # only imported when needed, it is slow to import
+            chunkSize = max(1,  len(missing) // (workers * 8)) # keep all workers busy without tiny batches
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                for result in pool.map(parseFile,  missing,  chunksize=chunkSize):
+                    parsed.append(result)
+                    if (progress is not None):
+                        progress(len(cached) + len(parsed),  len(paths))
+            finally:
+                pool.shutdown(cancel_futures=True) # only waits for the chunks already running if stopped early
+        if (cache is not None):
+            cache.store(parsed,  stamps)
+        if (PROFILER.enabled):
+            PROFILER.count("files parsed",  len(parsed))
+            PROFILER.count("files from the parse cache",  len(cached))
+            for result in parsed:
+                PROFILER.fileTime(result.path,  result.seconds)
+        for result in parsed:
+            cached[result.path] = result
+        return [cached[path] for path in paths]
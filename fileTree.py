@@ -1,14 +1,21 @@
 from PyQt5.QtWidgets import (QTreeWidget,  QFileDialog)
 from node import Node
 from fileNode import FileNode
+from fileParser import parseFiles
+from parseCache import ParseCache
+from design import Design
+from fileWatcher import FileWatcher
+from scanner import Scanner
+from symbolIndex import SymbolIndex
+from profiler import PROFILER
 import os
 
 """"
 Class Name: FileTree
 Class Description: Represents the initial view of the directory the user selects.
 Displays verilog files based on their original hierarchy in the selected directory,
-without generating a module-based hierarchy. Extracts all modules found in the
-files to help generate a hierarchy later.
+without generating a module-based hierarchy. The modules found in the files are
+collected by a Design to help generate a hierarchy later.
 """
 class FileTree(QTreeWidget):
     
@@ -17,7 +24,7 @@ class FileTree(QTreeWidget):
         self.title = 'Directory View'
         self.nodes = {} # all the nodes in the file view
         self.defineFiles = {} # the nodes that represent the define files
-        self.moduleNodes = {} # the modules found in the files
+        self.moduleNodes = {} # key = module name, value = ModuleDef of the module
         self.treeGenerated = False # keep track to see if tree needs to be cleared
         self.setHeaderHidden(True)
         self.itemDoubleClicked.connect(self.openFile)
@@ -27,6 +34,13 @@ class FileTree(QTreeWidget):
         self.dir = "" # name of current directory
         self.defineVars = {} # keep track of define vars found in define files
         self.dirNodes = {} # all the  nodes that represent a directory
+        self.workers = os.cpu_count() or 1 # processes used to parse files, 1 parses on the GUI thread
+        self.parseCache = ParseCache() # parse results of unchanged files are reused from here, None disables it
+        self.scanner = Scanner() # lists the verilog and constraint files of dir, skipping excluded and ignored ones
+        self.design = Design(self.workers,  self.parseCache,  self.scanner) # the modules and define variables of the directory
+        self.watcher = FileWatcher(self.scanner) # reports the files changed on disk under dir
+        self.watcher.changed.connect(self.applyChanges)
+        self.symbols = SymbolIndex() # module, parameter and define names of the design, completed by the editors
         if (self.hierarchy):
             self.hierarchy.getFileTree(self) # gives hierarchy a reference to itself
     
@@ -40,54 +54,133 @@ class FileTree(QTreeWidget):
                 return
         # only open nodes that are not directories
         if (not item in self.dirNodes.values()):
-            f = open(item.path, 'r')
-            data = f.read()
-            index = self.mainWindow.addTab(item.fileName,  data,  item.path)
+            index = self.mainWindow.addFileTab(item.fileName,  item.path)
             self.setView(item)
             self.mainWindow.fileView.setCurrentWidget(self.mainWindow.editors[item.fileName])
             self.mainWindow.fileView.setCurrentIndex(index)
             
     
-    # scrolls up/down the file so the module declaration is in the user view
+    # scrolls up/down the file so the module declaration is in the user view, using the line the scan recorded
     def setView(self,  item):
-        if (item.type == "module"):
-            num = 1
-            if ("(" in item.name): # if several modules with the same name
-                str = item.name.split("(", 1)[1].split(")", 1)[0]
-                if (str.isdigit()):
-                    num = int(str) + 1
-            find = "module " + item.module_name # find the module declaration in the file
-            for index in range(num):
-                if (index == 0):
-                    self.mainWindow.editors[item.fileName].findFirst(find,  False, True, True, True,  True,  1,  1,  True,  False)
-                else:
-                    self.mainWindow.editors[item.fileName].findFirst(find,  False, True,  True, True)
+        if (isinstance(item,  Node)):
+            self.mainWindow.showLine(item.fileName,  item.line)
     
-    # search bar functionality - hides all nodes that do not have str in their name
+    # search bar functionality - hides all nodes that do not have str in their name, changing only those that differ
     def searchModule(self,  str):
-        for dir in self.dirNodes:
-            self.dirNodes[dir].setExpanded(True)
-        for node in self.nodes:
-            self.nodes[node].setExpanded(True)
-            if (str in node or str == ""):
-                self.nodes[node].setHidden(False)
-            else:
-                self.nodes[node].setHidden(True)
+        self.setUpdatesEnabled(False)
+        try:
+            for dir in self.dirNodes:
+                if (not self.dirNodes[dir].isExpanded()):
+                    self.dirNodes[dir].setExpanded(True)
+            for node in self.nodes:
+                hide = not (str in node or str == "")
+                if (self.nodes[node].isHidden() != hide):
+                    self.nodes[node].setHidden(hide)
+                if (not self.nodes[node].isExpanded()):
+                    self.nodes[node].setExpanded(True)
+        finally:
+            self.setUpdatesEnabled(True)
         self.hierarchy.searchModule(str)
 
     # shows a dialog for the user to select the root directory
     def showDialog(self):
         self.dir = QFileDialog.getExistingDirectory(self, 'Open Directory','/home',QFileDialog.ShowDirsOnly)
+        self.hierarchy.stopGeneration() # a hierarchy of the previous directory would replace this one
         self.generateTree(self.dir)
 
+    # returns the paths of the verilog and constraint files of the directory, the files searched by Find in Files
+    def searchPaths(self):
+        paths = list(self.design.files)
+        if (self.constraintView is not None):
+            paths.extend(self.constraintView.topLevelItem(index).path for index in range(self.constraintView.topLevelItemCount()))
+        return paths
+
+    # parses the file at path again after it has been saved, see updateFiles
+    def updateFile(self,  path):
+        return self.updateFiles([path])
+
+    """"
+    Parses the files in paths again after they have been saved or changed on disk and
+    updates the modules declared in them, here and in the hierarchy, in one batch.
+    Returns False if the change cannot be applied on its own (a file is a defines file,
+    is included by another file, is not part of the tree, or now declares or
+    instantiates other modules), in which
+    case the whole directory has to be generated again.
+    """
+    def updateFiles(self,  paths):
+        nodes = {os.path.normpath(node.path): node for node in self.nodes.values()}
+        changed = [nodes.get(os.path.normpath(path)) for path in paths]
+        if (any(node is None or len(node.modules) == 0 or self.design.isIncluded(node.path) for node in changed)):
+            return False
+        results = parseFiles([node.path for node in changed],  self.workers,  self.parseCache)
+        for node,  result in zip(changed,  results):
+            if (list(result.modules) != list(node.modules)):
+                return False
+            oldInstances = set(inst.module for info in node.modules.values() for inst in info.instances)
+            if (set(inst.module for info in result.modules.values() for inst in info.instances) != oldInstances):
+                return False
+        names = []
+        for node,  result in zip(changed,  results):
+            node.loadParse(result)
+            names.extend(self.design.updateFile(node.path,  result))
+            for index in range(node.childCount()): # the declarations may have moved
+                child = node.child(index)
+                child.line = result.modules[child.module_name].line
+        self.hierarchy.updateModules(names)
+        self.updateSymbols()
+        return True
+
+    # updates the symbol index with the files parsed since its last update, and the editors if a symbol changed
+    def updateSymbols(self):
+        if (self.symbols.update(self.design.files)):
+            self.mainWindow.updateSymbols()
+
+    """"
+    Applies a batch of changes made on disk, reported by the FileWatcher with the paths
+    of the files and directories that changed. The directory is listed again and only
+    the files added or modified since they were read are parsed. Modified files that
+    keep their modules and instantiations are updated in place; otherwise the file
+    tree is rebuilt from the design and, if a hierarchy has been generated, it is
+    elaborated again in the background. While a hierarchy is being generated the batch
+    is put back to wait for the next one.
+    """
+    def applyChanges(self,  changed):
+        if (not self.dir or not self.treeGenerated):
+            return
+        if (self.hierarchy.isGenerating()):
+            self.watcher.postpone(changed)
+            return
+        scan = self.scanner.scan(self.dir)
+        paths = scan.sources
+        added,  removed,  modified = self.design.changedFiles(paths)
+        shownConstraints = [self.constraintView.topLevelItem(index).path for index in range(self.constraintView.topLevelItemCount())]
+        constraintsChanged = scan.constraints != shownConstraints
+        if (len(added) + len(removed) + len(modified) == 0 and not constraintsChanged):
+            return
+        if (len(added) + len(removed) == 0 and not constraintsChanged and self.updateFiles(modified)):
+            self.watcher.watch(self.dir,  scan) # files replaced by a rename are no longer watched
+            self.mainWindow.statusBar().showMessage(str(len(modified)) + " changed files updated")
+            return
+        generated = self.hierarchy.treeGenerated
+        self.design.workers = self.workers
+        self.design.parseCache = self.parseCache
+        self.design.scanner = self.scanner
+        parsed = self.design.refreshFiles(paths)
+        self.generateTree(self.dir,  self.design)
+        if (generated):
+            self.hierarchy.elaborateModules()
+        self.mainWindow.statusBar().showMessage(str(len(parsed)) + " changed files parsed, "
+            + str(len(removed)) + " removed")
+
     """"
     Parses through the root directory and takes all verilog files and makes nodes
     of them, keeping the hierarchy of the original directory. Then looks through
     all the verilog files and retrieves all module declarations, parameters, and
     any if or for statements in generate blocks. Also parses defines files for t
-    heir variables.
+    heir variables. If design is given, it already holds the files parsed (by a
+    HierarchyWorker) and becomes the design of the tree instead of parsing them again.
     """
-    def generateTree(self,  dir):
+    def generateTree(self,  dir,  design=None):
         if (self.treeGenerated or self.hierarchy.fileSaved): # clears tree to search a new directory
             self.clear()
             self.nodes.clear()
@@ -95,76 +188,74 @@ class FileTree(QTreeWidget):
             self.defineFiles.clear()
             self.moduleNodes.clear()
             self.dirNodes.clear()
+            self.constraintView.clear()
         if dir:
-            for root, dirs, files in os.walk(dir):
-                # keep original hierarchy by making nodes representing directories
-                rootNode = root
-                for dir in dirs:
-                    dirNode = FileNode(dir,  os.path.join(root,  dir),  self)
-                    self.dirNodes[rootNode + "\\" + dir] = dirNode
-                    if (not rootNode in self.dirNodes):
-                        self.addTopLevelItem(dirNode)
+            scan = self.scanner.scan(dir) # skips the directories and files excluded or ignored
+            with PROFILER.phase("file tree items"):
+                # keep original hierarchy by making nodes representing the directories that hold verilog files
+                for directory in scan.sourceDirectories():
+                    dirNode = FileNode(directory.name,  directory.path,  self)
+                    self.dirNodes[directory.path] = dirNode
+                    if (directory.parent in self.dirNodes):
+                        self.dirNodes[directory.parent].addChild(dirNode)
+                        self.dirNodes[directory.parent].dirChildren.append(dirNode)
                     else:
-                        self.dirNodes[rootNode].addChild(dirNode)
-                        self.dirNodes[rootNode].dirChildren.append(dirNode)
-                # search through for Verilog files
-                for file in files:
-                    if file.endswith(".v"):
-                        node = FileNode(file, os.path.join(root, file),  self)
+                        self.addTopLevelItem(dirNode)
+                verilogFiles = [] # (node, root, file name) of every verilog file, in walk order
+                for directory in scan.directories:
+                    for path in directory.sources:
+                        file = os.path.basename(path)
+                        node = FileNode(file,  path,  self)
                         self.nodes[file] = node
-                        moduleNames = node.getModuleNames()
-                        duplicateCheck = {}
-                        for moduleName in moduleNames:
-                            title = moduleName
-                            # if several modules with the same name, differentiate them
-                            if (moduleName in duplicateCheck):
-                                duplicateCheck[moduleName] = duplicateCheck[moduleName] + 1
-                                title = moduleName + " #" + str(duplicateCheck[moduleName])
-                            else:
-                                duplicateCheck[moduleName] = 0
-                            # create one node for this view, another to be passed on for the hierarchy view
-                            child = Node(title,  os.path.join(root,  file),  self.hierarchy,  file,  moduleName)
-                            mod = Node(title,  os.path.join(root,  file),  self.hierarchy,  file,  moduleName)
-                            child.parseData = moduleNames[moduleName]
-                            mod.parseData = moduleNames[moduleName]
-                            node.addChild(child)
-                            self.moduleNodes[moduleName] = mod
-                        # no module declarations, so assume it must be a defines file
-                        if (len(moduleNames) == 0):
-                            node.getDefines()
-                            self.defineFiles[file] = node
+                        verilogFiles.append((node,  directory.path,  file))
                         # add nodes such that original hierarchy is preserved
-                        if (rootNode in self.dirNodes):
-                            self.dirNodes[rootNode].addChild(node)
-                            self.dirNodes[rootNode].dirChildren.append(dirNode)
+                        if (directory.path in self.dirNodes):
+                            self.dirNodes[directory.path].addChild(node)
                         else:
                             self.addTopLevelItem(node)
-                    elif (file.endswith(".tcl")):
-                        node = FileNode(file,  os.path.join(root,  file),  self)
-                        self.constraintView.addTopLevelItem(node)
+                for path in scan.constraints:
+                    self.constraintView.addTopLevelItem(FileNode(os.path.basename(path),  path,  self))
+            # scan all the verilog files that changed since the last scan, on a process pool if more than one worker is set
+            paths = [node.path for node, root, file in verilogFiles]
+            if (design is not None):
+                self.design = design
+            self.design.workers = self.workers
+            self.design.parseCache = self.parseCache
+            self.design.scanner = self.scanner
+            if (design is not None and list(design.files) == paths):
+                results = list(design.files.values())
+            else: # files were added or removed since the design was parsed
+                results = self.design.readFiles(paths)
+            with PROFILER.phase("file tree items"):
+                for (node,  root,  file),  result in zip(verilogFiles,  results):
+                    moduleNames = node.loadParse(result)
+                    duplicateCheck = {}
+                    for moduleName in moduleNames:
+                        title = moduleName
+                        # if several modules with the same name, differentiate them
+                        if (moduleName in duplicateCheck):
+                            duplicateCheck[moduleName] = duplicateCheck[moduleName] + 1
+                            title = moduleName + " #" + str(duplicateCheck[moduleName])
+                        else:
+                            duplicateCheck[moduleName] = 0
+                        node.addChild(Node(title,  os.path.join(root,  file),  file,  moduleName,  node.modules[moduleName].line))
+                    # no module declarations, so assume it must be a defines file
+                    if (len(moduleNames) == 0):
+                        self.defineFiles[file] = node
             self.treeGenerated = True
-            # remove all directory nodes that do not contain any verilog files
-            for dirNode in self.dirNodes.values():
-                for child in dirNode.dirChildren:
-                    if (child.childCount() == 0):
-                        dirNode.removeChild(child)
-            delNodes = [] # helper to delete nodes
-            for index in range(self.topLevelItemCount()):
-                if (self.topLevelItem(index).childCount() == 0):
-                    delNodes.append(index)
-            for index in delNodes:
-                self.takeTopLevelItem(index)
-                
-            # retrieve parameters for all the nodes representing the modules
-            for node in self.nodes.values():
-                node.getParameters()
-                # copy over parsed data
-                for m in node.modules:
-                    self.moduleNodes[m].parseData = node.parseData
-                    self.moduleNodes[m].generateConditions = node.generateConditions
-                    self.moduleNodes[m].parameters = node.parameters
+            if (PROFILER.enabled):
+                PROFILER.count("file tree items",  len(self.dirNodes) + self.constraintView.topLevelItemCount()
+                    + sum(1 + node.childCount() for node in self.nodes.values()))
+
+            # the define variables, and the modules with their evaluated parameters, collected by the design
+            self.defineVars.update(self.design.defineVars)
+            self.moduleNodes.update(self.design.modules)
             
             # pass over defined variables and reference to itself to hierarchy to generate tree
             self.hierarchy.defineVars = self.defineVars
             self.hierarchy.getFileTree(self)
-            self.hierarchy.generateTree(self.moduleNodes)
+            if (design is None or not self.hierarchy.treeGenerated): # a generated hierarchy stays until it is replaced
+                self.hierarchy.generateTree(self.moduleNodes)
+            self.updateSymbols()
+            # changes made on disk from now on are applied in batches
+            self.watcher.watch(self.dir,  scan)
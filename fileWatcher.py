@@ -0,0 +1,78 @@
+import time
+from PyQt5.QtCore import (QObject,  QFileSystemWatcher,  QTimer,  pyqtSignal)
+
+# milliseconds without a new change before the changes collected are reported
+WATCH_DELAY = 500
+
+# longest time in seconds changes are held back while more keep coming
+WATCH_MAX_DELAY = 3.0
+
+""""
+Class Name: FileWatcher
+Class Description: Watches a directory tree for changes made outside the explorer
+(a checkout, a generator, another editor). Every directory and file a Scanner lists
+under the root is watched through a QFileSystemWatcher, and the
+paths reported are collected until no change has come for WATCH_DELAY milliseconds
+(or WATCH_MAX_DELAY seconds have passed), then reported at once by the changed signal.
+A branch switch touching thousands of files thus makes one batch instead of
+thousands of updates. Directories the scanner skips, such as .git or build outputs,
+are not watched.
+"""
+class FileWatcher(QObject):
+    changed = pyqtSignal(object) # set of the paths of the files and directories that changed
+
+    def __init__(self,  scanner):
+        super(FileWatcher, self).__init__()
+        self.scanner = scanner
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.pathChanged)
+        self.watcher.fileChanged.connect(self.pathChanged)
+        self.pending = set() # paths changed since the last batch
+        self.firstChange = None # time of the first change of the pending batch
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(WATCH_DELAY)
+        self.timer.timeout.connect(self.flush)
+
+    """"
+    Watches the directories and files under directory, replacing what was watched
+    before. Called again after each batch, so that new directories and files are
+    watched and files replaced by a rename are watched again. scan is a ScanResult of
+    directory that was just made, if there is one.
+    """
+    def watch(self,  directory,  scan=None):
+        wanted = set()
+        if (directory):
+            if (scan is None):
+                scan = self.scanner.scan(directory)
+            wanted.update(scanned.path for scanned in scan.directories)
+            wanted.update(scan.sources)
+            wanted.update(scan.constraints)
+        watched = set(self.watcher.directories()) | set(self.watcher.files())
+        if (len(watched - wanted) > 0):
+            self.watcher.removePaths(list(watched - wanted))
+        if (len(wanted - watched) > 0):
+            self.watcher.addPaths(sorted(wanted - watched))
+
+    # collects a change and waits for the next one, unless the batch has already waited WATCH_MAX_DELAY
+    def pathChanged(self,  path):
+        self.pending.add(path)
+        if (self.firstChange is None):
+            self.firstChange = time.perf_counter()
+        if (time.perf_counter() - self.firstChange < WATCH_MAX_DELAY or not self.timer.isActive()):
+            self.timer.start()
+
+    # puts the changes of a batch that could not be applied back, to be reported with the next batch
+    def postpone(self,  paths):
+        self.pending.update(paths)
+        if (self.firstChange is None):
+            self.firstChange = time.perf_counter()
+        self.timer.start()
+
+    # reports the changes collected as one batch
+    def flush(self):
+        paths = self.pending
+        self.pending = set()
+        self.firstChange = None
+        if (len(paths) > 0):
+            self.changed.emit(paths)
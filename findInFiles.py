@@ -0,0 +1,163 @@
+import os
+import re
+
+# characters Scintilla counts as part of a word, for whole word searches
+WORD_CHARACTERS = "A-Za-z0-9_"
+
+# most matches of one file whose line is kept, the others are only counted
+MAX_FILE_MATCHES = 1000
+
+# characters of a matching line kept for display
+MAX_LINE_LENGTH = 200
+
+# bytes of files searched by a worker process in one task, so small files do not cost a task each
+BATCH_BYTES = 16 * 1024 * 1024
+
+# seconds between two checks of whether the search was stopped while the workers are busy
+POLL_INTERVAL = 0.1
+
+""""
+Returns the compiled search of text on UTF-8 bytes. text is a Python regular expression
+if regex is True and literal text otherwise; a whole word match must not have a word
+character right before or after it, as in Scintilla.
+"""
+def searchRegex(text,  regex=False,  wholeWord=False,  caseSensitive=False):
+    if (regex):
+        re.compile(text) # an error in the expression is reported at its position in text
+    pattern = text if regex else re.escape(text)
+    if (wholeWord):
+        pattern = "(?<![" + WORD_CHARACTERS + "])(?:" + pattern + ")(?![" + WORD_CHARACTERS + "])"
+    flags = re.MULTILINE if caseSensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(pattern.encode("utf-8"),  flags)
+
+""""
+Class Name: TextSearch
+Class Description: A search of searchFiles: the compiled regex of searchRegex and, for
+literal text, the text itself. Literal text is looked for with bytes.find, on a lower
+case copy of the data if the search ignores case, and the regex only checks the places
+found (for whole words), which is much faster than running it over all the data.
+"""
+class TextSearch:
+    def __init__(self,  text,  regex=False,  wholeWord=False,  caseSensitive=False):
+        self.pattern = searchRegex(text,  regex,  wholeWord,  caseSensitive)
+        self.caseSensitive = caseSensitive
+        self.literal = None # the text looked for with bytes.find, None for a regular expression
+        if (not regex and text != ""):
+            self.literal = text.encode("utf-8") if caseSensitive else text.encode("utf-8").lower()
+
+    # yields the matches of the search in data, in order and without overlapping, like re finditer
+    def finditer(self,  data):
+        if (self.literal is None):
+            yield from self.pattern.finditer(data)
+            return
+        haystack = data if self.caseSensitive else data.lower() # ASCII only, the same case folding as re on bytes
+        position = haystack.find(self.literal)
+        while (position >= 0):
+            match = self.pattern.match(data,  position)
+            if (match is not None):
+                yield match
+                position = haystack.find(self.literal,  match.end())
+            else: # not a whole word
+                position = haystack.find(self.literal,  position + 1)
+
+""""
+Class Name: FileMatches
+Class Description: The matches of a search in one file. Lines and columns count from
+0, columns in bytes of the line like the indexes of QScintilla.
+"""
+class FileMatches:
+    def __init__(self,  path):
+        self.path = path
+        self.matches = [] # (line, column, text of the line) of the first MAX_FILE_MATCHES matches
+        self.count = 0 # number of matches in the file
+        self.error = None # message of the error that kept the file from being read
+
+# returns the FileMatches of search, a TextSearch, in data, the contents of the file at path
+def searchBytes(path,  data,  search):
+    result = FileMatches(path)
+    matches = search.finditer(data)
+    line = 0
+    lineStart = 0 # offset of the start of line
+    for match in matches:
+        start = match.start()
+        line = line + data.count(b"\n",  lineStart,  start)
+        lineStart = data.rfind(b"\n",  0,  start) + 1
+        lineEnd = data.find(b"\n",  start)
+        if (lineEnd < 0):
+            lineEnd = len(data)
+        text = data[lineStart:min(lineEnd,  lineStart + MAX_LINE_LENGTH * 4)].decode("utf-8",  "replace")
+        result.matches.append((line,  start - lineStart,  text.rstrip("\r")[:MAX_LINE_LENGTH]))
+        if (len(result.matches) == MAX_FILE_MATCHES):
+            break
+    result.count = len(result.matches) + sum(1 for match in matches) # the rest are only counted
+    return result
+
+# returns the FileMatches of search in the file at path
+def searchFile(path,  search):
+    try:
+        with open(path,  'rb') as f:
+            data = f.read()
+    except OSError as error:
+        result = FileMatches(path)
+        result.error = error.strerror or str(error)
+        return result
+    return searchBytes(path,  data,  search)
+
+# returns the FileMatches of search in each file of paths, run by the worker processes
+def searchBatch(paths,  search):
+    return [searchFile(path,  search) for path in paths]
+
+# splits paths into lists of about BATCH_BYTES bytes of files
+def batches(paths):
+    batch = []
+    size = 0
+    for path in paths:
+        try:
+            size = size + os.path.getsize(path)
+        except OSError: # reported when the file is searched
+            pass
+        batch.append(path)
+        if (size >= BATCH_BYTES):
+            yield batch
+            batch = []
+            size = 0
+    if (len(batch) > 0):
+        yield batch
+
+""""
+Runs search, a TextSearch, on the files of paths and yields a FileMatches for
+each of them as soon as it is searched, so results can be shown while the search goes
+on. The files whose path is a key of buffers are searched in those bytes, such as the
+text of an open editor, instead of being read again; they come first. The others are
+read and searched by worker processes, in batches of about BATCH_BYTES bytes, and come
+in the order the batches end. The search ends early if stopped, a function, returns
+True, or when the generator is closed.
+"""
+def searchFiles(paths,  search,  buffers=None,  workers=1,  stopped=None):
+    buffers = buffers or {}
+    onDisk = [path for path in paths if not os.path.normpath(path) in buffers]
+    for path in paths:
+        data = buffers.get(os.path.normpath(path))
+        if (data is not None):
+            if (stopped is not None and stopped()):
+                return
+            yield searchBytes(path,  data,  search)
+    if (workers <= 1):
+        for path in onDisk:
+            if (stopped is not None and stopped()):
+                return
+            yield searchFile(path,  search)
+        return
+    from concurrent.futures import (ProcessPoolExecutor,  wait,  FIRST_COMPLETED) # only imported when needed, it is slow to import
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        running = set(pool.submit(searchBatch,  batch,  search) for batch in batches(onDisk))
+        while (len(running) > 0):
+            done,  running = wait(running,  timeout=POLL_INTERVAL,  return_when=FIRST_COMPLETED)
+            if (stopped is not None and stopped()):
+                return
+            for future in done:
+                for result in future.result():
+                    yield result
+    finally:
+        pool.shutdown(wait=False,  cancel_futures=True) # batches already running end on their own
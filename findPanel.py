@@ -0,0 +1,223 @@
+import os
+import re
+import time
+from PyQt5.QtWidgets import (QDockWidget,  QWidget,  QVBoxLayout,  QHBoxLayout,  QLineEdit,  QCheckBox,
+    QPushButton,  QLabel,  QTreeWidget,  QTreeWidgetItem)
+from PyQt5.QtCore import (QThread,  pyqtSignal)
+from findInFiles import (TextSearch,  searchFiles)
+
+# least seconds between two batches of results posted to the panel
+RESULTS_INTERVAL = 0.1
+
+# matches shown before the search stops
+MAX_RESULTS = 10000
+
+""""
+Class Name: FindWorker
+Class Description: Runs a search of searchFiles on a background thread. The files with
+matches are put in batches for the GUI thread to take, at most every RESULTS_INTERVAL
+seconds, so the panel fills in while the worker processes are still searching.
+"""
+class FindWorker(QThread):
+    found = pyqtSignal() # a batch of results is ready in batches
+    progress = pyqtSignal(int,  int) # files searched, matches found
+
+    def __init__(self,  paths,  search,  buffers,  workers):
+        super(FindWorker, self).__init__()
+        self.paths = paths
+        self.search = search # TextSearch run on the files
+        self.buffers = buffers # key = normalized path of an open file, value = the bytes of its editor
+        self.workers = workers
+        self.searched = 0
+        self.matches = 0
+        self.limited = False # True if the search stopped at MAX_RESULTS matches
+        self.batches = [] # lists of the FileMatches with matches or errors, not yet taken by the GUI thread
+        self.error = None
+
+    def run(self):
+        pending = []
+        lastPost = time.perf_counter()
+        results = searchFiles(self.paths,  self.search,  self.buffers,  self.workers,  self.isInterruptionRequested)
+        try:
+            for result in results:
+                self.searched = self.searched + 1
+                if (result.count > 0 or result.error is not None):
+                    pending.append(result)
+                    self.matches = self.matches + result.count
+                if (time.perf_counter() - lastPost >= RESULTS_INTERVAL):
+                    lastPost = time.perf_counter()
+                    self.post(pending)
+                    pending = []
+                if (self.matches >= MAX_RESULTS):
+                    self.limited = True
+                    break
+        except Exception as error: # reported in the panel
+            self.error = str(error) or type(error).__name__
+        finally:
+            results.close()
+        self.post(pending)
+
+    # hands the results found to the panel
+    def post(self,  results):
+        if (len(results) > 0):
+            self.batches.append(results)
+            self.found.emit()
+        self.progress.emit(self.searched,  self.matches)
+
+    # returns the results posted and not taken yet; called by the GUI thread, also once the thread has ended
+    def takeResults(self):
+        results = []
+        while (len(self.batches) > 0):
+            results.extend(self.batches.pop(0))
+        return results
+
+""""
+Class Name: FindPanel
+Class Description: Dock panel that searches every file of the FileTree at once. The
+search runs on a FindWorker over the worker processes used for parsing; open files are
+searched in the text of their editor, so unsaved changes are found too. Matches appear
+under their file as they are found, and a double click opens the file at the match.
+"""
+class FindPanel(QDockWidget):
+    def __init__(self,  mainWindow):
+        super(FindPanel, self).__init__("Find in Files",  mainWindow)
+        self.mainWindow = mainWindow
+        self.worker = None
+        self.setObjectName("findPanel")
+        self.initUI()
+
+    def initUI(self):
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Text to find in the files of the directory")
+        self.input.returnPressed.connect(self.find)
+        self.regex = QCheckBox("Regular expression")
+        self.wholeWord = QCheckBox("Whole word")
+        self.caseSensitive = QCheckBox("Match case")
+        self.findButton = QPushButton("Find")
+        self.findButton.clicked.connect(self.find)
+        self.cancelButton = QPushButton("Cancel")
+        self.cancelButton.clicked.connect(self.stopSearch)
+        self.cancelButton.setEnabled(False)
+        self.status = QLabel()
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.openResult)
+
+        options = QHBoxLayout()
+        options.addWidget(self.input,  1)
+        for widget in (self.regex,  self.wholeWord,  self.caseSensitive,  self.findButton,  self.cancelButton):
+            options.addWidget(widget)
+        layout = QVBoxLayout()
+        layout.addLayout(options)
+        layout.addWidget(self.status)
+        layout.addWidget(self.results)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+    # shows the panel with the cursor in the search box
+    def showPanel(self):
+        self.show()
+        self.raise_()
+        self.input.setFocus()
+        self.input.selectAll()
+
+    # returns the bytes of the files open in an editor, by normalized path; files still loading are read from disk
+    def openBuffers(self):
+        buffers = {}
+        for name,  editor in self.mainWindow.editors.items():
+            path = self.mainWindow.filePaths.get(name,  "")
+            if (path != "" and not editor.isLoading()):
+                buffers[os.path.normpath(path)] = bytes(editor.bytes(0,  editor.length()))[:editor.length()]
+        return buffers
+
+    # starts searching the text typed, stopping the previous search
+    def find(self):
+        self.stopSearch()
+        self.results.clear()
+        if (self.input.text() == ""):
+            self.status.setText("")
+            return
+        try:
+            search = TextSearch(self.input.text(),  self.regex.isChecked(),  self.wholeWord.isChecked(),  self.caseSensitive.isChecked())
+        except re.error as error:
+            self.status.setText("Invalid regular expression: " + str(error))
+            return
+        fileTree = self.mainWindow.fileTree
+        paths = fileTree.searchPaths()
+        if (len(paths) == 0):
+            self.status.setText("No files to search, set a directory first")
+            return
+        worker = FindWorker(paths,  search,  self.openBuffers(),  fileTree.workers)
+        worker.found.connect(lambda: self.addResults(worker))
+        worker.progress.connect(lambda searched,  matches: self.showProgress(worker,  searched,  matches))
+        worker.finished.connect(lambda: self.searchFinished(worker))
+        self.worker = worker
+        self.total = len(paths)
+        self.started = time.perf_counter()
+        self.cancelButton.setEnabled(True)
+        self.status.setText("Searching " + str(self.total) + " files...")
+        worker.start()
+
+    # stops the search running, keeping the results found so far
+    def stopSearch(self):
+        if (self.worker is not None):
+            self.worker.requestInterruption()
+            self.worker.wait()
+            self.searchFinished(self.worker)
+
+    # adds the files found by worker and their matches to the panel
+    def addResults(self,  worker):
+        if (worker is not self.worker): # the search has ended or been replaced, its last results are already shown
+            return
+        self.results.setUpdatesEnabled(False)
+        try:
+            for result in worker.takeResults():
+                fileItem = QTreeWidgetItem([result.path])
+                fileItem.path = result.path
+                fileItem.line = None
+                if (result.error is not None):
+                    fileItem.setText(0,  result.path + ": " + result.error)
+                else:
+                    fileItem.setText(0,  result.path + " (" + str(result.count) + ")")
+                for line,  column,  text in result.matches:
+                    item = QTreeWidgetItem(fileItem,  [str(line + 1) + ": " + text.strip()])
+                    item.path = result.path
+                    item.line = line
+                    item.column = column
+                if (result.count > len(result.matches)):
+                    QTreeWidgetItem(fileItem,  [str(result.count - len(result.matches)) + " more matches not shown"])
+                self.results.addTopLevelItem(fileItem)
+                fileItem.setExpanded(True)
+        finally:
+            self.results.setUpdatesEnabled(True)
+
+    # shows how far the search of worker has gone
+    def showProgress(self,  worker,  searched,  matches):
+        if (worker is self.worker):
+            self.status.setText("Searched " + str(searched) + " of " + str(self.total) + " files, " + str(matches) + " matches")
+
+    # shows the outcome of the search of worker once it has ended
+    def searchFinished(self,  worker):
+        if (worker is not self.worker): # already handled, or a search replaced since
+            return
+        self.addResults(worker)
+        self.worker = None
+        self.cancelButton.setEnabled(False)
+        worker.deleteLater()
+        text = str(worker.matches) + " matches in " + str(self.results.topLevelItemCount()) + " files, " + \
+            str(worker.searched) + " of " + str(self.total) + " files searched in " + "%.2f" % (time.perf_counter() - self.started) + " s"
+        if (worker.error is not None):
+            text = "Search failed: " + worker.error
+        elif (worker.limited):
+            text = text + ", stopped at " + str(MAX_RESULTS) + " matches"
+        elif (worker.searched < self.total):
+            text = text + ", cancelled"
+        self.status.setText(text)
+
+    # opens the file of the result double clicked, at the line of the match
+    def openResult(self,  item):
+        if (getattr(item,  "line",  None) is None):
+            return
+        self.mainWindow.showMatch(item.path,  item.line,  item.column)
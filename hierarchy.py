@@ -1,113 +1,335 @@
-from PyQt5.QtWidgets import (QTreeWidget)
+from PyQt5.QtWidgets import (QTreeView,  QMessageBox)
+from PyQt5.QtCore import (QModelIndex)
+from hierarchyModel import (HierarchyModel,  FETCH_SIZE)
+from elaborate import Elaborated
+from searchIndex import SearchIndex
+from pathQuery import PathQuery
+from hierarchyWorker import HierarchyWorker
+from profiler import PROFILER
+
+# most rows a search fetches to expand the paths to its matches, rows past it are left collapsed
+SEARCH_ROW_LIMIT = 20000
+
+# most matches of a path query shown in the tree
+PATH_RESULT_LIMIT = 1000
 
 """"
 Class Name: Hierarchy
 Class Description: Represents the widget in the Hierarchy tab of the main
-interface. Given module nodes from the class FileTree, creates a hierarchy
-out of those modules.
+interface. Given the modules found by the class FileTree, creates a hierarchy
+out of those modules. The rows are provided by a HierarchyModel, which only
+creates them as the user expands and scrolls through the tree.
 """
-class Hierarchy(QTreeWidget):
+class Hierarchy(QTreeView):
     
     def __init__(self, mainWindow):
-        super(QTreeWidget, self).__init__()
+        super(Hierarchy, self).__init__()
         self.title = 'Hierarchy View'
-        self.nodes = {} # key - module name, value - corresponding node
-        self.nodePaths = {} # key - module name, value - corresponding file path
-        self.nodesExplored = {} # key - file name, value - True if that file has been parsed, False otherwise
-        self.hasParent = {} # key - module name, value - True if that module has a parent
-        self.nodeFiles = {} # key - module name, value - file name module is found in
-        self.allNodes = [] # list of all nodes in the hierarchy
+        self.modules = {} # key - module name, value - ModuleDef of the module
         self.defineVars = {} # key - define variable, value - corresponding value
+        self.elaborator = None # elaborates the modules, set once a hierarchy has been generated
+        self.hierarchyModel = HierarchyModel()
+        self.setModel(self.hierarchyModel)
         self.setHeaderHidden(True)
-        self.itemDoubleClicked.connect(self.openFile)
+        self.setUniformRowHeights(True) # lets the view skip measuring rows it does not show
+        self.doubleClicked.connect(self.openFile)
         self.treeGenerated = False
         self.fileSaved = False
         self.mainWindow = mainWindow
-    
-    # for search bar functionality - displays all nodes with str in their names + their parents
+        self.searchIndex = SearchIndex() # names of the hierarchy shown, for the search bar
+        self.searchText = "" # text of the current search
+        self.pathText = "" # text of the current path query, "" if the search is by name
+        self.searchResult = None # SearchResult of the current search, narrowed as the text grows
+        self.hiddenRows = set() # ids of the rows hidden by the current search
+        self.worker = None # HierarchyWorker of the generation running in the background, None if there is none
+
+    # shows the hierarchy below root and indexes it for the search bar, unless searchIndex already holds its index
+    def setRoot(self,  root,  searchIndex=None):
+        self.hierarchyModel.setRoot(root)
+        self.hiddenRows = set()
+        if (searchIndex is not None):
+            self.searchIndex = searchIndex
+        self.indexTree(searchIndex is None)
+
+    # indexes the hierarchy shown for the search bar if build is True, and applies the current search to it again
+    def indexTree(self,  build=True):
+        if (build):
+            self.searchIndex.build(self.hierarchyModel.elaborated(QModelIndex()))
+        self.searchResult = None
+        if (self.pathText != ""):
+            self.searchPath(self.pathText)
+        elif (self.searchText != "" or len(self.hiddenRows) > 0):
+            self.searchModule(self.searchText)
+
+    """"
+    For search bar functionality - displays all rows with str in their instance or
+    module names, and their parents. The search index tells which rows have a match
+    below them, so only the paths to matches are fetched and expanded (at most
+    SEARCH_ROW_LIMIT rows), and the rows to hide or show again are collected first and
+    changed in one batch.
+    """
     def searchModule(self,  str):
-        for node in self.allNodes:
-            node.setExpanded(True) # expand all to help visualize search
-            if (str in node.name or str == "" or self.searchChildren(node,  str)):
-                parent = node.parent()
-                while (parent != None): # set all parent nodes as visible
-                    parent.setHidden(False)
-                    parent = parent.parent()
-                node.setHidden(False)
-            else:
-                node.setHidden(True)
+        model = self.hierarchyModel
+        result = self.searchIndex.search(str,  self.searchResult)
+        self.searchText = str
+        self.searchResult = result
+        self.pathText = ""
+        hidden = set()
+        budget = SEARCH_ROW_LIMIT
+        self.setUpdatesEnabled(False)
+        try:
+            stack = [QModelIndex()] if str != "" else []
+            while (len(stack) > 0):
+                parent = stack.pop()
+                model.fetchAll(parent)
+                for row in range(model.rowCount(parent)):
+                    index = model.index(row,  0,  parent)
+                    rowId = index.internalId()
+                    elaborated = model.elaborated(index)
+                    below = elaborated in result.below
+                    if (not (below or result.matches(model.name(index),  elaborated.name))):
+                        hidden.add(rowId)
+                    # expand to help visualize search, creating only the paths to matches
+                    if (below and budget >= elaborated.childCount()):
+                        budget = budget - elaborated.childCount()
+                        self.expand(index)
+                        stack.append(index)
+            self.setHiddenRows(hidden)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    """"
+    Search bar functionality in path mode - shows the instances whose hierarchical path
+    matches the PathQuery text (e.g. top.u_core.*.alu*), with the rows leading to them
+    expanded and their siblings hidden. The query runs on the shared elaborations, and
+    only the rows on the paths to the first PATH_RESULT_LIMIT matches are fetched.
+    """
+    def searchPath(self,  text):
+        model = self.hierarchyModel
+        table = model.table
+        self.pathText = text.strip()
+        self.searchText = ""
+        self.searchResult = None
+        if (self.pathText == ""):
+            self.setHiddenRows(set())
+            self.mainWindow.statusBar().clearMessage()
+            return
+        root = model.elaborated(QModelIndex())
+        query = PathQuery(self.pathText)
+        total = query.count(root)
+        matches = query.run(root,  PATH_RESULT_LIMIT)
+        shown = set() # rows on the paths to the matches
+        parents = set() # rows whose children are filtered, 0 for the top level
+        budget = SEARCH_ROW_LIMIT
+        self.setUpdatesEnabled(False)
+        try:
+            for path in matches:
+                parent = QModelIndex()
+                for entry,  copy in path:
+                    row = model.entryOffsets(model.elaborated(parent))[entry] + max(copy,  0)
+                    while (model.rowCount(parent) <= row and budget > 0): # fetch up to the row
+                        budget = budget - FETCH_SIZE
+                        model.fetchMore(parent)
+                    if (model.rowCount(parent) <= row):
+                        break
+                    if (parent.isValid()):
+                        self.expand(parent)
+                    parents.add(model.rowId(parent))
+                    parent = model.index(row,  0,  parent)
+                    shown.add(parent.internalId())
+            hidden = set()
+            for parentId in parents:
+                hidden.update(rowId for rowId in table.children.get(parentId,  ()) if not rowId in shown)
+            self.setHiddenRows(hidden)
+        finally:
+            self.setUpdatesEnabled(True)
+        message = str(total) + " instances match " + self.pathText
+        if (total > len(matches)):
+            message = message + ", showing the first " + str(len(matches))
+        self.mainWindow.statusBar().showMessage(message)
 
-    # helper function for searchModule: returns true if str is in the  name of any of node's children
-    def searchChildren(self,  node,  str):
-        for c in node.nodeChildren:
-            if (str in c.name):
-                return True
-            self.searchChildren(c,  str)
+    # hides the rows in hidden and shows again those hidden before that are not in it, changing only those that differ
+    def setHiddenRows(self,  hidden):
+        model = self.hierarchyModel
+        table = model.table
+        for rowId in self.hiddenRows - hidden: # rows shown again
+            if (table.parents[rowId] >= 0):
+                self.setRowHidden(table.rows[rowId],  model.indexOf(table.parents[rowId]),  False)
+        for rowId in hidden - self.hiddenRows:
+            self.setRowHidden(table.rows[rowId],  model.indexOf(table.parents[rowId]),  True)
+        self.hiddenRows = hidden
     
     # gives a reference to the FileTree in the other tab
     def getFileTree(self,  fileTree):
         self.fileTree = fileTree
     
     # when user double clicks on a node in the widget, opens the corresponding file
-    def openFile(self, item):
+    def openFile(self,  index):
+        module = self.hierarchyModel.elaborated(index).module
+        if (module is None): # module declaration was not found
+            return
         # if the file is already open, set that tab to be the current viewed tab
-        for index in range(self.mainWindow.fileView.count()):
-            if (self.mainWindow.fileView.tabText(index) == item.fileName):
-                self.mainWindow.openTab(index)
+        for tab in range(self.mainWindow.fileView.count()):
+            if (self.mainWindow.fileView.tabText(tab) == module.fileName):
+                self.mainWindow.openTab(tab)
+                self.mainWindow.showLine(module.fileName,  module.line)
                 return
         # else, add a new tab for the new file
-        f = open(item.path, 'r')
-        data = f.read()
-        index = self.mainWindow.addTab(item.fileName,  data,  item.path)
-        self.mainWindow.fileView.setCurrentWidget(self.mainWindow.editors[item.fileName])
-        self.mainWindow.fileView.setCurrentIndex(index)
+        tab = self.mainWindow.addFileTab(module.fileName,  module.path)
+        self.mainWindow.fileView.setCurrentWidget(self.mainWindow.editors[module.fileName])
+        self.mainWindow.fileView.setCurrentIndex(tab)
+        self.mainWindow.showLine(module.fileName,  module.line)
     
-    # parse through the files of all the nodes and generate the hierarchy
+    """"
+    Elaborates all the modules and shows the ones that are not instantiated anywhere as
+    the top of the hierarchy. The files are parsed again first if a tree has already
+    been generated or a file was saved. The work runs on a HierarchyWorker while the
+    status bar shows its progress and a button to cancel it; the tree shown is only
+    replaced once the worker has finished.
+    """
     def readFiles(self):
-        self.mainWindow.statusBar().showMessage('Generating Tree...')
-        # reset the tree if a tree has already been generated
-        if (self.treeGenerated or self.fileSaved):
-            self.clear()
-            self.fileTree.generateTree(self.fileTree.dir)
+        if (self.isGenerating()):
+            return
+        if ((self.treeGenerated or self.fileSaved) and self.fileTree.dir):
             self.fileSaved = False
-        # read the file of all the nodes that have not already been read
-        for node in self.nodes.values():
-            if (not self.nodesExplored[node.fileName]):
-                node.readFile()
+            self.startGeneration(None) # reset the tree from the files on disk
+        else:
+            self.startGeneration(self.fileTree.design)
+
+    # elaborates the modules of the file tree's design again in the background after changes on disk, without parsing the files
+    def elaborateModules(self):
+        if (not self.isGenerating()):
+            self.startGeneration(self.fileTree.design,  False)
+
+    """"
+    Starts a HierarchyWorker on source, the Design to elaborate, or None to parse the
+    directory again. If interactive is False (the user did not ask for it) missing
+    modules are not reported in a dialog when it finishes.
+    """
+    def startGeneration(self,  source,  interactive=True):
+        fileTree = self.fileTree
+        worker = HierarchyWorker(fileTree.dir,  source,  fileTree.workers,  fileTree.parseCache,  fileTree.scanner)
+        worker.progress.connect(self.mainWindow.showProgress)
+        worker.finished.connect(lambda: self.generationFinished(worker,  interactive))
+        self.worker = worker
+        self.mainWindow.showProgress('Generating Tree',  0,  0)
+        worker.start()
+
+    # returns True while a hierarchy is being generated in the background
+    def isGenerating(self):
+        return self.worker is not None
+
+    # cancels the generation running in the background, if any, and waits for its thread to end
+    def stopGeneration(self):
+        worker = self.worker
+        if (worker is None):
+            return
+        worker.cancel()
+        worker.wait()
+        self.generationFinished(worker)
+
+    # swaps in the hierarchy made by worker once its thread has ended, unless it was cancelled or failed
+    def generationFinished(self,  worker,  interactive=True):
+        if (worker is not self.worker): # already handled by stopGeneration
+            return
+        self.worker = None
+        worker.deleteLater() # the result is kept by the view, not by the thread
+        self.mainWindow.hideProgress()
+        if (not worker.succeeded()):
+            if (worker.source is None): # the files still have to be parsed again
+                self.fileSaved = True
+            if (worker.error is not None):
+                QMessageBox.warning(self,  "Warning",  "Could not generate the hierarchy: " + worker.error)
+            else:
+                self.mainWindow.statusBar().showMessage('Hierarchy generation cancelled')
+            return
+        if (worker.source is None): # show the files as they were parsed
+            self.fileTree.generateTree(worker.directory,  worker.design)
+        self.elaborator = worker.elaborator
+        with PROFILER.phase("show hierarchy"):
+            self.setRoot(worker.root,  worker.searchIndex)
         self.treeGenerated = True
-        # remove all top level modules that have been added as children of other nodes
-        for name in self.hasParent:
-            if (self.hasParent[name]):
-                self.takeTopLevelItem(self.indexOfTopLevelItem(self.nodes[name]))
-                self.allNodes.remove(self.nodes[name])
-            elif("#" in name): # remove any modules with the same name
-                self.takeTopLevelItem(self.indexOfTopLevelItem(self.nodes[name]))
-                self.allNodes.remove(self.nodes[name])
-        # for all remaining nodes, check their generate conditions and delete any necessary nodes
-        for node in self.allNodes:
-            node.parseConditions()
-        # reset the nodes explored for the next hierarchy to be generated
-        for name in self.nodesExplored:
-            self.nodesExplored[name] = False
+        self.showElaborationStats()
+        if (interactive):
+            self.showMissingModules()
+
+    # shows in the status bar how many elaborations were made and how many instantiations reused one
+    def showElaborationStats(self):
+        elaborator = self.elaborator
+        self.mainWindow.statusBar().showMessage("Elaborated " + str(len(elaborator.cache)) + " unique modules, "
+            + str(elaborator.hits) + " of " + str(elaborator.hits + elaborator.misses) + " instantiations reused ("
+            + str(round(100 * elaborator.hitRate())) + "%)")
     
-    # given nodes, which is a list of Nodes that represent all the modules declared in the verilog
-    # files in the directory.
-    def generateTree(self,  nodes):
-        modules = nodes
-        if (self.treeGenerated or self.fileSaved): # clear the tree and all helper data structures to make new tree
-            self.clear()
-            self.nodes.clear()
-            self.nodesExplored.clear()
-            self.nodePaths.clear()
-            self.nodeFiles.clear()
-            self.hasParent.clear()
-            self.allNodes.clear()
-            self.treeGenerated = False
-        for node in modules.values(): # set up default values for all helper data structures
-            self.nodes[node.module_name] = node
-            self.allNodes.append(node)
-            self.nodePaths[node.module_name] = node.path
-            self.nodesExplored[node.fileName] = False
-            self.hasParent[node.module_name] = False
-            self.nodeFiles[node.module_name] = node.fileName
-        self.addTopLevelItems(modules.values())
+    # informs the user about every module that was instantiated but never declared
+    def showMissingModules(self):
+        if (len(self.elaborator.missing) > 0):
+            lines = []
+            for moduleName,  fileName in self.elaborator.missing.items():
+                lines.append("Could not find source file for module " 
+                    + moduleName + " called in file " + fileName + " while parsing.")
+            message = QMessageBox()
+            message.setWindowTitle("Warning")
+            message.setText("\n".join(lines))
+            message.exec()
+    
+    """"
+    Regenerates only the parts of the tree that depend on the modules in names, which
+    are declared in files that were just saved or changed on disk. The modules and
+    every module that instantiates them are elaborated again, and only the rows whose
+    elaboration changed are refreshed. The expansion state of the tree is kept.
+    """
+    def updateModules(self,  names):
+        if (not self.treeGenerated):
+            return
+        expanded = self.expandedPaths()
+        # the rows refresh removes give their ids to the rows fetched next, so the search is applied again from scratch
+        self.setHiddenRows(set())
+        self.elaborator.invalidate(names)
+        root = Elaborated(None,  "",  {})
+        for name,  child,  count in self.hierarchyModel.elaborated(QModelIndex()).children:
+            root.children.append((name,  self.elaborator.elaborate(name),  count))
+        self.hierarchyModel.refresh(QModelIndex(),  root)
+        self.restoreExpanded(expanded)
+        self.indexTree()
+        self.showElaborationStats()
+    
+    # returns the paths (tuples of row names) of all expanded rows
+    def expandedPaths(self):
+        model = self.hierarchyModel
+        paths = []
+        stack = [(QModelIndex(),  ())]
+        while (len(stack) > 0):
+            parent,  path = stack.pop()
+            for row in range(model.rowCount(parent)):
+                index = model.index(row,  0,  parent)
+                if (self.isExpanded(index)):
+                    paths.append(path + (model.name(index), ))
+                    stack.append((index,  path + (model.name(index), )))
+        return paths
+    
+    # expands the rows found at paths, as returned by expandedPaths, fetching the rows of each level only up to the one on the path
+    def restoreExpanded(self,  paths):
+        model = self.hierarchyModel
+        for path in sorted(paths,  key=len):
+            index = QModelIndex()
+            for name in path:
+                parent = index
+                row = model.childRow(parent,  name)
+                while (row >= model.rowCount(parent) and model.canFetchMore(parent)):
+                    model.fetchMore(parent)
+                index = model.index(row,  0,  parent)
+                if (not index.isValid()): # no longer in the tree
+                    break
+            if (index.isValid()):
+                self.expand(index)
+    
+    # given modules, a dictionary of the ModuleDefs of all the modules declared in the verilog
+    # files in the directory, lists them until a hierarchy is generated
+    def generateTree(self,  modules):
+        self.modules = modules
+        self.elaborator = None
+        self.treeGenerated = False
+        root = Elaborated(None,  "",  {})
+        for module in modules.values():
+            root.children.append((module.name,  Elaborated(module,  module.name,  module.parameters),  1))
+        self.setRoot(root)
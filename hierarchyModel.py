@@ -0,0 +1,168 @@
+from bisect import bisect_right
+from PyQt5.QtCore import (Qt,  QAbstractItemModel,  QModelIndex)
+from elaborate import (Elaborated,  indexedName)
+from instanceTable import InstanceTable
+from profiler import PROFILER
+
+# number of rows created at a time when a node is expanded or scrolled to its end
+FETCH_SIZE = 1000
+
+""""
+Class Name: HierarchyModel
+Class Description: Item model of the Hierarchy view. The whole hierarchy lives in the
+shared elaborations made by Elaborator; rows are only created when the view asks for
+them through canFetchMore/fetchMore, FETCH_SIZE at a time, so a design with millions
+of instances costs only as many rows as the user has expanded and scrolled through.
+The rows are kept in the columns of an InstanceTable, whose row ids are the internal
+ids of the model's indexes.
+"""
+class HierarchyModel(QAbstractItemModel):
+    def __init__(self):
+        super(HierarchyModel, self).__init__()
+        self.table = InstanceTable() # the fetched rows
+        self.offsets = {} # key = Elaborated, value = index of the first row of each instantiation
+        self.setRoot(Elaborated(None,  "",  {}))
+
+    # replaces the contents of the model; the children of root are shown as the top level
+    def setRoot(self,  root):
+        self.beginResetModel()
+        self.table.clear()
+        self.table.add(0,  0,  root,  0,  -1,  "")
+        self.offsets = {}
+        self.endResetModel()
+
+    # returns the id of the row at index, 0 for the invisible root
+    def rowId(self,  index):
+        if (index.isValid()):
+            return index.internalId()
+        return 0
+
+    # returns the index of the row with the given id
+    def indexOf(self,  rowId):
+        if (rowId == 0):
+            return QModelIndex()
+        return self.createIndex(self.table.rows[rowId],  0,  rowId)
+
+    # returns the Elaborated shown at index
+    def elaborated(self,  index):
+        return self.table.elaboratedOf(self.rowId(index))
+
+    # returns the instance name shown at index (the module name for the top level)
+    def name(self,  index):
+        return self.table.nameOf(self.rowId(index))
+
+    # returns the first row of each instantiation of elaborated, followed by the total
+    def entryOffsets(self,  elaborated):
+        if (not elaborated in self.offsets):
+            offsets = [0]
+            for name,  child,  count in elaborated.children:
+                offsets.append(offsets[-1] + count)
+            self.offsets[elaborated] = offsets
+        return self.offsets[elaborated]
+
+    # returns the row of the child of parent shown as name, found in its elaboration whether the row is fetched or not; -1 if there is none
+    def childRow(self,  parent,  name):
+        elaborated = self.elaborated(parent)
+        offsets = self.entryOffsets(elaborated)
+        for entry,  (childName,  child,  count) in enumerate(elaborated.children):
+            if (count == 1):
+                if (childName == name):
+                    return offsets[entry]
+            elif (name.startswith(childName + "[")):
+                copy = name[len(childName) + 1:-1]
+                if (copy.isascii() and copy.isdigit() and int(copy) < count and indexedName(childName,  int(copy)) == name):
+                    return offsets[entry] + int(copy)
+        return -1
+
+    def index(self,  row,  column,  parent=QModelIndex()):
+        children = self.table.children.get(self.rowId(parent),  ())
+        if (column != 0 or row < 0 or row >= len(children)):
+            return QModelIndex()
+        return self.createIndex(row,  0,  children[row])
+
+    def parent(self,  index):
+        if (not index.isValid()):
+            return QModelIndex()
+        return self.indexOf(self.table.parents[index.internalId()])
+
+    def rowCount(self,  parent=QModelIndex()):
+        if (parent.column() > 0):
+            return 0
+        return len(self.table.children.get(self.rowId(parent),  ()))
+
+    def columnCount(self,  parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self,  parent=QModelIndex()):
+        return len(self.elaborated(parent).children) > 0
+
+    def data(self,  index,  role=Qt.DisplayRole):
+        if (not index.isValid()):
+            return None
+        if (role == Qt.DisplayRole):
+            rowId = index.internalId()
+            if (self.table.parents[rowId] == 0):
+                return self.name(index)
+            return self.name(index) + " (" + self.table.strings[self.table.modules[rowId]] + ")"
+        return None
+
+    def canFetchMore(self,  parent):
+        return self.rowCount(parent) < self.entryOffsets(self.elaborated(parent))[-1]
+
+    # creates the next FETCH_SIZE child rows of parent
+    def fetchMore(self,  parent):
+        parentId = self.rowId(parent)
+        elaborated = self.table.elaboratedOf(parentId)
+        offsets = self.entryOffsets(elaborated)
+        start = self.rowCount(parent)
+        end = min(offsets[-1],  start + FETCH_SIZE)
+        if (end <= start):
+            return
+        self.beginInsertRows(parent,  start,  end - 1)
+        entry = bisect_right(offsets,  start) - 1
+        add = self.table.add
+        for row in range(start,  end):
+            while (offsets[entry + 1] <= row):
+                entry = entry + 1
+            name,  child,  count = elaborated.children[entry]
+            add(parentId,  row,  child,  entry,  row - offsets[entry] if count > 1 else -1,  name)
+        self.endInsertRows()
+        if (PROFILER.enabled):
+            PROFILER.count("hierarchy rows created",  end - start)
+
+    # creates every child row of parent
+    def fetchAll(self,  parent):
+        while (self.canFetchMore(parent)):
+            self.fetchMore(parent)
+
+    """"
+    Points the row at index to a new elaboration. If the row's instantiations are the
+    same as before its fetched children are refreshed in place, otherwise they are
+    removed and fetched again when the view asks for them. Rows whose elaboration is
+    unchanged are left alone. The offsets of the elaborations no row shows any more are
+    dropped with them.
+    """
+    def refresh(self,  index,  elaborated):
+        self.refreshRow(index,  elaborated)
+        elaboratedIds = self.table.elaboratedIds
+        self.offsets = {shown: offsets for shown,  offsets in self.offsets.items() if shown in elaboratedIds}
+
+    # refreshes the row at index and its fetched children, see refresh
+    def refreshRow(self,  index,  elaborated):
+        rowId = self.rowId(index)
+        table = self.table
+        old = table.elaboratedOf(rowId)
+        if (old is elaborated):
+            return
+        table.setElaborated(rowId,  elaborated)
+        children = table.children.get(rowId,  ())
+        oldEntries = [(name,  child.name,  count) for name,  child,  count in old.children]
+        if (oldEntries == [(name,  child.name,  count) for name,  child,  count in elaborated.children]):
+            for childId in children:
+                self.refreshRow(self.indexOf(childId),  elaborated.children[table.entries[childId]][1])
+        elif (len(children) > 0):
+            self.beginRemoveRows(index,  0,  len(children) - 1)
+            table.removeChildren(rowId)
+            self.endRemoveRows()
+        if (index.isValid()):
+            self.dataChanged.emit(index,  index)
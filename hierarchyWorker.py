@@ -0,0 +1,99 @@
+import time
+from PyQt5.QtCore import (QThread,  pyqtSignal)
+from design import Design
+from elaborate import Elaborator
+from parseCache import ParseCache
+from searchIndex import SearchIndex
+from profiler import PROFILER
+
+# least seconds between two progress reports, so a fast phase does not flood the GUI with signals
+PROGRESS_INTERVAL = 0.05
+
+""""
+Class Name: GenerationCancelled
+Class Description: Raised from a progress report of a HierarchyWorker whose
+cancellation was requested, to unwind the parse or elaboration it interrupts.
+"""
+class GenerationCancelled(Exception):
+    pass
+
+""""
+Class Name: HierarchyWorker
+Class Description: Generates a hierarchy on a background thread so the GUI stays
+usable. If source is None, the Verilog files of directory are parsed again into a new
+Design, otherwise the modules of source are elaborated as they are. The elaboration and
+its SearchIndex are built here too; the GUI thread only swaps the finished result in,
+all at once, when the thread finishes. Nothing the GUI thread owns is modified: the
+worker elaborates a copy of the module dictionaries and opens its own connection to
+the parse cache.
+"""
+class HierarchyWorker(QThread):
+    progress = pyqtSignal(str,  int,  int) # phase, steps done, total steps (0 if unknown)
+
+    def __init__(self,  directory,  source,  workers,  parseCache,  scanner):
+        super(HierarchyWorker, self).__init__()
+        self.directory = directory
+        self.source = source # Design whose modules are elaborated, None to parse directory again
+        self.workers = workers
+        self.scanner = scanner # Scanner that lists the files of directory
+        self.cachePath = parseCache.path if parseCache is not None else None
+        self.cacheBytes = parseCache.maxBytes if parseCache is not None else 0
+        self.phase = ""
+        self.reportedPhase = None # phase of the last progress posted
+        self.lastReport = 0.0
+        # set by run before the thread finishes
+        self.design = None # the Design elaborated, a new one if the files were parsed again
+        self.elaborator = None
+        self.root = None # Elaborated whose children are the top modules
+        self.searchIndex = None
+        self.error = None # message of the exception that stopped the generation
+
+    def run(self):
+        with PROFILER.threadProfile(): # cProfile only sees the thread it runs in
+            self.generate()
+
+    # makes the Design, elaboration and SearchIndex of the hierarchy
+    def generate(self):
+        try:
+            design = self.source
+            if (design is None):
+                parseCache = ParseCache(self.cachePath,  self.cacheBytes) if self.cachePath is not None else None
+                design = Design(self.workers,  parseCache,  self.scanner)
+                self.phase = "Parsing files"
+                design.load(self.directory,  self.report)
+            self.phase = "Elaborating modules"
+            elaborator = Elaborator(dict(design.modules),  dict(design.defineVars))
+            elaborator.progress = self.report
+            root = elaborator.elaborateTop()
+            elaborator.progress = None # the elaborator is used again by the GUI thread after this one ends
+            self.phase = "Indexing hierarchy"
+            self.report(0,  0)
+            searchIndex = SearchIndex()
+            searchIndex.build(root)
+            self.report(0,  0)
+            self.design,  self.elaborator,  self.root,  self.searchIndex = design,  elaborator,  root,  searchIndex
+        except GenerationCancelled:
+            pass
+        except Exception as error: # reported to the user by the GUI thread
+            self.error = str(error) or type(error).__name__
+
+    """"
+    Posts the progress of the current phase, at most every PROGRESS_INTERVAL seconds
+    unless the phase changed or ended. Stops the generation if it was cancelled.
+    """
+    def report(self,  done,  total):
+        if (self.isInterruptionRequested()):
+            raise GenerationCancelled()
+        now = time.perf_counter()
+        if (now - self.lastReport >= PROGRESS_INTERVAL or self.phase != self.reportedPhase or (total > 0 and done == total)):
+            self.lastReport = now
+            self.reportedPhase = self.phase
+            self.progress.emit(self.phase,  done,  total)
+
+    # asks the thread to stop at its next progress report
+    def cancel(self):
+        self.requestInterruption()
+
+    # returns True if the generation ran to the end
+    def succeeded(self):
+        return self.root is not None
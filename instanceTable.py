@@ -0,0 +1,188 @@
+from array import array
+from elaborate import indexedName
+
+# typecode of the columns, 4 byte signed ints
+COLUMN_TYPE = 'i'
+
+""""
+Class Name: InstanceRef
+Class Description: Read-only view of one row of an InstanceTable. Holds only the table
+and the row id, so one can be made whenever a row is looked at and dropped after.
+"""
+class InstanceRef:
+    __slots__ = ("table",  "id")
+
+    def __init__(self,  table,  id):
+        self.table = table
+        self.id = id
+
+    @property
+    def parent(self):
+        return self.table.parents[self.id]
+
+    @property
+    def row(self):
+        return self.table.rows[self.id]
+
+    @property
+    def elaborated(self):
+        return self.table.elaboratedOf(self.id)
+
+    @property
+    def name(self):
+        return self.table.nameOf(self.id)
+
+    @property
+    def module(self):
+        return self.table.strings[self.table.modules[self.id]]
+
+    @property
+    def entry(self):
+        return self.table.entries[self.id]
+
+    @property
+    def copy(self):
+        return self.table.copies[self.id]
+
+    @property
+    def children(self):
+        return self.table.children.get(self.id,  ())
+
+""""
+Class Name: InstanceTable
+Class Description: The instance rows of the elaborated hierarchy kept in columns of
+ints instead of one object per row: the parent row, the position among the parent's
+children, the id of the row's Elaborated (its parameter set), the interned module and
+instance names, the index of the instantiation in the parent's Elaborated and the copy
+made by a generate for loop (-1 for a single instance). A row costs a few tens of
+bytes whatever its module; names and elaborations are stored once and shared. Row 0
+is the invisible root. Rows are never moved; the ids of removed rows are given to the
+next rows added, and an elaboration or a name no row shows any more is dropped, so
+the table does not grow as the hierarchy is refreshed.
+"""
+class InstanceTable:
+    def __init__(self):
+        self.clear()
+
+    # removes every row and interned value
+    def clear(self):
+        self.parents = array(COLUMN_TYPE)
+        self.rows = array(COLUMN_TYPE)
+        self.elaborations = array(COLUMN_TYPE)
+        self.modules = array(COLUMN_TYPE)
+        self.names = array(COLUMN_TYPE)
+        self.entries = array(COLUMN_TYPE)
+        self.copies = array(COLUMN_TYPE)
+        self.children = {} # key = row id, value = array of the ids of its fetched children
+        self.free = array(COLUMN_TYPE) # ids of the removed rows, reused first
+        self.elaborated = [] # Elaborated of each elaboration id, None for an id no row uses
+        self.elaboratedIds = {} # key = Elaborated, value = its elaboration id
+        self.uses = array(COLUMN_TYPE) # number of rows showing each elaboration id
+        self.freeElaborations = [] # elaboration ids no row uses, reused first
+        self.strings = [] # module and instance name of each string id, None for an id no row uses
+        self.stringIds = {} # key = module or instance name, value = its string id
+        self.stringUses = array(COLUMN_TYPE) # number of uses of each string id by the rows
+        self.freeStrings = [] # string ids no row uses, reused first
+
+    def __len__(self):
+        return len(self.parents) - len(self.free)
+
+    # returns the id of string for one more use of it by a row, adding it if no row uses it yet
+    def intern(self,  string):
+        stringId = self.stringIds.get(string)
+        if (stringId is None):
+            if (len(self.freeStrings) > 0):
+                stringId = self.freeStrings.pop()
+                self.strings[stringId] = string
+            else:
+                stringId = len(self.strings)
+                self.strings.append(string)
+                self.stringUses.append(0)
+            self.stringIds[string] = stringId
+        self.stringUses[stringId] = self.stringUses[stringId] + 1
+        return stringId
+
+    # counts one use less of the string stringId, dropping it when no row uses it
+    def releaseString(self,  stringId):
+        self.stringUses[stringId] = self.stringUses[stringId] - 1
+        if (self.stringUses[stringId] == 0):
+            del self.stringIds[self.strings[stringId]]
+            self.strings[stringId] = None
+            self.freeStrings.append(stringId)
+
+    # returns the id of elaborated for one more row showing it, adding it if no row shows it yet
+    def useElaboration(self,  elaborated):
+        elaborationId = self.elaboratedIds.get(elaborated)
+        if (elaborationId is None):
+            if (len(self.freeElaborations) > 0):
+                elaborationId = self.freeElaborations.pop()
+                self.elaborated[elaborationId] = elaborated
+            else:
+                elaborationId = len(self.elaborated)
+                self.elaborated.append(elaborated)
+                self.uses.append(0)
+            self.elaboratedIds[elaborated] = elaborationId
+        self.uses[elaborationId] = self.uses[elaborationId] + 1
+        return elaborationId
+
+    # counts one row less showing the elaboration elaborationId, dropping it when no row shows it
+    def releaseElaboration(self,  elaborationId):
+        self.uses[elaborationId] = self.uses[elaborationId] - 1
+        if (self.uses[elaborationId] == 0):
+            del self.elaboratedIds[self.elaborated[elaborationId]]
+            self.elaborated[elaborationId] = None
+            self.freeElaborations.append(elaborationId)
+
+    # adds a row below parent and returns its id, the id of a removed row if there is one
+    def add(self,  parent,  row,  elaborated,  entry,  copy,  name):
+        values = (parent,  row,  self.useElaboration(elaborated),  self.intern(elaborated.name),  self.intern(name),  entry,  copy)
+        columns = (self.parents,  self.rows,  self.elaborations,  self.modules,  self.names,  self.entries,  self.copies)
+        if (len(self.free) > 0):
+            rowId = self.free.pop()
+            for column,  value in zip(columns,  values):
+                column[rowId] = value
+        else:
+            rowId = len(self.parents)
+            for column,  value in zip(columns,  values):
+                column.append(value)
+        if (rowId != parent):
+            self.children.setdefault(parent,  array(COLUMN_TYPE)).append(rowId)
+        return rowId
+
+    # returns a view of the row rowId
+    def instance(self,  rowId):
+        return InstanceRef(self,  rowId)
+
+    # returns the Elaborated shown by the row rowId
+    def elaboratedOf(self,  rowId):
+        return self.elaborated[self.elaborations[rowId]]
+
+    # points the row rowId to elaborated
+    def setElaborated(self,  rowId,  elaborated):
+        elaborationId = self.useElaboration(elaborated)
+        self.releaseElaboration(self.elaborations[rowId])
+        self.elaborations[rowId] = elaborationId
+        moduleId = self.intern(elaborated.name)
+        self.releaseString(self.modules[rowId])
+        self.modules[rowId] = moduleId
+
+    # returns the instance name of the row rowId, with its copy index if it is one of several copies
+    def nameOf(self,  rowId):
+        name = self.strings[self.names[rowId]]
+        copy = self.copies[rowId]
+        if (copy >= 0):
+            return indexedName(name,  copy)
+        return name
+
+    # removes every row below the row rowId, freeing their ids and the elaborations and names only they showed
+    def removeChildren(self,  rowId):
+        stack = [rowId]
+        while (len(stack) > 0):
+            children = self.children.pop(stack.pop(),  ())
+            for childId in children:
+                self.parents[childId] = -1
+                self.releaseElaboration(self.elaborations[childId])
+                self.releaseString(self.modules[childId])
+                self.releaseString(self.names[childId])
+            self.free.extend(children)
+            stack.extend(children)
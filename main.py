@@ -1,16 +1,27 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 from PyQt5.QtWidgets import (QWidget, QSplitter, 
     QApplication,  QDesktopWidget, QTabWidget, 
     QMainWindow,  QAction,  qApp,  QMenu,  QFileDialog, 
-    QHBoxLayout,  QVBoxLayout,  QLineEdit,  QLabel)
+    QHBoxLayout,  QVBoxLayout,  QLineEdit,  QLabel,  QInputDialog,  QCheckBox, 
+    QProgressBar,  QPushButton)
 from PyQt5.QtGui import (QIcon)
-from PyQt5.QtCore import (Qt)
+from PyQt5.QtCore import (Qt,  QTimer)
 from hierarchy import Hierarchy
-from editor import CodeEditor
+from editor import (CodeEditor,  LARGE_FILE_SIZE,  READ_ONLY_SIZE)
 from fileTree import FileTree
+from findPanel import FindPanel
+from profilerPanel import ProfilerPanel
+
+# milliseconds the search bar waits after the last keystroke before searching
+SEARCH_DELAY = 150
+
+# returns the items of a comma separated list typed by the user, without blanks
+def splitList(text):
+    return tuple(item.strip() for item in text.split(",") if item.strip() != "")
 
 """"
 Class Name: Main
@@ -51,7 +62,16 @@ class Main(QMainWindow):
         searchBarLabel.setText("Search modules:")
         self.searchBar = QLineEdit()
         self.searchBar.setStatusTip('Search modules')
-        self.searchBar.textChanged.connect(self.fileTree.searchModule)
+        # the search runs once the user has stopped typing for SEARCH_DELAY milliseconds
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(SEARCH_DELAY)
+        self.searchTimer.timeout.connect(self.search)
+        self.searchBar.textChanged.connect(lambda text: self.searchTimer.start())
+        # in path mode the search bar takes hierarchical paths such as top.u_core.*.alu* or **.*:sram*
+        self.pathSearch = QCheckBox("Path query")
+        self.pathSearch.setStatusTip('Search instances by hierarchical path: * and ? match within a level, ** any levels, name:module filters by module')
+        self.pathSearch.toggled.connect(self.switchSearchMode)
         
         #tabbed view to view and edit files
         self.fileView = QTabWidget()
@@ -76,6 +96,7 @@ class Main(QMainWindow):
         vlbox = QVBoxLayout(leftSide)
         vlbox.addWidget(searchBarLabel)
         vlbox.addWidget(self.searchBar)
+        vlbox.addWidget(self.pathSearch)
         vlbox.addWidget(self.folderView)
         rightSide.setLayout(vrbox)
         leftSide.setLayout(vlbox)
@@ -87,13 +108,55 @@ class Main(QMainWindow):
         hbox.addWidget(main_splitter)
         wid.setLayout(hbox)
         
+        # panel listing the matches of a search in every file of the directory, shown from the Search menu
+        self.findPanel = FindPanel(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea,  self.findPanel)
+        self.findPanel.hide()
+        
+        # panel timing the phases of opening a directory and generating the hierarchy, shown from the Settings menu
+        self.profilerPanel = ProfilerPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea,  self.profilerPanel)
+        self.profilerPanel.hide()
+        
         # set up the status bar and file menus
         self.statusBar()
+        self.setUpProgress()
         self.setUpMenus()
         self.center()    
         self.show()
     
     
+    # creates the label, progress bar and cancel button shown in the status bar while a hierarchy is generated
+    def setUpProgress(self):
+        self.progressLabel = QLabel()
+        self.progressBar = QProgressBar()
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.setTextVisible(False)
+        self.cancelButton = QPushButton('Cancel')
+        self.cancelButton.setStatusTip('Stop generating the hierarchy')
+        self.cancelButton.clicked.connect(self.hierarchy.stopGeneration)
+        for widget in (self.progressLabel,  self.progressBar,  self.cancelButton):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+
+    # shows the progress of phase in the status bar, done steps out of total (0 if the total is unknown)
+    def showProgress(self,  phase,  done,  total):
+        text = phase
+        if (total > 0):
+            text = text + ": " + str(done) + " of " + str(total)
+        elif (done > 0):
+            text = text + ": " + str(done)
+        self.progressLabel.setText(text)
+        self.progressBar.setRange(0,  total) # a range of 0 shows a busy indicator
+        self.progressBar.setValue(done)
+        for widget in (self.progressLabel,  self.progressBar,  self.cancelButton):
+            widget.show()
+
+    # hides the progress of the hierarchy generation
+    def hideProgress(self):
+        for widget in (self.progressLabel,  self.progressBar,  self.cancelButton):
+            widget.hide()
+
     """"
     Creates and links the actions to be called when the user selects something
     on the status menu or file menu.
@@ -130,6 +193,30 @@ class Main(QMainWindow):
         generateHierarchy.setStatusTip('Generate Hierarchy')
         generateHierarchy.triggered.connect(self.hierarchy.readFiles)
         
+        # sets how many processes are used to parse the files of a directory
+        parseWorkers = QAction('Parse Workers...',  self)
+        parseWorkers.setStatusTip('Set the number of processes used to parse files')
+        parseWorkers.triggered.connect(self.setParseWorkers)
+        
+        # sets which files are scanned and which directories are skipped
+        scanExtensions = QAction('Scanned Extensions...',  self)
+        scanExtensions.setStatusTip('Set the extensions of the Verilog and constraint files to scan')
+        scanExtensions.triggered.connect(self.setScanExtensions)
+        excludedDirs = QAction('Excluded Directories...',  self)
+        excludedDirs.setStatusTip('Set the names of the directories never scanned, .gitignore and .explorerignore files are also followed')
+        excludedDirs.triggered.connect(self.setExcludedDirs)
+        
+        # forgets all cached parse results so every file is parsed again
+        clearCache = QAction('Clear Parse Cache',  self)
+        clearCache.setStatusTip('Parse every file again the next time a directory is opened')
+        clearCache.triggered.connect(self.clearParseCache)
+        
+        # searches every file of the directory
+        findInFiles = QAction('Find in Files...',  self)
+        findInFiles.setShortcut('Ctrl+Shift+F')
+        findInFiles.setStatusTip('Search the files of the directory')
+        findInFiles.triggered.connect(self.findPanel.showPanel)
+        
         # undo and redo actions made in the current editor
         undo = QAction(QIcon('undo1.png'), 'Undo',  self)
         undo.triggered.connect(self.undo)
@@ -144,6 +231,14 @@ class Main(QMainWindow):
         fileMenu.addAction(saveFile)
         fileMenu.addAction(saveAsFile)
         fileMenu.addAction(openDir)
+        searchMenu = menubar.addMenu('Search')
+        searchMenu.addAction(findInFiles)
+        settingsMenu = menubar.addMenu('Settings')
+        settingsMenu.addAction(parseWorkers)
+        settingsMenu.addAction(scanExtensions)
+        settingsMenu.addAction(excludedDirs)
+        settingsMenu.addAction(clearCache)
+        settingsMenu.addAction(self.profilerPanel.toggleViewAction())
         
         # adding all actions to the tool bar
         self.toolbar = self.addToolBar("Generate Hierarchy")
@@ -152,6 +247,12 @@ class Main(QMainWindow):
         self.toolbar.addAction(undo)
         self.toolbar.addAction(redo)
     
+    # stops a hierarchy generation or a search still running before the window closes
+    def closeEvent(self,  event):
+        self.hierarchy.stopGeneration()
+        self.findPanel.stopSearch()
+        super().closeEvent(event)
+
     # centers the browser to the middle of the screen
     def center(self):
         qr = self.frameGeometry()
@@ -171,20 +272,28 @@ class Main(QMainWindow):
         elif action == opnAct:
             self.showDialog
     
-    # saves the current file being edited
+    # saves the current file being edited and updates the parts of the tree that depend on it
     def file_save(self):
         if (self.fileView.currentIndex() >= 0):
-            self.hierarchy.fileSaved = True
             name = self.filePaths[self.fileView.tabText(self.fileView.currentIndex())]
+            if (self.textEdit.isLoading()): # saving now would cut the file short
+                self.statusBar().showMessage('The file is still loading')
+                return
             if (not name == ""):
                 file = open(name,'w')
                 text = self.textEdit.text()
                 file.write(text)
                 file.close()
+                # a generation running in the background works on the modules as they were, so it is redone next time
+                if (self.hierarchy.isGenerating() or not self.fileTree.updateFile(name)): # regenerate everything next time instead
+                    self.hierarchy.fileSaved = True
     
     # saves the current file being edited as a new name
     def file_saveAs(self):
         if (self.fileView.currentIndex() >= 0):
+            if (self.textEdit.isLoading()):
+                self.statusBar().showMessage('The file is still loading')
+                return
             self.hierarchy.fileSaved = True
             name = QFileDialog.getSaveFileName(self, 'Save File')
             if name[0]:
@@ -197,34 +306,129 @@ class Main(QMainWindow):
     def showDialog(self):
         fname = QFileDialog.getOpenFileName(self, 'Open file', '/home')
         if fname[0]:
-            f = open(fname[0], 'r')
-            with f:
-                data = f.read()
-                fileNames = fname[0].split("/")
-                fileName = fileNames[len(fileNames) - 1]
-                # if the file's tab is already open, select that tab
-                for index in range(self.fileView.count()):
-                    if (self.fileView.tabText(index) == fileName):
-                        self.openTab(index)
-                        return
-                index = self.addTab(fileName,  data,  fname[0])
-                self.fileView.setCurrentWidget(self.editors[fileName])
-                self.fileView.setCurrentIndex(index)
+            fileNames = fname[0].split("/")
+            fileName = fileNames[len(fileNames) - 1]
+            # if the file's tab is already open, select that tab
+            for index in range(self.fileView.count()):
+                if (self.fileView.tabText(index) == fileName):
+                    self.openTab(index)
+                    return
+            index = self.addFileTab(fileName,  fname[0])
+            self.fileView.setCurrentWidget(self.editors[fileName])
+            self.fileView.setCurrentIndex(index)
     
     # sets a new directory and retrieves its files
     def openDirectory(self):
         self.fileTree.showDialog()
     
-    # adds a new tab to the fileview that can be viewed
-    def addTab(self, name, data,  path):
-        editor = CodeEditor("verilog")
+    # asks the user how many processes to use when parsing a directory (1 = no parallel parsing)
+    def setParseWorkers(self):
+        workers, ok = QInputDialog.getInt(self,  'Parse Workers',  'Number of processes used to parse files:', 
+            self.fileTree.workers,  1,  256)
+        if ok:
+            self.fileTree.workers = workers
+    
+    # asks the user for the extensions of the verilog and constraint files to scan, as comma separated lists
+    def setScanExtensions(self):
+        scanner = self.fileTree.scanner
+        text, ok = QInputDialog.getText(self,  'Scanned Extensions',  'Verilog file extensions:', 
+            QLineEdit.Normal,  ", ".join(scanner.sourceExtensions))
+        if (not ok):
+            return
+        constraints, ok = QInputDialog.getText(self,  'Scanned Extensions',  'Constraint file extensions:', 
+            QLineEdit.Normal,  ", ".join(scanner.constraintExtensions))
+        if ok:
+            scanner.sourceExtensions = splitList(text)
+            scanner.constraintExtensions = splitList(constraints)
+            self.fileTree.applyChanges({self.fileTree.dir})
+    
+    # asks the user for the glob patterns of the names of the directories never scanned
+    def setExcludedDirs(self):
+        scanner = self.fileTree.scanner
+        text, ok = QInputDialog.getText(self,  'Excluded Directories',  'Directory names never scanned (* and ? allowed):', 
+            QLineEdit.Normal,  ", ".join(scanner.excludedDirs))
+        if ok:
+            scanner.excludedDirs = splitList(text)
+            self.fileTree.applyChanges({self.fileTree.dir})
+    
+    # empties the on-disk cache of parsed files
+    def clearParseCache(self):
+        if (self.fileTree.parseCache is not None):
+            self.fileTree.parseCache.clear()
+            self.statusBar().showMessage('Parse cache cleared')
+    
+    # adds a new tab to the fileview that can be viewed, showing data unless it is None
+    def addTab(self, name, data,  path,  largeFile=False):
+        editor = CodeEditor("verilog",  largeFile=largeFile)
         index = self.fileView.addTab(editor,  name)
         self.editors[name] = editor
         self.filePaths[name] = path
-        editor.setText(data)
+        if (data is not None):
+            editor.setText(data)
+        editor.setSymbols(self.fileTree.symbols.words(),  self.fileTree.symbols.version)
         self.textEdit = editor
         return index
     
+    # adds a new tab showing the file at path; files larger than LARGE_FILE_SIZE open in large-file mode and load progressively
+    def addFileTab(self,  name,  path):
+        size = os.path.getsize(path)
+        if (size <= LARGE_FILE_SIZE):
+            with open(path,  'r') as f:
+                return self.addTab(name,  f.read(),  path)
+        index = self.addTab(name,  None,  path,  True)
+        self.editors[name].loadFile(path,  size)
+        message = name + " is " + str(size // (1024 * 1024)) + " MB: opened in large-file mode"
+        if (size > READ_ONLY_SIZE):
+            message = message + ", read-only (see the editor's context menu)"
+        self.statusBar().showMessage(message)
+        return index
+    
+    # gives the symbols of the directory to every open editor after they changed
+    def updateSymbols(self):
+        symbols = self.fileTree.symbols
+        for editor in self.editors.values():
+            editor.setSymbols(symbols.words(),  symbols.version)
+
+    # runs the search typed in the search bar, by name or by hierarchical path
+    def search(self):
+        if (self.pathSearch.isChecked()):
+            self.folderView.setCurrentWidget(self.hierarchy)
+            self.hierarchy.searchPath(self.searchBar.text())
+        else:
+            self.fileTree.searchModule(self.searchBar.text())
+
+    # changes between searching by name and by path, clearing the search of the other mode
+    def switchSearchMode(self,  checked):
+        if (checked):
+            self.fileTree.searchModule("")
+        else:
+            self.hierarchy.searchPath("")
+        self.search()
+
+    # puts the cursor of the editor of the file fileName on line and scrolls it to the top of the view
+    def showLine(self,  fileName,  line):
+        editor = self.editors.get(fileName)
+        if (editor is None):
+            return
+        editor.goToLine(line)
+
+    # opens the file at path, or selects its tab if it is open, and puts the cursor at column of line
+    def showMatch(self,  path,  line,  column):
+        name = os.path.basename(path)
+        for index in range(self.fileView.count()):
+            if (self.fileView.tabText(index) == name):
+                self.openTab(index)
+                break
+        else:
+            index = self.addFileTab(name,  path)
+            self.fileView.setCurrentWidget(self.editors[name])
+            self.fileView.setCurrentIndex(index)
+        editor = self.editors[name]
+        editor.goToLine(line)
+        if (not editor.isLoading()):
+            editor.setCursorPosition(line,  column)
+        editor.setFocus()
+
     # opens a tab in the file view to be edited
     def openTab(self, index):
         name = self.fileView.tabText(index)
@@ -234,6 +438,7 @@ class Main(QMainWindow):
     
     # closes a tab in the file view
     def closeTab(self,  index):
+        self.editors[self.fileView.tabText(index)].stopLoading()
         del self.editors[self.fileView.tabText(index)]
         del self.filePaths[self.fileView.tabText(index)]
         self.fileView.removeTab(index)
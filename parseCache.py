@@ -0,0 +1,138 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+from fileParser import PARSER_VERSION
+
+# default limit on the total size of the cached parse results
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# returns the directory the explorer keeps its per-user caches in
+def cacheDir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if (not base):
+        base = os.path.join(os.path.expanduser("~"),  ".cache")
+    return os.path.join(base,  "design-explorer")
+
+# returns the content hash of the file at path
+def fileDigest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path,  'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20),  b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+""""
+Class Name: ParseCache
+Class Description: Persistent on-disk cache of FileParser results, stored in an sqlite
+database and keyed by file path. An entry is reused while the file's size and mtime
+are unchanged; when only the stat changed (e.g. a touch or a checkout of identical
+content) the content hash decides. Entries written by another parser version are
+dropped on open, and the least recently used entries are evicted once the cache
+grows past maxBytes.
+"""
+class ParseCache:
+    def __init__(self,  path=None,  maxBytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(cacheDir(),  "parse-cache.sqlite")
+        self.maxBytes = maxBytes
+        self.db = None # opened on first use
+        self.hits = 0 # files reused from the cache by the last lookup
+        self.misses = 0 # files that had to be parsed by the last lookup
+
+    # opens the database, creating it or dropping entries written by an older parser
+    def open(self):
+        if (self.db is None):
+            os.makedirs(os.path.dirname(self.path),  exist_ok=True)
+            self.db = sqlite3.connect(self.path,  timeout=30)
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, "
+                "mtime INTEGER, hash TEXT, lastUsed REAL, bytes INTEGER, data BLOB)")
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if (row is None or row[0] != str(PARSER_VERSION)):
+                self.db.execute("DELETE FROM files")
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",  (str(PARSER_VERSION), ))
+            self.db.commit()
+        return self.db
+
+    """"
+    Looks up every path in the cache. Returns the cached results of the unchanged files
+    (key = path) and the (size, mtime, hash) stamps of the files that have to be parsed
+    again, to be passed back to store along with their new results. An entry that
+    cannot be unpickled (truncated, or written with classes that changed since) is
+    dropped and its file counts as one to parse.
+    """
+    def lookup(self,  paths):
+        db = self.open()
+        hits = {}
+        stamps = {}
+        used = []
+        now = time.time()
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue # let the parser report missing files
+            row = db.execute("SELECT size, mtime, hash FROM files WHERE path = ?",  (path, )).fetchone()
+            if (row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns):
+                digest = row[2]
+            else:
+                digest = fileDigest(path)
+                if (row is None or row[0] != stat.st_size or row[2] != digest):
+                    stamps[path] = (stat.st_size,  stat.st_mtime_ns,  digest)
+                    continue
+                # same content with a new stat, remember the stat for next time
+                db.execute("UPDATE files SET mtime = ? WHERE path = ?",  (stat.st_mtime_ns,  path))
+            data = db.execute("SELECT data FROM files WHERE path = ?",  (path, )).fetchone()[0]
+            try:
+                hits[path] = pickle.loads(data)
+            except Exception: # a damaged entry is only a cache miss
+                db.execute("DELETE FROM files WHERE path = ?",  (path, ))
+                stamps[path] = (stat.st_size,  stat.st_mtime_ns,  digest)
+                continue
+            used.append((now,  path))
+        db.executemany("UPDATE files SET lastUsed = ? WHERE path = ?",  used)
+        db.commit()
+        self.hits = len(hits)
+        self.misses = len(stamps)
+        return hits,  stamps
+
+    # saves freshly parsed results, stamps = the stamps returned by lookup for those files
+    def store(self,  results,  stamps):
+        db = self.open()
+        now = time.time()
+        rows = []
+        for result in results:
+            if (result.path in stamps):
+                size,  mtime,  digest = stamps[result.path]
+                data = pickle.dumps(result,  pickle.HIGHEST_PROTOCOL)
+                rows.append((result.path,  size,  mtime,  digest,  now,  len(data),  data))
+        db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",  rows)
+        self.evict()
+        db.commit()
+
+    # drops the cached result of path so it is parsed again next time
+    def invalidate(self,  path):
+        db = self.open()
+        db.execute("DELETE FROM files WHERE path = ?",  (path, ))
+        db.commit()
+
+    # removes every entry from the cache
+    def clear(self):
+        db = self.open()
+        db.execute("DELETE FROM files")
+        db.commit()
+
+    # evicts the least recently used entries until the cache fits in maxBytes
+    def evict(self):
+        db = self.open()
+        total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+        if (total <= self.maxBytes):
+            return
+        evicted = []
+        for path,  size in db.execute("SELECT path, bytes FROM files ORDER BY lastUsed"):
+            if (total <= self.maxBytes):
+                break
+            evicted.append((path, ))
+            total = total - size
+        db.executemany("DELETE FROM files WHERE path = ?",  evicted)
@@ -0,0 +1,193 @@
+import re
+from elaborate import indexedName
+
+# the segment of a path query that matches any number of levels, including none
+ANY_DEPTH = "**"
+
+# returns the compiled regex of a glob pattern: * matches any characters, ? one character, the rest is literal
+def globRegex(pattern):
+    parts = []
+    for char in pattern:
+        if (char == "*"):
+            parts.append(".*")
+        elif (char == "?"):
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts) + r'\Z',  re.S)
+
+""""
+Class Name: PathSegment
+Class Description: One level of a path query, name or name:module. Both parts are
+globs; the module part, if given, filters the instances by the name of their module.
+A name without brackets is matched against the instance name without the indexes
+a generate for loop gives it, so u_leaf matches every copy u_leaf[0], u_leaf[1], ...
+while u_leaf[2] only matches that copy.
+"""
+class PathSegment:
+    def __init__(self,  text):
+        name,  separator,  module = text.partition(":")
+        self.text = text
+        self.name = globRegex(name if name != "" else "*")
+        self.module = globRegex(module) if separator != "" and module != "" else None
+        self.perCopy = "[" in name # the copy index is part of the match
+
+    # returns True if the instance name of a module named moduleName matches the segment
+    def matches(self,  name,  moduleName):
+        if (self.module is not None and not self.module.match(moduleName)):
+            return False
+        if (not self.perCopy): # iterations elaborated apart are named with their genvar values, u_leaf[3]
+            name = name.partition("[")[0]
+        return self.name.match(name) is not None
+
+""""
+Class Name: PathQuery
+Class Description: A query on the hierarchical paths of the instances, such as
+top.u_core.*.alu*, top.**.u_fifo or **.*:sram* (any instance of a module whose name
+starts with sram). Levels are separated by dots; * and ? are wildcards within a level
+and ** matches any number of levels. The query runs on the shared elaborations made
+by Elaborator, as an automaton whose states are the positions in the query: whether a
+subtree can hold a match, and how many it holds, is computed once per (elaboration,
+states) pair, so subtrees without matches are skipped and shared subtrees are only
+explored once however many times they are instantiated. Does not depend on Qt.
+"""
+class PathQuery:
+    def __init__(self,  text):
+        self.text = text
+        self.segments = [] # PathSegments, or ANY_DEPTH
+        for part in text.strip().split("."):
+            if (part == ANY_DEPTH):
+                if (len(self.segments) == 0 or self.segments[-1] != ANY_DEPTH):
+                    self.segments.append(ANY_DEPTH)
+            else:
+                self.segments.append(PathSegment(part))
+        self.end = len(self.segments)
+        self.perCopy = any(segment != ANY_DEPTH and segment.perCopy for segment in self.segments)
+        self.found = {} # key = (Elaborated, states), value = True if the subtree holds a match
+        self.counts = {} # key = (Elaborated, states), value = number of matches in the subtree
+        self.steps = {} # key = (states, instance name, module name), value = states of such an instance
+        self.copySteps = {} # key = (states, instance name, module name, count), value = copies that can be entered
+
+    # returns the states reached from states without consuming a level, by skipping ** segments
+    def closure(self,  states):
+        closed = set(states)
+        for state in sorted(states):
+            while (state < self.end and self.segments[state] == ANY_DEPTH):
+                state = state + 1
+                closed.add(state)
+        return frozenset(closed)
+
+    # returns the states of an instance of module moduleName named name, below a node in states
+    def step(self,  states,  name,  moduleName):
+        key = (states,  name,  moduleName)
+        if (key in self.steps):
+            return self.steps[key]
+        following = set()
+        for state in states:
+            if (state == self.end):
+                continue
+            segment = self.segments[state]
+            if (segment == ANY_DEPTH):
+                following.add(state)
+            elif (segment.matches(name,  moduleName)):
+                following.add(state + 1)
+        following = self.closure(following)
+        self.steps[key] = following
+        return following
+
+    # returns (copies, states) groups of the copies of a count-times instantiation that can be entered from states
+    def copies(self,  states,  name,  moduleName,  count):
+        key = (states,  name,  moduleName,  count)
+        if (not key in self.copySteps):
+            groups = {} # key = states, value = copies entered in those states
+            for copy in range(count):
+                following = self.step(states,  indexedName(name,  copy),  moduleName)
+                if (len(following) > 0):
+                    groups.setdefault(following,  []).append(copy)
+            self.copySteps[key] = [(copies,  following) for following,  copies in groups.items()]
+        return self.copySteps[key]
+
+    """"
+    Yields (entry, copies, Elaborated, states) for the children of elaborated that the
+    automaton can enter from states: entry is the index of the instantiation, copies
+    the copy indexes entered in states ([-1] for a single instance). The copies of an
+    instantiation share their states unless the query names a copy index, so a
+    generate loop of any length is handled as one group.
+    """
+    def children(self,  elaborated,  states):
+        for entry,  (name,  child,  count) in enumerate(elaborated.children):
+            if (count > 1 and self.perCopy):
+                for copies,  following in self.copies(states,  name,  child.name,  count):
+                    yield entry,  copies,  child,  following
+            else:
+                following = self.step(states,  name,  child.name)
+                if (len(following) > 0):
+                    yield entry,  range(count) if count > 1 else (-1, ),  child,  following
+
+    # returns True if an instance below elaborated, entered in states, matches the query
+    def holdsMatch(self,  elaborated,  states):
+        key = (elaborated,  states)
+        if (key in self.counts): # already counted
+            return self.counts[key] > 0
+        if (not key in self.found):
+            self.found[key] = False
+            for entry,  copies,  child,  following in self.children(elaborated,  states):
+                if (self.end in following or self.holdsMatch(child,  following)):
+                    self.found[key] = True
+                    break
+        return self.found[key]
+
+    # returns the number of instances below elaborated, entered in states, that match the query
+    def countBelow(self,  elaborated,  states):
+        key = (elaborated,  states)
+        if (not key in self.counts):
+            total = 0
+            for entry,  copies,  child,  following in self.children(elaborated,  states):
+                total = total + len(copies) * ((1 if self.end in following else 0) + self.countBelow(child,  following))
+            self.counts[key] = total
+        return self.counts[key]
+
+    # returns the number of instances below root (whose children are the top modules) that match
+    def count(self,  root):
+        return self.countBelow(root,  self.closure({0}))
+
+    """"
+    Returns up to limit matches below root, in hierarchy order. Each match is a list of
+    (entry, copy) steps from root, entry being the index of the instantiation in its
+    parent's Elaborated.children and copy its copy index (-1 for a single instance).
+    """
+    def run(self,  root,  limit=1000):
+        matches = []
+        stack = [(root,  self.closure({0}),  [])]
+        while (len(stack) > 0 and len(matches) < limit):
+            elaborated,  states,  path = stack.pop()
+            if (elaborated is None): # the instance at path matches, its subtree comes next
+                matches.append(path)
+                continue
+            below = []
+            for entry,  copies,  child,  following in self.children(elaborated,  states):
+                matched = self.end in following
+                if (not (matched or self.holdsMatch(child,  following))):
+                    continue
+                for copy in copies:
+                    below.append((child,  following,  path + [(entry,  copy)],  matched))
+                    if (len(matches) + len(below) >= limit): # each of them holds a match
+                        break
+                if (len(matches) + len(below) >= limit):
+                    break
+            # pushed in reverse so the matches come out in hierarchy order, parents before children
+            for child,  following,  childPath,  matched in reversed(below):
+                stack.append((child,  following,  childPath))
+                if (matched):
+                    stack.append((None,  None,  childPath))
+        return matches
+
+    # returns the instance names of path, a match returned by run, starting from root
+    @staticmethod
+    def names(root,  path):
+        names = []
+        elaborated = root
+        for entry,  copy in path:
+            name,  elaborated,  count = elaborated.children[entry]
+            names.append(name if copy < 0 else name + "[" + str(copy) + "]")
+        return names
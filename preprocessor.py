@@ -0,0 +1,231 @@
+import os
+
+# kept by a MacroTable for a define whose value depends on the scope it is used in, such as a parameter it refers to
+SCOPED = object()
+
+# tables a lookup goes through at most, a table further from a table with all the define variables gets them all
+MAX_DEPTH = 8
+
+""""
+Class Name: MacroTable
+Class Description: The define variables visible at one point of the files: their
+values as text, and the values the Evaluator worked out from them so far. A table is
+not changed once made; a directive that changes a define makes a new one, so every
+module and header that sees the same defines shares one table, along with its
+evaluated values. A table made from another only keeps the defines that changed and
+looks the others up in it, so a define in a file does not copy those of the headers
+it includes, and it takes the values evaluated in the other that use none of them.
+"""
+class MacroTable:
+    def __init__(self,  values=None,  parent=None,  changes=None):
+        self.parent = parent # MacroTable this one was made from by the changes
+        self.changes = changes if changes is not None else {} # key = define variable, value = its text, None if undefined
+        self.changed = frozenset(self.changes)
+        self.evaluated = {} # key = define variable, value = (BitVector or SCOPED, names of the defines used), filled by Evaluator
+        self.values = None # key = define variable, value = its text, for a table that does not look up its parent
+        self.depth = 0 # tables between this one and the nearest with values
+        if (parent is None):
+            self.values = values if values is not None else {}
+        elif (parent.depth + 1 >= MAX_DEPTH):
+            self.values = self.allValues()
+        else:
+            self.depth = parent.depth + 1
+
+    # returns the text of the define variable name, None if it is not defined
+    def get(self,  name):
+        table = self
+        while (table.values is None):
+            if (name in table.changes):
+                return table.changes[name]
+            table = table.parent
+        return table.values.get(name)
+
+    # returns every define variable and its text
+    def allValues(self):
+        if (self.values is not None):
+            return self.values
+        values = dict(self.parent.allValues())
+        for name,  value in self.changes.items():
+            if (value is None):
+                values.pop(name,  None)
+            else:
+                values[name] = value
+        return values
+
+    # returns the evaluated entry of the define variable name, here or in a parent if none of the defines it uses changed since
+    def cached(self,  name):
+        entry = self.evaluated.get(name)
+        if (entry is not None):
+            return entry
+        passed = []
+        table = self
+        while (table.parent is not None and not name in table.changed):
+            passed.append(table)
+            table = table.parent
+            entry = table.evaluated.get(name)
+            if (entry is not None):
+                if (entry[0] is SCOPED or not all(other.changed.isdisjoint(entry[1]) for other in passed)):
+                    return None
+                self.evaluated[name] = entry
+                return entry
+        return None
+
+    # keeps the evaluated entry of the define variable name, also in the parents it is valid in so the tables made from them find it
+    def store(self,  name,  entry):
+        self.evaluated[name] = entry
+        if (entry[0] is SCOPED): # the defines it uses are not all known
+            return
+        table = self
+        while (table.parent is not None and not name in table.changed and table.changed.isdisjoint(entry[1])):
+            table = table.parent
+        table.evaluated[name] = entry
+
+""""
+Class Name: Preprocessor
+Class Description: Runs the directives the tokenizer recorded for the files of a
+Design (`define, `undef, `include, `ifdef, `ifndef, `elsif, `else and `endif) to find
+the MacroTable each module sees. The include graph is resolved once, when the
+Preprocessor is made. Each header is run once per MacroTable it is included with and
+the table it leaves is kept, so a header included by every file is run once, and every
+later include of it only looks up the table. Does not depend on Qt.
+"""
+class Preprocessor:
+    def __init__(self,  files):
+        self.files = files # key = path of a verilog file, value = its FileParser
+        self.paths = {} # key = normalized path, value = path of the file as in files
+        self.names = {} # key = file name, value = paths of the files with that name, in scan order
+        for path in files:
+            self.paths[os.path.normpath(path)] = path
+            self.names.setdefault(os.path.basename(path),  []).append(path)
+        self.targets = {} # key = (path of a file, name of a file it includes), value = path of the file included, or None
+        self.includes = {} # the include graph: key = path of a file, value = paths of the files it includes, in order
+        self.included = set() # paths of the files included by another file
+        self.missing = {} # key = name of an include not found, value = path of a file including it
+        for path,  result in files.items():
+            self.includes[path] = []
+            for directive in result.directives:
+                if (directive[0] == "include"):
+                    target = self.target(path,  directive[1])
+                    if (target is not None):
+                        self.includes[path].append(target)
+                        self.included.add(target)
+        self.expansions = {} # key = (path of a header, MacroTable it was included with), value = MacroTable it leaves
+        self.runs = 0 # headers run
+        self.reuses = 0 # includes that found the table a header leaves in expansions
+
+    """"
+    Returns the path of the file included as name by the file at path, None if it is
+    not one of the files: name relative to the directory of path first, then the first
+    file whose path ends with name.
+    """
+    def target(self,  path,  name):
+        key = (path,  name)
+        if (not key in self.targets):
+            target = self.paths.get(os.path.normpath(os.path.join(os.path.dirname(path),  name)))
+            if (target is None):
+                suffix = os.sep + os.path.normpath(name)
+                for candidate in self.names.get(os.path.basename(name),  ()):
+                    if (os.path.normpath(candidate).endswith(suffix)):
+                        target = candidate
+                        break
+            if (target is None):
+                self.missing.setdefault(name,  path)
+            self.targets[key] = target
+        return self.targets[key]
+
+    # returns the MacroTable of the defines files (files without modules) run one after the other, in scan order
+    def defineTable(self):
+        table = MacroTable()
+        for path,  result in self.files.items():
+            if (len(result.modules) == 0):
+                table = self.include(path,  table,  set())
+        return table
+
+    """"
+    Returns the MacroTable each module of the file at path sees, by module name, when the
+    file starts with table, and the MacroTable seen at each `ifdef, `ifndef and `elsif
+    of the instances of the modules, by the number of the directive, so a `define
+    earlier in a module body is seen by the guards after it.
+    """
+    def moduleTables(self,  path,  table):
+        modules = self.files[path].modules
+        stops = {info.directive: None for info in modules.values()}
+        guards = set(guard[2] for info in modules.values() for inst in info.instances for guard in inst.guards
+            if guard[0] == "ifdef" or guard[0] == "ifndef")
+        stops.update((index,  None) for index in guards)
+        self.run(path,  table,  stops,  {path})
+        return {name: stops[info.directive] for name,  info in modules.items()},  {index: stops[index] for index in guards}
+
+    # returns the MacroTable the file at path leaves when it is included with table, running it only the first time
+    def include(self,  path,  table,  including):
+        key = (path,  table)
+        expansion = self.expansions.get(key)
+        if (expansion is not None):
+            self.reuses = self.reuses + 1
+            return expansion
+        if (path in including): # included by itself, directly or not
+            return table
+        including.add(path)
+        try:
+            expansion = self.run(path,  table,  None,  including)
+        finally:
+            including.discard(path)
+        self.runs = self.runs + 1
+        self.expansions[key] = expansion
+        return expansion
+
+    """"
+    Runs the directives of the file at path starting with table and returns the table
+    they leave. stops, if given, has the numbers of directives as keys and gets the table
+    seen before each of them as values. including holds the files being included, to
+    stop an include cycle. A new table is only made when a directive changes a define.
+    """
+    def run(self,  path,  table,  stops,  including):
+        changes = {} # key = define variable changed since table was made, value = its text, None if undefined
+        branches = [] # [True if the enclosing branch is active, True if a branch was taken] of each open `ifdef
+        active = True
+        for index,  directive in enumerate(self.files[path].directives):
+            if (stops is not None and index in stops):
+                if (len(changes) > 0):
+                    table,  changes = MacroTable(None,  table,  changes),  {}
+                stops[index] = table
+            kind = directive[0]
+            if (kind == "define" or kind == "undef" or kind == "ifdef" or kind == "ifndef" or kind == "elsif"):
+                value = changes[directive[1]] if directive[1] in changes else table.get(directive[1])
+            if (kind == "ifdef" or kind == "ifndef"):
+                taken = (value is not None) == (kind == "ifdef")
+                branches.append([active,  taken])
+                active = active and taken
+                continue
+            if (kind == "elsif" or kind == "else" or kind == "endif"):
+                if (len(branches) == 0): # without its `ifdef
+                    continue
+                branch = branches[-1]
+                if (kind == "endif"):
+                    active = branches.pop()[0]
+                    continue
+                taken = not branch[1] and (kind == "else" or value is not None)
+                branch[1] = branch[1] or taken
+                active = branch[0] and taken
+                continue
+            if (not active):
+                continue
+            if (kind == "define"):
+                if (value != directive[2]):
+                    changes[directive[1]] = directive[2]
+            elif (kind == "undef"):
+                if (value is not None):
+                    changes[directive[1]] = None
+            elif (kind == "include"):
+                target = self.target(path,  directive[1])
+                if (target is not None):
+                    if (len(changes) > 0):
+                        table,  changes = MacroTable(None,  table,  changes),  {}
+                    table = self.include(target,  table,  including)
+        if (len(changes) > 0):
+            table = MacroTable(None,  table,  changes)
+        if (stops is not None):
+            for index in stops:
+                if (stops[index] is None): # modules after the last directive
+                    stops[index] = table
+        return table
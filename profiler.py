@@ -0,0 +1,215 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+from constExpr import compileExpression
+
+# files and functions listed in a report, the slowest first
+REPORT_ROWS = 50
+
+""""
+Class Name: NoPhase
+Class Description: What Profiler.phase returns while the profiler is off: entering and
+leaving it does nothing, so an instrumented phase costs one attribute check.
+"""
+class NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self,  excType,  excValue,  traceback):
+        return False
+
+NO_PHASE = NoPhase()
+
+""""
+Class Name: Phase
+Class Description: Times one run of a phase of a Profiler, as a with block.
+"""
+class Phase:
+    def __init__(self,  profiler,  name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self,  excType,  excValue,  traceback):
+        self.profiler.addTime(self.name,  time.perf_counter() - self.start)
+        return False
+
+""""
+Class Name: ThreadProfile
+Class Description: Captures a cProfile of the thread that enters it, as a with block,
+and gives it to the Profiler when the block ends. cProfile only sees the thread it is
+enabled in, so background threads capture their own.
+"""
+class ThreadProfile:
+    def __init__(self,  profiler):
+        self.profiler = profiler
+        self.profile = None
+
+    def __enter__(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self.profile = profile
+        except ValueError: # one profiler for all threads (Python 3.12), the capture of the GUI thread sees this one too
+            pass
+        return self
+
+    def __exit__(self,  excType,  excValue,  traceback):
+        if (self.profile is not None):
+            self.profile.disable()
+            self.profiler.profiles.append(self.profile)
+        return False
+
+""""
+Class Name: Profiler
+Class Description: Records where the time of the explorer goes while it is turned on:
+the time and number of runs of each instrumented phase (scanning, parsing, collecting,
+elaborating, building Qt items...), the parse time of each file, counters of the work
+done, and optionally a cProfile capture. While it is off, instrumented code only
+checks enabled. The counts of expressions evaluated and compiled are read from the
+cache of compileExpression, so counting them costs nothing. Does not depend on Qt.
+"""
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.capturing = False # True while a cProfile capture is running
+        self.mainProfile = None # ThreadProfile of the GUI thread while capturing
+        self.reset()
+
+    # forgets everything recorded
+    def reset(self):
+        capturing = self.capturing
+        if (capturing):
+            self.stopCapture()
+        self.phases = {} # key = phase name, value = [runs, seconds], in the order the phases first ran
+        self.counters = {} # key = counter name, value = count
+        self.files = {} # key = path of a file, value = seconds spent parsing it
+        self.profiles = [] # cProfile.Profiles captured, by the GUI thread and by background threads
+        self.cacheStart = compileExpression.cache_info()
+        self.cacheEnd = None if self.enabled else self.cacheStart # cache statistics when the profiler was turned off
+        if (capturing):
+            self.capturing = True
+            self.startCapture()
+
+    # turns recording on, with a cProfile capture if capture is True
+    def start(self,  capture=False):
+        if (not self.enabled):
+            self.enabled = True
+            self.cacheStart = self.cacheStart if self.cacheEnd is None else self.shiftedCacheStart()
+            self.cacheEnd = None
+        if (capture and not self.capturing):
+            self.capturing = True
+            self.startCapture()
+        elif (not capture and self.capturing):
+            self.stopCapture()
+
+    # turns recording off, keeping what was recorded
+    def stop(self):
+        if (self.capturing):
+            self.stopCapture()
+        if (self.enabled):
+            self.enabled = False
+            self.cacheEnd = compileExpression.cache_info()
+
+    # returns the cache statistics to count from after a pause, so the calls made while off are not counted
+    def shiftedCacheStart(self):
+        now = compileExpression.cache_info()
+        return now._replace(hits=now.hits - (self.cacheEnd.hits - self.cacheStart.hits),
+            misses=now.misses - (self.cacheEnd.misses - self.cacheStart.misses))
+
+    # starts capturing a cProfile of the calling thread, the GUI thread
+    def startCapture(self):
+        self.mainProfile = ThreadProfile(self)
+        self.mainProfile.__enter__()
+
+    # ends the capture of the GUI thread
+    def stopCapture(self):
+        self.capturing = False
+        if (self.mainProfile is not None):
+            self.mainProfile.__exit__(None,  None,  None)
+            self.mainProfile = None
+
+    # returns a with block timing the phase name, one that does nothing while the profiler is off
+    def phase(self,  name):
+        if (not self.enabled):
+            return NO_PHASE
+        return Phase(self,  name)
+
+    # returns a with block capturing a cProfile of the calling thread, if a capture is running
+    def threadProfile(self):
+        if (not self.capturing):
+            return NO_PHASE
+        return ThreadProfile(self)
+
+    # adds a run of seconds to the phase name
+    def addTime(self,  name,  seconds):
+        phase = self.phases.get(name)
+        if (phase is None):
+            phase = self.phases[name] = [0,  0.0]
+        phase[0] = phase[0] + 1
+        phase[1] = phase[1] + seconds
+
+    # adds amount to the counter name
+    def count(self,  name,  amount=1):
+        self.counters[name] = self.counters.get(name,  0) + amount
+
+    # records the parse time of the file at path
+    def fileTime(self,  path,  seconds):
+        self.files[path] = self.files.get(path,  0.0) + seconds
+
+    # returns the counters, with those of the expressions evaluated and compiled since the profiler was turned on
+    def allCounters(self):
+        end = self.cacheEnd or compileExpression.cache_info()
+        counters = dict(self.counters)
+        counters["expressions evaluated"] = (end.hits + end.misses) - (self.cacheStart.hits + self.cacheStart.misses)
+        counters["expressions compiled"] = end.misses - self.cacheStart.misses
+        return counters
+
+    # returns the REPORT_ROWS functions with the most cumulative time in the cProfile captures
+    def profileRows(self):
+        profiles = list(self.profiles)
+        running = self.mainProfile.profile if self.mainProfile is not None else None
+        if (running is not None): # still capturing
+            profiles.append(running)
+        stats = None
+        for profile in profiles:
+            try:
+                if (stats is None):
+                    stats = pstats.Stats(profile,  stream=io.StringIO())
+                else:
+                    stats.add(profile)
+            except TypeError: # a profile that recorded nothing
+                continue
+        if (running is not None): # reading the stats of a profile stops it
+            running.enable()
+        if (stats is None):
+            return []
+        rows = []
+        for (fileName,  line,  function),  (calls,  primitive,  total,  cumulative,  callers) in stats.stats.items():
+            rows.append({"function": function,  "file": fileName,  "line": line,  "calls": calls,
+                "totalSeconds": round(total,  6),  "cumulativeSeconds": round(cumulative,  6)})
+        rows.sort(key=lambda row: row["cumulativeSeconds"],  reverse=True)
+        return rows[:REPORT_ROWS]
+
+    # returns what was recorded as a dictionary that JSON can hold
+    def report(self):
+        files = sorted(self.files.items(),  key=lambda item: item[1],  reverse=True)[:REPORT_ROWS]
+        return {"phases": [{"name": name,  "runs": runs,  "seconds": round(seconds,  6)} for name,  (runs,  seconds) in self.phases.items()],
+            "counters": self.allCounters(),
+            "files": [{"path": path,  "seconds": round(seconds,  6)} for path,  seconds in files],
+            "filesTimed": len(self.files),
+            "profile": self.profileRows()}
+
+    # writes report() to the file at path as JSON
+    def export(self,  path):
+        with open(path,  'w') as f:
+            json.dump(self.report(),  f,  indent=1)
+
+# the profiler the explorer's phases report to
+PROFILER = Profiler()
@@ -0,0 +1,122 @@
+from PyQt5.QtWidgets import (QDockWidget,  QWidget,  QVBoxLayout,  QHBoxLayout,  QCheckBox,  QPushButton,
+    QLabel,  QTreeWidget,  QTreeWidgetItem,  QFileDialog,  QMessageBox)
+from PyQt5.QtCore import QTimer
+from profiler import PROFILER
+
+# milliseconds between two refreshes of the panel while it is visible and recording
+REFRESH_INTERVAL = 1000
+
+""""
+Class Name: ProfilerPanel
+Class Description: Dock panel that turns the Profiler on and off and shows what it
+recorded: the time of each phase of opening a directory and generating its hierarchy,
+the counters of the work done, the slowest files to parse and, if a cProfile capture was
+on, the functions with the most time. The report can be exported as JSON.
+"""
+class ProfilerPanel(QDockWidget):
+    def __init__(self,  mainWindow):
+        super(ProfilerPanel, self).__init__("Profiler",  mainWindow)
+        self.mainWindow = mainWindow
+        self.setObjectName("profilerPanel")
+        self.initUI()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refreshRecording)
+        self.timer.start(REFRESH_INTERVAL)
+
+    def initUI(self):
+        self.record = QCheckBox("Record timings")
+        self.record.toggled.connect(self.setRecording)
+        self.capture = QCheckBox("cProfile")
+        self.capture.setToolTip("Also capture every function call, which slows the explorer down")
+        self.capture.toggled.connect(self.setRecording)
+        resetButton = QPushButton("Reset")
+        resetButton.clicked.connect(self.reset)
+        refreshButton = QPushButton("Refresh")
+        refreshButton.clicked.connect(self.refresh)
+        exportButton = QPushButton("Export JSON...")
+        exportButton.clicked.connect(self.export)
+        self.status = QLabel()
+        self.report = QTreeWidget()
+        self.report.setHeaderLabels(["Name",  "Runs / calls",  "Seconds",  "Cumulative seconds"])
+        self.report.setUniformRowHeights(True)
+
+        options = QHBoxLayout()
+        for widget in (self.record,  self.capture,  resetButton,  refreshButton,  exportButton):
+            options.addWidget(widget)
+        options.addStretch(1)
+        layout = QVBoxLayout()
+        layout.addLayout(options)
+        layout.addWidget(self.status)
+        layout.addWidget(self.report)
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        self.refresh()
+
+    # starts or stops the Profiler as the check boxes say
+    def setRecording(self):
+        # a cProfile capture is only made while recording
+        self.record.blockSignals(True)
+        self.capture.blockSignals(True)
+        if (self.sender() is self.capture and self.capture.isChecked()):
+            self.record.setChecked(True)
+        elif (not self.record.isChecked()):
+            self.capture.setChecked(False)
+        self.record.blockSignals(False)
+        self.capture.blockSignals(False)
+        if (self.record.isChecked()):
+            PROFILER.start(self.capture.isChecked())
+        else:
+            PROFILER.stop()
+        self.refresh()
+
+    # forgets what the Profiler recorded
+    def reset(self):
+        PROFILER.reset()
+        self.refresh()
+
+    # refreshes the panel while it is visible and the Profiler is recording
+    def refreshRecording(self):
+        if (self.isVisible() and PROFILER.enabled):
+            self.refresh()
+
+    # shows the report of the Profiler
+    def refresh(self):
+        report = PROFILER.report()
+        expanded = set(self.report.topLevelItem(index).text(0) for index in range(self.report.topLevelItemCount())
+            if self.report.topLevelItem(index).isExpanded())
+        self.report.setUpdatesEnabled(False)
+        try:
+            self.report.clear()
+            phases = QTreeWidgetItem(self.report,  ["Phases"])
+            for phase in report["phases"]:
+                QTreeWidgetItem(phases,  [phase["name"],  str(phase["runs"]),  "%.3f" % phase["seconds"]])
+            counters = QTreeWidgetItem(self.report,  ["Counters"])
+            for name,  count in report["counters"].items():
+                QTreeWidgetItem(counters,  [name,  str(count)])
+            files = QTreeWidgetItem(self.report,  ["Slowest files to parse"])
+            for file in report["files"]:
+                QTreeWidgetItem(files,  [file["path"],  "",  "%.4f" % file["seconds"]])
+            profile = QTreeWidgetItem(self.report,  ["cProfile functions"])
+            for row in report["profile"]:
+                QTreeWidgetItem(profile,  [row["function"] + " (" + row["file"] + ":" + str(row["line"]) + ")",
+                    str(row["calls"]),  "%.4f" % row["totalSeconds"],  "%.4f" % row["cumulativeSeconds"]])
+            for item in (phases,  counters,  files,  profile):
+                item.setExpanded(len(expanded) == 0 or item.text(0) in expanded)
+        finally:
+            self.report.setUpdatesEnabled(True)
+        self.report.resizeColumnToContents(0)
+        state = "Recording" if PROFILER.enabled else "Not recording"
+        if (PROFILER.capturing):
+            state = state + " with cProfile"
+        self.status.setText(state + ", " + str(report["filesTimed"]) + " files timed")
+
+    # writes the report of the Profiler to a JSON file chosen by the user
+    def export(self):
+        path,  filter = QFileDialog.getSaveFileName(self,  "Export profile",  "profile.json",  "JSON files (*.json)")
+        if (path == ""):
+            return
+        try:
+            PROFILER.export(path)
+        except OSError as error:
+            QMessageBox.warning(self,  "Export profile",  "Could not write " + path + ": " + (error.strerror or str(error)))
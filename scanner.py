@@ -0,0 +1,208 @@
+import os
+import re
+import fnmatch
+from profiler import PROFILER
+
+# extensions of the Verilog sources and headers scanned for modules and define variables
+DEFAULT_SOURCE_EXTENSIONS = (".v",  ".sv",  ".vh")
+
+# extensions of the constraint files listed in the Constraints tab
+DEFAULT_CONSTRAINT_EXTENSIONS = (".tcl", )
+
+# glob patterns of directory names never scanned: hidden directories such as .git
+DEFAULT_EXCLUDED_DIRS = (".*", )
+
+# files whose gitignore-style rules apply to the directory they are in and everything below it
+IGNORE_FILES = (".gitignore",  ".explorerignore")
+
+# returns the regex of one gitignore pattern: * and ? do not match /, ** matches any number of directories
+def ignoreRegex(pattern):
+    parts = []
+    index = 0
+    while (index < len(pattern)):
+        if (pattern.startswith("**/",  index)):
+            parts.append("(?:.*/)?")
+            index = index + 3
+        elif (pattern.startswith("/**",  index) and index + 3 == len(pattern)):
+            parts.append("/.*")
+            index = index + 3
+        elif (pattern.startswith("**",  index)):
+            parts.append(".*")
+            index = index + 2
+        else:
+            char = pattern[index]
+            if (char == "*"):
+                parts.append("[^/]*")
+            elif (char == "?"):
+                parts.append("[^/]")
+            elif (char == "[" and "]" in pattern[index + 1:]):
+                end = pattern.index("]",  index + 1)
+                members = pattern[index + 1:end]
+                if (members.startswith("!")): # negated class
+                    members = "^" + members[1:]
+                parts.append("[" + members + "]")
+                index = end
+            elif (char == "\\" and index + 1 < len(pattern)):
+                index = index + 1
+                parts.append(re.escape(pattern[index]))
+            else:
+                parts.append(re.escape(char))
+            index = index + 1
+    return re.compile("".join(parts) + r'\Z',  re.S)
+
+""""
+Class Name: IgnoreRule
+Class Description: One line of a .gitignore-style file. A pattern without a slash
+matches the name of a file or directory at any depth below the ignore file; one with a
+slash is matched against the path relative to the directory of the ignore file. A
+trailing slash only matches directories and a leading ! shows again what an earlier
+rule ignored.
+"""
+class IgnoreRule:
+    def __init__(self,  pattern,  base):
+        self.base = base # path of the ignore file's directory relative to the scanned root, "" for the root
+        self.negated = pattern.startswith("!")
+        if (self.negated):
+            pattern = pattern[1:]
+        self.directoryOnly = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        self.anchored = "/" in pattern
+        self.regex = ignoreRegex(pattern.lstrip("/"))
+
+    # returns True if the rule matches the entry at relative (path from the scanned root, with / separators)
+    def matches(self,  relative,  name,  isDir):
+        if (self.directoryOnly and not isDir):
+            return False
+        if (not self.anchored):
+            return self.regex.match(name) is not None
+        if (self.base != ""):
+            if (not relative.startswith(self.base + "/")):
+                return False
+            relative = relative[len(self.base) + 1:]
+        return self.regex.match(relative) is not None
+
+# returns the IgnoreRules of the ignore file at path, base being its directory relative to the scanned root
+def readIgnoreFile(path,  base):
+    rules = []
+    try:
+        with open(path,  'r',  errors='replace') as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if (line.strip() == "" or line.startswith("#")):
+                    continue
+                if (not line.endswith("\\ ")): # trailing spaces are ignored unless escaped
+                    line = line.rstrip(" ")
+                rules.append(IgnoreRule(line,  base))
+    except OSError:
+        pass
+    return rules
+
+""""
+Class Name: ScannedDirectory
+Class Description: A directory visited by a Scanner, with the source and constraint
+files directly in it, in name order.
+"""
+class ScannedDirectory:
+    def __init__(self,  path,  parent):
+        self.path = path
+        self.parent = parent # path of the parent directory, None for the scanned root
+        self.name = os.path.basename(path)
+        self.sources = []
+        self.constraints = []
+        self.hasSources = False # True if a source file is in it or in a directory below it
+
+""""
+Class Name: ScanResult
+Class Description: The result of a Scanner: every directory visited, in the order of
+a top-down walk, and the paths of all source and constraint files found, in the same
+order.
+"""
+class ScanResult:
+    def __init__(self,  root):
+        self.root = root
+        self.directories = [] # ScannedDirectories, the root first and parents before their children
+        self.sources = []
+        self.constraints = []
+
+    # returns the directories below the root that hold a source file somewhere below them, parents before children
+    def sourceDirectories(self):
+        return [directory for directory in self.directories if directory.parent is not None and directory.hasSources]
+
+""""
+Class Name: Scanner
+Class Description: Lists the source and constraint files under a directory with
+os.scandir. Directories whose name matches one of excludedDirs, and entries matched by
+the rules of the ignore files found along the way, are skipped without descending into
+them, so build and simulation outputs are never read. Files are recognized by their
+name alone, so no file is stat'ed. Does not depend on Qt.
+"""
+class Scanner:
+    def __init__(self,  sourceExtensions=DEFAULT_SOURCE_EXTENSIONS,  constraintExtensions=DEFAULT_CONSTRAINT_EXTENSIONS,
+            excludedDirs=DEFAULT_EXCLUDED_DIRS,  ignoreFiles=IGNORE_FILES):
+        self.sourceExtensions = tuple(sourceExtensions)
+        self.constraintExtensions = tuple(constraintExtensions)
+        self.excludedDirs = tuple(excludedDirs)
+        self.ignoreFiles = tuple(ignoreFiles)
+
+    # returns True if the file at path would be listed by a scan
+    def isWatched(self,  path):
+        return path.endswith(self.sourceExtensions) or path.endswith(self.constraintExtensions)
+
+    # returns True if an entry named name at relative is skipped, given the ignore rules in order of precedence
+    def isIgnored(self,  relative,  name,  isDir,  rules):
+        if (isDir and any(fnmatch.fnmatchcase(name,  pattern) for pattern in self.excludedDirs)):
+            return True
+        ignored = False
+        for rule in rules: # the last rule that matches decides
+            if (ignored == rule.negated and rule.matches(relative,  name,  isDir)):
+                ignored = not rule.negated
+        return ignored
+
+    # scans the tree under root and returns its ScanResult
+    def scan(self,  root):
+        with PROFILER.phase("scan directory"):
+            result = ScanResult(root)
+            stack = [(root,  None,  "",  [])] # (path, parent path, path relative to root, ignore rules that apply)
+            while (len(stack) > 0):
+                path,  parent,  relative,  rules = stack.pop()
+                directory = ScannedDirectory(path,  parent)
+                result.directories.append(directory)
+                try:
+                    with os.scandir(path) as iterator:
+                        entries = sorted(iterator,  key=lambda entry: entry.name)
+                except OSError: # unreadable or vanished directory
+                    continue
+                names = set(entry.name for entry in entries)
+                for ignoreFile in self.ignoreFiles:
+                    if (ignoreFile in names):
+                        rules = rules + readIgnoreFile(os.path.join(path,  ignoreFile),  relative)
+                subdirectories = []
+                for entry in entries:
+                    name = entry.name
+                    entryRelative = relative + "/" + name if relative != "" else name
+                    try:
+                        isDir = entry.is_dir() # from the directory listing, no stat on most file systems
+                    except OSError:
+                        continue
+                    if (isDir):
+                        if (not entry.is_symlink() and not self.isIgnored(entryRelative,  name,  True,  rules)):
+                            subdirectories.append((entry.path,  path,  entryRelative,  rules))
+                    elif (name.endswith(self.sourceExtensions)):
+                        if (not self.isIgnored(entryRelative,  name,  False,  rules)):
+                            directory.sources.append(entry.path)
+                    elif (name.endswith(self.constraintExtensions)):
+                        if (not self.isIgnored(entryRelative,  name,  False,  rules)):
+                            directory.constraints.append(entry.path)
+                stack.extend(reversed(subdirectories)) # visited in name order
+            # the files in walk order, and which directories lead to a source file
+            byPath = {}
+            for directory in result.directories:
+                byPath[directory.path] = directory
+                result.sources.extend(directory.sources)
+                result.constraints.extend(directory.constraints)
+            for directory in reversed(result.directories):
+                if (len(directory.sources) > 0):
+                    directory.hasSources = True
+                if (directory.hasSources and directory.parent is not None):
+                    byPath[directory.parent].hasSources = True
+            return result
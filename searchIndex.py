@@ -0,0 +1,157 @@
+from elaborate import indexedName
+from profiler import PROFILER
+
+""""
+Class Name: SearchResult
+Class Description: The result of a search of a SearchIndex: the ids of the names that
+contain the text, the first copy whose name contains it for the instantiations with
+several copies, and the elaborations that have an instance matching it somewhere
+below them, so the rows to show are found without walking the hierarchy.
+"""
+class SearchResult:
+    def __init__(self,  text,  names,  copies,  below):
+        self.text = text
+        self.names = names # ids of the instance and module names containing text
+        self.copies = copies # key = id of the name of an instantiation with copies, value = first copy index whose name contains text
+        self.below = below # Elaborateds with a matching instance among their descendants
+
+    # returns True if an instance named name of module moduleName matches the search
+    def matches(self,  name,  moduleName):
+        return self.text in name or self.text in moduleName
+
+""""
+Class Name: SearchIndex
+Class Description: Index of the instance and module names of an elaborated hierarchy
+for the search bar. Each distinct name is stored once with its trigrams, so the names
+containing a text are found by intersecting a few posting sets; the elaborations that
+contain them are then followed up the shared DAG to find every elaboration with a
+match below it. The names the copies of an instantiation are shown with, such as u[3],
+are not stored: a text that can only match in the copy index is checked against the
+copy indexes of each distinct name when it is searched. The cost of a search depends
+on the number of distinct names and matching elaborations, not on the number of
+instances. Does not depend on Qt.
+"""
+class SearchIndex:
+    def __init__(self):
+        self.names = [] # each distinct name, its position is its id
+        self.nameIds = {} # key = name, value = its id
+        self.trigrams = {} # key = three characters, value = set of the ids of the names containing them
+        self.owners = {} # key = name id, value = Elaborateds with a child instance of that name or module
+        self.parents = {} # key = Elaborated, value = set of the Elaborateds that instantiate it
+        self.copied = {} # key = id of the name of an instantiation with several copies, value = the most copies it has
+        self.copyOwners = {} # key = such name id, value = {Elaborated: the most copies of the instantiations of that name in it}
+
+    # returns the id of name, indexing it the first time it is seen
+    def intern(self,  name):
+        nameId = self.nameIds.get(name)
+        if (nameId is None):
+            nameId = len(self.names)
+            self.names.append(name)
+            self.nameIds[name] = nameId
+            for start in range(len(name) - 2):
+                self.trigrams.setdefault(name[start:start + 3],  set()).add(nameId)
+        return nameId
+
+    # indexes the hierarchy below root, replacing the previous one
+    def build(self,  root):
+        self.names = []
+        self.nameIds = {}
+        self.trigrams = {}
+        self.owners = {}
+        self.parents = {}
+        self.copied = {}
+        self.copyOwners = {}
+        with PROFILER.phase("index hierarchy"):
+            seen = set()
+            stack = [root]
+            while (len(stack) > 0):
+                elaborated = stack.pop()
+                if (elaborated in seen):
+                    continue
+                seen.add(elaborated)
+                # the distinct names and children of elaborated first, as many instantiations share them
+                names = set()
+                children = set()
+                copies = {} # key = name of an instantiation with several copies, value = the most copies it has
+                for name,  child,  count in elaborated.children:
+                    names.add(name)
+                    if (count > copies.get(name,  1)):
+                        copies[name] = count
+                    children.add(child)
+                for child in children:
+                    names.add(child.name)
+                    self.parents.setdefault(child,  set()).add(elaborated)
+                    if (not child in seen):
+                        stack.append(child)
+                for name in names:
+                    self.owners.setdefault(self.intern(name),  set()).add(elaborated)
+                for name,  count in copies.items():
+                    nameId = self.intern(name)
+                    self.copied[nameId] = max(self.copied.get(nameId,  1),  count)
+                    self.copyOwners.setdefault(nameId,  {})[elaborated] = count
+
+    """"
+    Returns the first copy index whose name contains text, key = id of the name of an
+    instantiation with several copies, for the names text is not in itself. Only a text
+    with a bracket or a digit can match in a copy index. If previous is the result of a
+    text that text contains, only the copies from those that matched previous on are
+    checked.
+    """
+    def matchingCopies(self,  text,  previous=None):
+        copies = {}
+        if (not any(char in "[]0123456789" for char in text)):
+            return copies
+        for nameId,  count in self.copied.items():
+            name = self.names[nameId]
+            if (text in name): # every copy matches, found by the name itself
+                continue
+            start = 0
+            if (previous is not None):
+                if (nameId in previous.copies):
+                    start = previous.copies[nameId]
+                elif (not nameId in previous.names):
+                    continue
+            for copy in range(start,  count):
+                if (text in indexedName(name,  copy)):
+                    copies[nameId] = copy
+                    break
+        return copies
+
+    # returns the ids of the names containing text, among candidates if given
+    def matchingNames(self,  text,  candidates=None):
+        names = self.names
+        if (candidates is None and len(text) >= 3):
+            postings = sorted((self.trigrams.get(text[start:start + 3],  set()) for start in range(len(text) - 2)),  key=len)
+            candidates = set.intersection(*postings)
+        if (candidates is None):
+            return set(nameId for nameId,  name in enumerate(names) if text in name)
+        return set(nameId for nameId in candidates if text in names[nameId])
+
+    """"
+    Returns the SearchResult of text. If previous is the result of a text that text
+    contains (the user typed more), only the names that matched previous are checked.
+    """
+    def search(self,  text,  previous=None):
+        candidates = None
+        if (previous is None or previous.text == "" or not previous.text in text):
+            previous = None
+        else:
+            candidates = previous.names
+        names = self.matchingNames(text,  candidates) if text != "" else set()
+        copies = self.matchingCopies(text,  previous) if text != "" else {}
+        below = set()
+        stack = []
+        owners = [self.owners.get(nameId,  ()) for nameId in names]
+        for nameId,  first in copies.items(): # the elaborations with the copy that matches first
+            owners.append([elaborated for elaborated,  count in self.copyOwners[nameId].items() if count > first])
+        for elaborations in owners:
+            for elaborated in elaborations:
+                if (not elaborated in below):
+                    below.add(elaborated)
+                    stack.append(elaborated)
+        while (len(stack) > 0):
+            for parent in self.parents.get(stack.pop(),  ()):
+                if (not parent in below):
+                    below.add(parent)
+                    stack.append(parent)
+        return SearchResult(text,  names,  copies,  below)
@@ -0,0 +1,68 @@
+""""
+Class Name: SymbolIndex
+Class Description: The names declared across the files of a Design that the editors
+offer as completions: module names, parameter names and define variables. The symbols
+of each file are kept with the FileParser they come from, so an update only looks at
+the files parsed again since the last one, and each symbol counts the files declaring
+it, so removing a file only removes the symbols no other file declares. Does not
+depend on Qt.
+"""
+class SymbolIndex:
+    def __init__(self):
+        self.files = {} # key = path of a file, value = (FileParser, frozenset of its symbols)
+        self.counts = {} # key = symbol, value = number of files declaring it
+        self.version = 0 # incremented whenever a symbol is added or removed
+        self.sortedWords = None # words(), until the next change
+
+    # returns the symbols declared in result, a FileParser
+    @staticmethod
+    def fileSymbols(result):
+        symbols = set()
+        for name,  info in result.modules.items():
+            symbols.add(name)
+            symbols.update(info.parameters)
+        symbols.update(name for name,  value in result.defines)
+        return frozenset(symbols)
+
+    """"
+    Brings the index up to date with files, the FileParsers of a Design by path. Files
+    whose FileParser is the one indexed are skipped. Returns True if the symbols changed.
+    """
+    def update(self,  files):
+        changed = False
+        for path in [path for path in self.files if not path in files]:
+            changed = self.replace(path,  frozenset()) or changed
+            del self.files[path]
+        for path,  result in files.items():
+            indexed = self.files.get(path)
+            if (indexed is not None and indexed[0] is result):
+                continue
+            changed = self.replace(path,  self.fileSymbols(result)) or changed
+            self.files[path] = (result,  self.files[path][1])
+        if (changed):
+            self.version = self.version + 1
+            self.sortedWords = None
+        return changed
+
+    # replaces the symbols indexed for the file at path by symbols; returns True if a symbol was added or removed
+    def replace(self,  path,  symbols):
+        old = self.files[path][1] if path in self.files else frozenset()
+        self.files[path] = (None,  symbols)
+        changed = False
+        for symbol in old - symbols:
+            self.counts[symbol] = self.counts[symbol] - 1
+            if (self.counts[symbol] == 0):
+                del self.counts[symbol]
+                changed = True
+        for symbol in symbols - old:
+            if (not symbol in self.counts):
+                self.counts[symbol] = 0
+                changed = True
+            self.counts[symbol] = self.counts[symbol] + 1
+        return changed
+
+    # returns the symbols of all the files, sorted
+    def words(self):
+        if (self.sortedWords is None):
+            self.sortedWords = sorted(self.counts)
+        return self.sortedWords
@@ -0,0 +1,48 @@
+import unittest
+from evaluator import Evaluator
+from bitVector import BitVector
+from constExpr import ExpressionError
+
+""""
+Class Name: SelectTest
+Class Description: Bit and part selects of constant expressions: selects within the
+value give its bits, selects out of order or below bit 0 raise ExpressionError, which
+the callers of the Evaluator catch, instead of another exception.
+"""
+class SelectTest(unittest.TestCase):
+    def setUp(self):
+        self.scope = Evaluator({"Q": BitVector(0xA5,  8)},  {})
+
+    def testSelects(self):
+        self.assertEqual(self.scope.evaluate("Q[7:4]"),  BitVector(0xA,  4))
+        self.assertEqual(self.scope.evaluate("Q[0]"),  BitVector(1,  1))
+        self.assertEqual(self.scope.evaluate("Q[0+:4]"),  BitVector(0x5,  4))
+        self.assertEqual(self.scope.evaluate("Q[7-:4]"),  BitVector(0xA,  4))
+
+    def testBadSelects(self):
+        for text in ("Q[-1]",  "Q[-1:-2]",  "Q[0:3]",  "Q[0-:4]",  "Q[0+:0]",  "Q[4-:-1]"):
+            with self.assertRaises(ExpressionError,  msg=text):
+                self.scope.evaluate(text)
+
+""""
+Class Name: NumberTest
+Class Description: Numbers are read from ASCII digits only; digits of other scripts
+and superscripts are not numbers and raise ExpressionError.
+"""
+class NumberTest(unittest.TestCase):
+    def testNumbers(self):
+        scope = Evaluator({},  {})
+        self.assertEqual(scope.evaluate("1_000"),  BitVector(1000,  32,  True))
+        self.assertEqual(scope.evaluate("8'hA5"),  BitVector(0xA5,  8))
+        for text in ("\u00b2",  "\u0663",  "\u0663'd5"):
+            with self.assertRaises(ExpressionError,  msg=text):
+                scope.evaluate(text)
+
+    def testBadNumbers(self):
+        scope = Evaluator({"N": BitVector(1000000000)},  {})
+        for text in ("4'b12",  "8'o9",  "99999999'h0",  "{1000000000{1'b1}}",  "{N{1'b1}}",  "{8'h1, 99999999'h0}",  "9" * 5000):
+            with self.assertRaises(ExpressionError,  msg=text[:20]):
+                scope.evaluate(text)
+
+if __name__ == '__main__':
+    unittest.main()
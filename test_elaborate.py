@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from design import Design
+from scanner import Scanner
+from bitVector import BitVector
+from elaborate import MAX_HIERARCHY_DEPTH
+
+# returns the elaborated hierarchy of text, the source of a design in one file, whose children are the top modules
+def elaborateText(text):
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory,  "design.v"),  'w') as f:
+            f.write(text)
+        design = Design(1,  None,  Scanner())
+        design.load(directory)
+        return design.elaborate()
+
+# returns the (instance name, module name, W parameter, copies) of the children of elaborated
+def children(elaborated):
+    return [(name,  child.name,  child.parameters.get("W"),  count) for name,  child,  count in elaborated.children]
+
+""""
+Class Name: LoopTest
+Class Description: Generate for loops are counted from the closed form of their header
+when the genvar steps by a constant amount, whatever the comparison, and by stepping
+through them otherwise. A loop whose trip count is unknown counts once.
+"""
+class LoopTest(unittest.TestCase):
+    def loopCount(self,  header):
+        root = elaborateText("module leaf ();\nendmodule\nmodule top ();\n  genvar i;\n  for " + header
+            + " begin : g\n    leaf u ();\n  end\nendmodule\n")
+        top = root.children[0][1]
+        return top.childCount()
+
+    def testClosedForms(self):
+        self.assertEqual(self.loopCount("(i = 0; i < 10; i = i + 1)"),  10)
+        self.assertEqual(self.loopCount("(i = 0; i <= 10; i = i + 2)"),  6)
+        self.assertEqual(self.loopCount("(i = 9; i >= 0; i = i - 1)"),  10)
+        self.assertEqual(self.loopCount("(i = 10; i > 0; i = i - 3)"),  4)
+        self.assertEqual(self.loopCount("(i = 0; i != 8; i = i + 2)"),  4)
+        self.assertEqual(self.loopCount("(i = 0; 10 > i; i++)"),  10)
+        self.assertEqual(self.loopCount("(i = 0; i < 0; i = i + 1)"),  0)
+
+    def testEquality(self):
+        self.assertEqual(self.loopCount("(i = 3; i == 3; i = i + 1)"),  1)
+        self.assertEqual(self.loopCount("(i = 3; i == 4; i = i + 1)"),  0)
+        self.assertEqual(self.loopCount("(i = 3; i == 3; i = i + 0)"),  1) # never ends, counts once as any unknown loop
+
+    def testSteppedThrough(self):
+        self.assertEqual(self.loopCount("(i = 1; i < 100; i = i * 2)"),  7)
+
+""""
+Class Name: SplitTest
+Class Description: The copies of a loop share one instantiation while their
+parameters do not depend on the genvar; otherwise each iteration is elaborated apart
+and named with the genvar value it has, so the names match those of the simulators.
+"""
+class SplitTest(unittest.TestCase):
+    def setUp(self):
+        self.top = elaborateText("""module sub #(parameter W = 1) ();
+endmodule
+module top ();
+  genvar i;
+  for (i = 0; i < 3; i = i + 1) begin : g
+    sub #(.W(i + 1)) u ();
+    sub #(.W(4)) v ();
+    sub #(.W(i / 8 + 2)) w ();
+  end
+  for (i = 0; i < 4; i = i + 1) begin : h
+    if (i % 2 == 0) begin : e
+      sub #(.W(i)) x [1:0] ();
+    end
+  end
+  for (i = 5; i < 8; i = i + 1) begin : k
+    sub #(.W(i)) y ();
+  end
+endmodule
+""").children[0][1]
+
+    def testSplitCopies(self):
+        self.assertEqual(children(self.top),  [("u[0]",  "sub",  BitVector(1,  32,  True),  1),
+            ("u[1]",  "sub",  BitVector(2,  32,  True),  1),  ("u[2]",  "sub",  BitVector(3,  32,  True),  1),
+            ("v",  "sub",  BitVector(4,  32,  True),  3),  ("w",  "sub",  BitVector(2,  32,  True),  3),
+            ("x[0]",  "sub",  BitVector(0,  32,  True),  2),  ("x[2]",  "sub",  BitVector(2,  32,  True),  2),
+            ("y[5]",  "sub",  BitVector(5,  32,  True),  1),  ("y[6]",  "sub",  BitVector(6,  32,  True),  1),
+            ("y[7]",  "sub",  BitVector(7,  32,  True),  1)])
+
+    def testSharedElaborations(self):
+        elaborations = {name: child for name,  child,  count in self.top.children}
+        self.assertIs(elaborations["u[1]"],  elaborations["w"]) # same module and parameters
+        self.assertIsNot(elaborations["v"],  elaborations["w"])
+
+""""
+Class Name: DepthTest
+Class Description: A module that instantiates itself with other parameters each time
+is cut off at MAX_HIERARCHY_DEPTH levels from the root, wherever it is entered: an
+elaboration cut off deeper down is not reused at a shallower level, where it would
+end too early.
+"""
+class DepthTest(unittest.TestCase):
+    def depth(self,  elaborated):
+        return 1 + max((self.depth(child) for name,  child,  count in elaborated.children),  default=0)
+
+    def testTruncatedNotShared(self):
+        root = elaborateText("""module chain #(parameter N = 0) ();
+  if (N < 5000) begin : g
+    chain #(.N(N + 1)) u ();
+  end
+endmodule
+module top ();
+  outer m ();
+  chain #(.N(5)) d ();
+endmodule
+module outer ();
+  inner n ();
+endmodule
+module inner ();
+  chain #(.N(6)) c ();
+endmodule
+""")
+        top = root.children[0][1]
+        outer,  chain = top.children[0][1],  top.children[1][1]
+        # chain N=6 is first cut off below inner, one level deeper than below d
+        self.assertLessEqual(self.depth(root),  MAX_HIERARCHY_DEPTH + 2)
+        self.assertEqual(self.depth(outer),  self.depth(chain))
+        self.assertIsNot(outer.children[0][1].children[0][1],  chain.children[0][1])
+
+if __name__ == '__main__':
+    unittest.main()
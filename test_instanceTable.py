@@ -0,0 +1,58 @@
+import unittest
+from elaborate import Elaborated
+from instanceTable import InstanceTable
+
+""""
+Class Name: InstanceTableTest
+Class Description: Rows added, removed and added again: the ids of removed rows are
+reused, and the elaborations and names no row shows any more are dropped, so the table
+keeps its size however often a hierarchy is refreshed.
+"""
+class InstanceTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = InstanceTable()
+        self.root = Elaborated(None,  "",  {})
+        self.table.add(0,  0,  self.root,  0,  -1,  "")
+
+    # adds count copies of an instance name of module below the root row, returning their ids
+    def addCopies(self,  name,  module,  count):
+        elaborated = Elaborated(None,  module,  {})
+        return [self.table.add(0,  copy,  elaborated,  0,  copy,  name) for copy in range(count)]
+
+    def testRows(self):
+        ids = self.addCopies("u",  "leaf",  3)
+        self.assertEqual(ids,  [1,  2,  3])
+        row = self.table.instance(2)
+        self.assertEqual((row.parent,  row.row,  row.name,  row.module,  row.copy),  (0,  1,  "u[1]",  "leaf",  1))
+        self.assertEqual(list(self.table.instance(0).children),  ids)
+        self.assertEqual(len(self.table),  4)
+
+    def testIdReuse(self):
+        first = self.addCopies("u",  "leaf",  3)
+        self.table.removeChildren(0)
+        self.assertEqual(len(self.table),  1)
+        second = self.addCopies("v",  "other",  3)
+        self.assertEqual(sorted(second),  first)
+        self.assertEqual([self.table.nameOf(rowId) for rowId in second],  ["v[0]",  "v[1]",  "v[2]"])
+        self.assertEqual(list(self.table.instance(0).children),  second)
+
+    def testRelease(self):
+        for refresh in range(5):
+            self.table.removeChildren(0)
+            self.addCopies("u%d" % refresh,  "leaf%d" % refresh,  100)
+        self.assertEqual(len(self.table.parents),  101)
+        self.assertEqual(len([elaborated for elaborated in self.table.elaborated if elaborated is not None]),  2)
+        self.assertEqual(len(self.table.elaboratedIds),  2)
+        self.assertEqual(sorted(self.table.stringIds),  ["",  "leaf4",  "u4"])
+        self.assertLessEqual(len(self.table.strings),  5)
+
+    def testSetElaborated(self):
+        rowId = self.addCopies("u",  "leaf",  1)[0]
+        other = Elaborated(None,  "other",  {})
+        self.table.setElaborated(rowId,  other)
+        self.assertIs(self.table.elaboratedOf(rowId),  other)
+        self.assertEqual(self.table.instance(rowId).module,  "other")
+        self.assertFalse("leaf" in self.table.stringIds)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from parseCache import ParseCache
+from fileParser import parseFiles
+
+""""
+Class Name: ParseCacheTest
+Class Description: Results of unchanged files come from the cache; a changed file, or
+an entry that cannot be unpickled any more, is a miss and is parsed again.
+"""
+class ParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name,  "top.v")
+        self.write("module top ();\n  leaf u ();\nendmodule\n")
+        self.cache = ParseCache(os.path.join(self.directory.name,  "cache",  "parse-cache.sqlite"))
+
+    def tearDown(self):
+        if (self.cache.db is not None):
+            self.cache.db.close()
+        self.directory.cleanup()
+
+    def write(self,  text):
+        with open(self.path,  'w') as f:
+            f.write(text)
+
+    def testHit(self):
+        parseFiles([self.path],  1,  self.cache)
+        self.assertEqual((self.cache.hits,  self.cache.misses),  (0,  1))
+        result = parseFiles([self.path],  1,  self.cache)[0]
+        self.assertEqual((self.cache.hits,  self.cache.misses),  (1,  0))
+        self.assertEqual([inst.name for inst in result.modules["top"].instances],  ["u"])
+
+    def testChanged(self):
+        parseFiles([self.path],  1,  self.cache)
+        self.write("module top ();\n  leaf v ();\nendmodule\n")
+        result = parseFiles([self.path],  1,  self.cache)[0]
+        self.assertEqual(self.cache.misses,  1)
+        self.assertEqual([inst.name for inst in result.modules["top"].instances],  ["v"])
+
+    def testDamagedEntry(self):
+        parseFiles([self.path],  1,  self.cache)
+        self.cache.db.execute("UPDATE files SET data = ?",  (b"\x80\x05damaged", ))
+        self.cache.db.commit()
+        result = parseFiles([self.path],  1,  self.cache)[0]
+        self.assertEqual((self.cache.hits,  self.cache.misses),  (0,  1))
+        self.assertEqual(list(result.modules),  ["top"])
+        parseFiles([self.path],  1,  self.cache) # stored again
+        self.assertEqual((self.cache.hits,  self.cache.misses),  (1,  0))
+
+if __name__ == '__main__':
+    unittest.main()
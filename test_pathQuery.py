@@ -0,0 +1,52 @@
+import unittest
+from elaborate import Elaborated
+from pathQuery import PathQuery
+
+# returns an Elaborated of module name with children, (instance name, Elaborated, number of copies) triples
+def elaboration(name,  children=()):
+    elaborated = Elaborated(None,  name,  {})
+    elaborated.children = list(children)
+    return elaborated
+
+""""
+Class Name: PathQueryTest
+Class Description: Path queries on a shared hierarchy: the copies of an instantiation
+are matched by its name or, with an index, one by one, including the copies a split
+loop names with their genvar value; ** matches any number of levels and :module filters
+by module name. Shared subtrees count once per instance.
+"""
+class PathQueryTest(unittest.TestCase):
+    def setUp(self):
+        leaf = elaboration("leaf")
+        alu = elaboration("alu_core",  [("u_leaf",  leaf,  2)])
+        sram = elaboration("sram_8x",  [("bank",  leaf,  1)])
+        top = elaboration("top",  [("u_leaf",  leaf,  4),  ("alu",  alu,  1),  ("u_sram",  sram,  2),  ("y[5]",  leaf,  1)])
+        self.root = elaboration("",  [("top",  top,  1)])
+
+    # returns the instance paths of the matches of text, joined with dots
+    def paths(self,  text,  limit=1000):
+        return [".".join(PathQuery.names(self.root,  path)) for path in PathQuery(text).run(self.root,  limit)]
+
+    def testCopies(self):
+        self.assertEqual(self.paths("top.u_leaf"),  ["top.u_leaf[0]",  "top.u_leaf[1]",  "top.u_leaf[2]",  "top.u_leaf[3]"])
+        self.assertEqual(self.paths("top.u_leaf[2]"),  ["top.u_leaf[2]"])
+        self.assertEqual(self.paths("top.u_leaf[1?]"),  [])
+
+    def testSplitCopies(self):
+        self.assertEqual(self.paths("top.y"),  ["top.y[5]"])
+        self.assertEqual(self.paths("top.y[5]"),  ["top.y[5]"])
+        self.assertEqual(self.paths("top.y[4]"),  [])
+
+    def testAnyDepth(self):
+        self.assertEqual(PathQuery("**.u_leaf").count(self.root),  6)
+        self.assertEqual(PathQuery("**.*:leaf").count(self.root),  9)
+        self.assertEqual(self.paths("top.*.bank"),  ["top.u_sram[0].bank",  "top.u_sram[1].bank"])
+        self.assertEqual(self.paths("**.*:alu*"),  ["top.alu"])
+        self.assertEqual(self.paths("**.*:sram*.**"),  ["top.u_sram[0]",  "top.u_sram[0].bank",  "top.u_sram[1]",  "top.u_sram[1].bank"])
+
+    def testLimit(self):
+        self.assertEqual(self.paths("**.*:leaf",  3),  ["top.u_leaf[0]",  "top.u_leaf[1]",  "top.u_leaf[2]"])
+        self.assertEqual(PathQuery("**.*:leaf").count(self.root),  9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from design import Design
+from scanner import Scanner
+from bitVector import BitVector
+
+""""
+Class Name: PreprocessorTest
+Class Description: The defines each module sees: those of the defines files, of the
+headers it includes, relative to its directory or found by name anywhere in the
+design, and those of its own file up to each `ifdef, so a `define or `undef earlier in
+a module body decides the guards after it.
+"""
+class PreprocessorTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # writes the files, key = path relative to the design directory, then returns the elaborated top modules by name
+    def elaborate(self,  files):
+        for name,  text in files.items():
+            path = os.path.join(self.directory.name,  name)
+            os.makedirs(os.path.dirname(path),  exist_ok=True)
+            with open(path,  'w') as f:
+                f.write(text)
+        self.design = Design(1,  None,  Scanner())
+        self.design.load(self.directory.name)
+        return {name: child for name,  child,  count in self.design.elaborate().children}
+
+    def testInclude(self):
+        tops = self.elaborate({
+            "defines.vh": "`define WIDTH 8\n",
+            "include/sizes.vh": "`define DEPTH (`WIDTH * 2)\n`define USE_FIFO\n",
+            "rtl/top.v": "`include \"sizes.vh\"\nmodule top ();\n  localparam D = `DEPTH;\n"
+                "`ifdef USE_FIFO\n  leaf f ();\n`else\n  leaf r ();\n`endif\nendmodule\n",
+            "rtl/leaf.v": "module leaf ();\nendmodule\n"})
+        self.assertEqual(tops["top"].parameters["D"],  BitVector(16,  32,  True))
+        self.assertEqual([name for name,  child,  count in tops["top"].children],  ["f"])
+        self.assertEqual(self.design.preprocessor.missing,  {})
+        self.assertTrue(self.design.isIncluded(os.path.join(self.directory.name,  "include",  "sizes.vh")))
+
+    def testMissingInclude(self):
+        self.elaborate({"top.v": "`include \"none.vh\"\nmodule top ();\nendmodule\n"})
+        self.assertEqual(list(self.design.preprocessor.missing),  ["none.vh"])
+
+    def testDefineInModuleBody(self):
+        tops = self.elaborate({"top.v": """module leaf ();
+endmodule
+module other ();
+endmodule
+module top ();
+`ifdef USE_LEAF
+  leaf early ();
+`endif
+`define USE_LEAF
+`ifdef USE_LEAF
+  leaf a ();
+`elsif NOPE
+  other b ();
+`else
+  other c ();
+`endif
+`ifndef USE_LEAF
+  other d ();
+`endif
+`undef USE_LEAF
+`ifdef USE_LEAF
+  leaf e ();
+`else
+  other f ();
+`endif
+endmodule
+module after ();
+`ifdef USE_LEAF
+  leaf g ();
+`endif
+endmodule
+"""})
+        self.assertEqual([name for name,  child,  count in tops["top"].children],  ["a",  "f"])
+        self.assertEqual(tops["after"].children,  [])
+
+if __name__ == '__main__':
+    unittest.main()
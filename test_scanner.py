@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from scanner import Scanner,  IgnoreRule
+
+""""
+Class Name: IgnoreRuleTest
+Class Description: The gitignore patterns: a pattern without a slash matches a name at
+any depth, one with a slash the path relative to its ignore file, ** any number of
+directories and a trailing slash directories only.
+"""
+class IgnoreRuleTest(unittest.TestCase):
+    def testNames(self):
+        rule = IgnoreRule("*.bak.v",  "")
+        self.assertTrue(rule.matches("a/b/x.bak.v",  "x.bak.v",  False))
+        self.assertFalse(rule.matches("a/x.v",  "x.v",  False))
+
+    def testAnchored(self):
+        rule = IgnoreRule("/build",  "")
+        self.assertTrue(rule.matches("build",  "build",  True))
+        self.assertFalse(rule.matches("rtl/build",  "build",  True))
+        rule = IgnoreRule("gen/*.v",  "rtl")
+        self.assertTrue(rule.matches("rtl/gen/x.v",  "x.v",  False))
+        self.assertFalse(rule.matches("gen/x.v",  "x.v",  False))
+        self.assertFalse(rule.matches("rtl/gen/sub/x.v",  "x.v",  False))
+
+    def testAnyDepth(self):
+        rule = IgnoreRule("**/sim/*.v",  "")
+        self.assertTrue(rule.matches("sim/x.v",  "x.v",  False))
+        self.assertTrue(rule.matches("a/b/sim/x.v",  "x.v",  False))
+        rule = IgnoreRule("out/**",  "")
+        self.assertTrue(rule.matches("out/a/x.v",  "x.v",  False))
+        self.assertFalse(rule.matches("out",  "out",  True))
+
+    def testDirectoryOnly(self):
+        rule = IgnoreRule("work/",  "")
+        self.assertTrue(rule.matches("a/work",  "work",  True))
+        self.assertFalse(rule.matches("a/work",  "work",  False))
+
+""""
+Class Name: ScanTest
+Class Description: The files a scan lists: sources and constraints by extension, in
+name order, without the hidden directories and the entries the ignore files rule out,
+the last matching rule deciding, including a negated one.
+"""
+class ScanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        files = {
+            ".gitignore": "build/\n*.tmp.v\n!keep.tmp.v\n",
+            "top.v": "",  "x.tmp.v": "",  "keep.tmp.v": "",  "notes.txt": "",  "pins.tcl": "",
+            "build/out.v": "",  ".git/hooks.v": "",
+            "rtl/.explorerignore": "/gen\n",  "rtl/core.sv": "",  "rtl/gen/skip.v": "",  "rtl/sub/gen/kept.v": ""}
+        for name,  text in files.items():
+            path = os.path.join(self.directory.name,  name)
+            os.makedirs(os.path.dirname(path),  exist_ok=True)
+            with open(path,  'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # returns the paths of files relative to the scanned directory, with / separators
+    def relative(self,  paths):
+        return [os.path.relpath(path,  self.directory.name).replace(os.sep,  "/") for path in paths]
+
+    def testScan(self):
+        result = Scanner().scan(self.directory.name)
+        self.assertEqual(self.relative(result.sources),  ["keep.tmp.v",  "top.v",  "rtl/core.sv",  "rtl/sub/gen/kept.v"])
+        self.assertEqual(self.relative(result.constraints),  ["pins.tcl"])
+        self.assertEqual(self.relative(directory.path for directory in result.sourceDirectories()),
+            ["rtl",  "rtl/sub",  "rtl/sub/gen"])
+
+if __name__ == '__main__':
+    unittest.main()
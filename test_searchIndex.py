@@ -0,0 +1,67 @@
+import unittest
+from elaborate import Elaborated
+from searchIndex import SearchIndex
+
+# returns an Elaborated of module name with children, (instance name, Elaborated, number of copies) triples
+def elaboration(name,  children=()):
+    elaborated = Elaborated(None,  name,  {})
+    elaborated.children = list(children)
+    return elaborated
+
+""""
+Class Name: SearchIndexTest
+Class Description: Searches of the instance and module names: the elaborations with a
+match below them, the first matching copy of the instantiations whose copy names, such
+as u[3], hold the text, searches narrowed from a previous one, and an index rebuilt
+from another hierarchy forgetting the names of the previous one.
+"""
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.leaf = elaboration("leaf_cell")
+        self.alu = elaboration("alu_core",  [("u_leaf",  self.leaf,  2)])
+        self.sram = elaboration("sram_8x",  [("bank",  self.leaf,  12)])
+        self.top = elaboration("top",  [("alu",  self.alu,  1),  ("u_sram",  self.sram,  1),  ("y[5]",  self.leaf,  1)])
+        self.root = elaboration("",  [("top",  self.top,  1)])
+        self.index = SearchIndex()
+        self.index.build(self.root)
+
+    # returns the names whose ids are in result.names
+    def names(self,  result):
+        return sorted(self.index.names[nameId] for nameId in result.names)
+
+    def testNames(self):
+        result = self.index.search("leaf")
+        self.assertEqual(self.names(result),  ["leaf_cell",  "u_leaf"])
+        self.assertEqual(result.below,  {self.root,  self.top,  self.alu,  self.sram})
+        self.assertEqual(self.names(self.index.search("cor")),  ["alu_core"])
+        self.assertEqual(self.index.search("nothing").below,  set())
+
+    def testCopies(self):
+        result = self.index.search("[1")
+        self.assertEqual(result.names,  set())
+        self.assertEqual({self.index.names[nameId]: copy for nameId,  copy in result.copies.items()},  {"u_leaf": 1,  "bank": 1})
+        self.assertEqual(result.below,  {self.root,  self.top,  self.alu,  self.sram})
+        result = self.index.search("[11]",  result)
+        self.assertEqual({self.index.names[nameId]: copy for nameId,  copy in result.copies.items()},  {"bank": 11})
+        self.assertEqual(result.below,  {self.root,  self.top,  self.sram})
+        self.assertEqual(self.names(self.index.search("[5]")),  ["y[5]"])
+        self.assertEqual(self.index.search("[5]").copies,  {self.index.nameIds["bank"]: 5})
+
+    def testNarrowed(self):
+        previous = self.index.search("u_")
+        self.assertEqual(self.names(previous),  ["alu_core",  "u_leaf",  "u_sram"])
+        self.assertEqual(self.names(self.index.search("u_s",  previous)),  ["u_sram"])
+        self.assertEqual(self.names(self.index.search("ba",  previous)),  ["bank"]) # not narrowed, "u_" is not in "ba"
+
+    def testRebuild(self):
+        other = elaboration("other_top",  [("v",  elaboration("leaf2"),  3)])
+        self.index.build(elaboration("",  [("top2",  other,  1)]))
+        self.assertEqual(self.index.search("leaf_cell").below,  set())
+        self.assertEqual(self.index.search("alu").names,  set())
+        self.assertEqual(self.names(self.index.search("leaf")),  ["leaf2"])
+        self.assertEqual(set(self.index.search("[2]").copies),  {self.index.nameIds["v"]})
+        self.assertEqual(len(self.index.names),  len(set(self.index.names)))
+        self.assertEqual(sorted(self.index.names),  ["leaf2",  "other_top",  "top2",  "v"])
+
+if __name__ == '__main__':
+    unittest.main()
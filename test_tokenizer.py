@@ -0,0 +1,60 @@
+import unittest
+from tokenizer import scanText
+
+TEXT = """module top #(parameter W = 8) ();
+  localparam D = W * 2;
+`ifdef A
+  leaf a ();
+`else
+  leaf b ();
+`endif
+  genvar i;
+  for (i = 0; i < 2; i = i + 1) begin : g
+    if (i == 0) begin : e
+      leaf #(.N(D)) c ();
+    end else begin
+      leaf d [1:0] ();
+    end
+  end
+  always @(posedge clk) begin
+    notAnInstance x ();
+  end
+endmodule
+"""
+
+""""
+Class Name: InstanceTest
+Class Description: The instances found by the tokenizer, with their overrides, their
+array range and the guards around them: the generate constructs from the outside in,
+after the conditional directives, which carry the number of the directive their macro
+is looked up at.
+"""
+class InstanceTest(unittest.TestCase):
+    def setUp(self):
+        self.module = scanText(TEXT).modules[0]
+        self.instances = {inst.name: inst for inst in self.module.instances}
+
+    def testModule(self):
+        self.assertEqual(self.module.name,  "top")
+        self.assertEqual(list(self.module.parameters),  ["W",  "D"])
+        self.assertEqual(self.module.overridable,  ["W"])
+        self.assertEqual([inst.name for inst in self.module.instances],  ["a",  "b",  "c",  "d"])
+
+    def testDirectiveGuards(self):
+        self.assertEqual(self.instances["a"].guards,  (("ifdef",  "A",  0), ))
+        self.assertEqual(self.instances["b"].guards,  (("ifndef",  "A",  0), ))
+
+    def testGenerateGuards(self):
+        loop = ("for",  "(i = 0; i < 2; i = i + 1)",  "g")
+        self.assertEqual(self.instances["c"].guards,  (loop,  ("if",  "(i == 0)")))
+        self.assertEqual(self.instances["d"].guards,  (loop,  ("ifnot",  "(i == 0)")))
+        self.assertEqual(self.instances["c"].overrides,  [("N",  "D")])
+        self.assertEqual(self.instances["d"].arrayRange,  "[1:0]")
+
+    def testDirectiveNumbers(self):
+        text = "`define A\nmodule top ();\n`ifdef A\n  leaf a ();\n`endif\n`define B\n`ifndef B\n  leaf b ();\n`endif\nendmodule\n"
+        instances = scanText(text).modules[0].instances
+        self.assertEqual([inst.guards for inst in instances],  [(("ifdef",  "A",  1), ),  (("ifndef",  "B",  4), )])
+
+if __name__ == '__main__':
+    unittest.main()
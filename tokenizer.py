@@ -0,0 +1,589 @@
+import re
+import sys
+import time
+from itertools import accumulate
+
+# matches a string literal or a comment; comments are blanked out before tokenizing
+COMMENT_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*.*?\*/',  re.S)
+
+# matches a token along with the whitespace in front of it
+TOKEN_RE = re.compile(r"""\s*(?:
+        [A-Za-z_][\w$]*
+      | \d[\d_]*\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ?_]+
+      | \d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?
+      | '[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ?_]+
+      | '[01xXzZ]
+      | "(?:[^"\\\n]|\\.)*"
+      | `\w+
+      | \\\S+
+      | <<<|>>>|===|!==|<<|>>|<=|>=|==|!=|&&|\|\||~&|~\||~\^|\^~|\*\*|\+:|-:|::
+      | \S
+    )""",  re.X)
+
+# returns a match if tok is an identifier (or an escaped identifier)
+isIdentifier = re.compile(r'[A-Za-z_\\]').match
+
+# directives that take up the rest of their line
+LINE_DIRECTIVES = {"`define",  "`undef",  "`timescale",  "`include",  "`default_nettype",  "`resetall",
+    "`celldefine",  "`endcelldefine",  "`line",  "`pragma",  "`unconnected_drive",  "`nounconnected_drive"}
+
+# directives followed by the name of a macro
+NAME_DIRECTIVES = {"`ifdef",  "`ifndef",  "`elsif"}
+
+# matches a define directive: name, optional argument list and value
+DEFINE_RE = re.compile(r'`define[ \t]+(\w+)(\([^)]*\))?[ \t]*(.*)',  re.S)
+
+# matches the name of the macro of an undef directive
+UNDEF_RE = re.compile(r'`undef[ \t]+(\w+)')
+
+# matches the file name of an include directive, in quotes or angle brackets
+INCLUDE_RE = re.compile(r'`include[ \t]*["<]([^">\n]+)[">]')
+
+# the guard an instance gets in the other branch of a conditional directive
+NEGATED = {"ifdef": "ifndef",  "ifndef": "ifdef"}
+
+# keywords that start a module item that cannot be a module instantiation
+DECLARATIONS = {"input",  "output",  "inout",  "wire",  "reg",  "logic",  "integer",  "real",  "realtime",  "time",
+    "genvar",  "tri",  "tri0",  "tri1",  "triand",  "trior",  "trireg",  "wand",  "wor",  "supply0",  "supply1",
+    "uwire",  "event",  "defparam",  "specparam",  "signed",  "unsigned",  "assign",  "force",  "release",
+    "deassign",  "typedef",  "enum",  "struct",  "union",  "import",  "export",  "bit",  "byte",  "shortint",  "int",
+    "longint",  "string",  "var",  "const",  "automatic",  "static",  "modport",  "and",  "nand",  "or",  "nor",
+    "xor",  "xnor",  "buf",  "not",  "bufif0",  "bufif1",  "notif0",  "notif1",  "pullup",  "pulldown",  "nmos",
+    "pmos",  "rnmos",  "rpmos",  "cmos",  "rcmos",  "tran",  "rtran",  "tranif0",  "tranif1",  "rtranif0",  "rtranif1"}
+
+# keywords followed by a single procedural statement
+PROCEDURAL = {"always",  "always_ff",  "always_comb",  "always_latch",  "initial",  "final"}
+
+# keywords whose body is skipped up to the matching closing keyword
+BLOCKS = {"function": "endfunction",  "task": "endtask",  "specify": "endspecify",  "class": "endclass",
+    "covergroup": "endgroup",  "property": "endproperty",  "sequence": "endsequence"}
+
+# keywords that close a block, a declaration never runs past them
+BLOCK_ENDS = {"end",  "endmodule",  "endgenerate",  "endcase",  "join"}
+
+# change of the bracket depth made by each bracket token
+DEPTH = {"(": 1,  "[": 1,  "{": 1,  ")": -1,  "]": -1,  "}": -1}
+
+# empty tokens after the last one, so a few tokens can be looked ahead without bounds checks
+SENTINELS = 4
+
+# replaces the characters of a comment with spaces, keeping its newlines and the offsets of the text
+def blankComment(match):
+    text = match.group()
+    if (text[0] == "\""):
+        return text
+    return re.sub(r'[^\n]',  " ",  text)
+
+""""
+Class Name: ModuleInfo
+Class Description: A module declaration found by the Scanner: where it is in the file,
+its parameters with their unevaluated values, and the modules it instantiates.
+"""
+class ModuleInfo:
+    def __init__(self,  name,  start,  line=0,  directive=0):
+        self.name = name
+        self.start = start # offset of the module keyword in the file
+        self.end = start # offset just past the endmodule keyword
+        self.line = line # line of the module keyword, counting from 0
+        self.directive = directive # number of the file's directives before the module, the defines it sees
+        self.parameters = {} # key = parameter name, value = unevaluated value, in declaration order
+        self.overridable = [] # names of the parameters (not localparams) in declaration order
+        self.instances = [] # Instances of other modules, in file order
+
+""""
+Class Name: Instance
+Class Description: A module instantiation found by the Scanner. guards are the generate
+constructs around it, from the outside in: ("if", condition), ("ifnot", condition)
+for the else branch, and ("for", loop header, block label). They come after the
+conditional directives around it, ("ifdef", macro name, number of the directive) or
+("ifndef", macro name, number of the directive), the directive the macro is looked
+up at.
+"""
+class Instance:
+    def __init__(self,  module,  name,  overrides,  guards,  arrayRange):
+        self.module = module # name of the instantiated module
+        self.name = name # instance name
+        self.overrides = overrides # (parameter name or None if positional, unevaluated value)
+        self.guards = guards
+        self.arrayRange = arrayRange # "[msb:lsb]" for an array of instances, "" otherwise
+
+""""
+Class Name: Scanner
+Class Description: Splits Verilog text into tokens with a single regex pass, then walks
+the tokens once to find the modules, their parameters, their instantiations and the
+generate if/for/else regions around them, along with the define variables and the
+directives the Preprocessor runs. Every item is looked at once: bodies of always
+blocks, functions and port lists are skipped by bracket or keyword depth without being
+interpreted.
+"""
+class Scanner:
+    def __init__(self,  text):
+        if ("/" in text):
+            text = COMMENT_RE.sub(blankComment,  text)
+        self.text = text # text with comments blanked out, offsets are the same as the file's
+        end = len(text)
+        while (end > 0 and text[end - 1].isspace()):
+            end = end - 1
+        # the tokens and their end offsets are computed in C, a token starts at its end minus its length
+        tokens = TOKEN_RE.findall(text,  0,  end)
+        self.ends = list(accumulate(map(len,  tokens))) # offset just past each token
+        self.values = list(map(str.lstrip,  tokens)) # token text
+        self.count = len(self.values)
+        self.values.extend([""] * SENTINELS)
+        self.pos = 0
+        self.modules = [] # ModuleInfo of every module, in file order
+        self.defines = [] # (name, value) of every define, in file order
+        # preprocessor directives in file order: ("define", name, value), ("undef", name), ("include", file name),
+        # ("ifdef", name), ("ifndef", name), ("elsif", name), ("else", ) and ("endif", )
+        self.directives = []
+        self.branches = [] # [guards of the branches already passed, guard of this branch or None] of each open `ifdef
+        self.conditions = () # guards of the conditional directives around the current token
+        self.line = 0 # line of the offset lineOffset, counted as far as the last module
+        self.lineOffset = 0
+
+    # returns the offset of the token at index in the text
+    def start(self,  index):
+        return self.ends[index] - len(self.values[index])
+
+    # returns the token offset places ahead of the current one, "" past the end
+    def peek(self,  offset=0):
+        return self.values[min(self.pos + offset,  self.count)]
+
+    # scans the whole text
+    def scan(self):
+        values = self.values
+        while (self.pos < self.count):
+            tok = values[self.pos]
+            if (tok[0] == "`"):
+                self.directive()
+            elif (tok == "module" or tok == "macromodule"):
+                self.module()
+            else:
+                self.pos = self.pos + 1
+        return self
+
+    # returns the offset of the end of the line at start, following backslash continuations
+    def lineEnd(self,  start):
+        end = self.text.find("\n",  start)
+        while (end != -1 and self.text[start:end].rstrip("\r").endswith("\\")):
+            start = end + 1
+            end = self.text.find("\n",  start)
+        if (end == -1):
+            return len(self.text)
+        return end
+
+    # handles a compiler directive, recording the defines and the directives of the preprocessor
+    def directive(self):
+        tok = self.values[self.pos]
+        if (tok in LINE_DIRECTIVES):
+            start = self.start(self.pos)
+            end = self.lineEnd(start)
+            if (tok == "`define"):
+                match = DEFINE_RE.match(self.text,  start,  end)
+                if (match):
+                    value = re.sub(r'\\\r?\n',  " ",  match.group(3)).strip()
+                    self.defines.append((match.group(1),  value))
+                    self.directives.append(("define",  match.group(1),  value))
+            elif (tok == "`undef"):
+                match = UNDEF_RE.match(self.text,  start,  end)
+                if (match):
+                    self.directives.append(("undef",  match.group(1)))
+            elif (tok == "`include"):
+                match = INCLUDE_RE.match(self.text,  start,  end)
+                if (match):
+                    self.directives.append(("include",  match.group(1).strip()))
+            while (self.pos < self.count and self.ends[self.pos] <= end):
+                self.pos = self.pos + 1
+        elif (tok in NAME_DIRECTIVES):
+            self.conditional(tok[1:],  self.peek(1))
+            self.pos = self.pos + 2
+        else: # `else, `endif or the use of a macro
+            if (tok == "`else" or tok == "`endif"):
+                self.conditional(tok[1:],  None)
+            self.pos = self.pos + 1
+
+    # records a conditional directive and updates the guards of the instances that follow it
+    def conditional(self,  kind,  name):
+        index = len(self.directives)
+        self.directives.append((kind,  name) if name is not None else (kind, ))
+        if (kind == "ifdef" or kind == "ifndef"):
+            self.branches.append([(),  (kind,  name,  index)])
+        elif (len(self.branches) == 0): # `elsif, `else or `endif without its `ifdef
+            return
+        elif (kind == "endif"):
+            self.branches.pop()
+        else: # `elsif or `else: the branches before were not taken
+            branch = self.branches[-1]
+            if (branch[1] is not None):
+                branch[0] = branch[0] + ((NEGATED[branch[1][0]],  branch[1][1],  branch[1][2]), )
+            branch[1] = ("ifdef",  name,  index) if kind == "elsif" else None
+        self.conditions = tuple(guard for passed,  current in self.branches
+            for guard in (passed + (current, ) if current is not None else passed))
+
+    # returns the line of offset, which must not be before the last offset asked for
+    def lineOf(self,  offset):
+        self.line = self.line + self.text.count("\n",  self.lineOffset,  offset)
+        self.lineOffset = offset
+        return self.line
+
+    # scans a module declaration from its module keyword to its endmodule
+    def module(self):
+        start = self.start(self.pos)
+        info = ModuleInfo(self.peek(1),  start,  self.lineOf(start),  len(self.directives))
+        self.pos = self.pos + 2
+        # module header: parameter list, port list, up to the semicolon
+        while (self.pos < self.count):
+            tok = self.values[self.pos]
+            if (tok == "#" and self.peek(1) == "("):
+                self.pos = self.pos + 1
+                self.headerParameters(info)
+            elif (tok == "("):
+                self.skipBalanced()
+            elif (tok == ";"):
+                self.pos = self.pos + 1
+                break
+            elif (tok == "endmodule"):
+                break
+            else:
+                self.pos = self.pos + 1
+        self.items(info,  (),  "endmodule")
+        if (self.pos < self.count):
+            info.end = self.ends[self.pos]
+            self.pos = self.pos + 1
+        else:
+            info.end = len(self.text)
+        self.modules.append(info)
+
+    # scans module items until closing ("end" or "endmodule"), consuming an "end" and its label
+    def items(self,  info,  guards,  closing):
+        values = self.values
+        while (self.pos < self.count):
+            tok = values[self.pos]
+            if (tok == "endmodule"):
+                return
+            if (tok == closing):
+                self.pos = self.pos + 1
+                if (values[self.pos] == ":"):
+                    self.pos = self.pos + 2
+                return
+            self.item(info,  guards)
+
+    # scans a single module item
+    def item(self,  info,  guards):
+        tok = self.values[self.pos]
+        if (tok in DECLARATIONS):
+            self.skipDeclaration()
+        elif (tok[0] == "`"):
+            self.directive()
+        elif (tok == "parameter" or tok == "localparam"):
+            self.pos = self.pos + 1
+            self.parameterDeclaration(info,  tok == "localparam",  ";")
+        elif (tok == "begin"):
+            self.generateItem(info,  guards)
+        elif (tok == "if"):
+            self.pos = self.pos + 1
+            condition = self.parenText()
+            self.generateItem(info,  guards + (("if",  condition), ))
+            if (self.values[self.pos] == "else"):
+                self.pos = self.pos + 1
+                self.generateItem(info,  guards + (("ifnot",  condition), ))
+        elif (tok == "for"):
+            self.pos = self.pos + 1
+            header = self.parenText()
+            label = ""
+            if (self.peek() == "begin" and self.peek(1) == ":"):
+                label = self.peek(2)
+            self.generateItem(info,  guards + (("for",  header,  label), ))
+        elif (tok == "case"):
+            self.generateCase(info,  guards)
+        elif (tok in PROCEDURAL):
+            self.pos = self.pos + 1
+            self.skipStatement()
+        elif (tok in BLOCKS):
+            self.skipBlock(BLOCKS[tok])
+        elif (tok in BLOCK_ENDS or tok == "generate" or tok == "endgenerate" or tok == ";" or tok == "else"):
+            self.pos = self.pos + 1
+        elif (isIdentifier(tok)):
+            self.instantiation(info,  guards)
+        else:
+            self.skipDeclaration()
+
+    # scans a generate block (begin ... end) or a single item controlled by a generate construct
+    def generateItem(self,  info,  guards):
+        if (self.peek() == "begin"):
+            self.pos = self.pos + 1
+            if (self.peek() == ":"):
+                self.pos = self.pos + 2
+            self.items(info,  guards,  "end")
+        elif (self.pos < self.count and self.peek() != "endmodule"):
+            self.item(info,  guards)
+
+    # scans a generate case statement, its branches are treated as unconditional
+    def generateCase(self,  info,  guards):
+        self.pos = self.pos + 1
+        self.skipBalanced()
+        while (self.pos < self.count and self.peek() != "endmodule"):
+            if (self.peek() == "endcase"):
+                self.pos = self.pos + 1
+                return
+            # skip the labels of the branch
+            depth = 0
+            while (self.pos < self.count):
+                tok = self.values[self.pos]
+                if (depth == 0 and (tok == ":" or tok == "begin" or tok == "endcase")):
+                    break
+                depth = depth + DEPTH.get(tok,  0)
+                self.pos = self.pos + 1
+            if (self.peek() == ":"):
+                self.pos = self.pos + 1
+            if (self.peek() != "endcase"):
+                self.generateItem(info,  guards)
+
+    """"
+    Scans the assignments of a parameter or localparam declaration, starting after the
+    keyword, until closing (";" in the module body, ")" in the module header, which is
+    left for the caller). Types and ranges in front of the names are skipped.
+    """
+    def parameterDeclaration(self,  info,  local,  closing):
+        values = self.values
+        while (self.pos < self.count):
+            # skip the type and range up to "name ="
+            while (self.pos < self.count and not (values[self.pos + 1] == "=" and isIdentifier(values[self.pos]))):
+                tok = values[self.pos]
+                if (tok == closing or tok == ";" or tok in BLOCK_ENDS):
+                    if (tok == ";"):
+                        self.pos = self.pos + 1
+                    return
+                if (tok in DEPTH):
+                    self.skipBalanced()
+                else:
+                    self.pos = self.pos + 1
+            if (self.pos >= self.count):
+                return
+            name = values[self.pos]
+            self.pos = self.pos + 2
+            info.parameters[name] = self.expressionText()
+            if (not local):
+                info.overridable.append(name)
+            if (values[self.pos] != ","):
+                if (values[self.pos] == ";"):
+                    self.pos = self.pos + 1
+                return
+            self.pos = self.pos + 1
+            if (values[self.pos] == "parameter" or values[self.pos] == "localparam"):
+                local = values[self.pos] == "localparam"
+                self.pos = self.pos + 1
+
+    # scans the parameter list in a module header, #( ... )
+    def headerParameters(self,  info):
+        self.pos = self.pos + 1 # opening parenthesis
+        local = False
+        if (self.peek() == "parameter" or self.peek() == "localparam"):
+            local = self.peek() == "localparam"
+            self.pos = self.pos + 1
+        self.parameterDeclaration(info,  local,  ")")
+        if (self.peek() == ")"):
+            self.pos = self.pos + 1
+
+    # scans a module instantiation: module #(overrides) name [range] (ports), name (ports) ... ;
+    def instantiation(self,  info,  guards):
+        values = self.values
+        module = values[self.pos]
+        self.pos = self.pos + 1
+        overrides = []
+        if (values[self.pos] == "#"):
+            self.pos = self.pos + 1
+            if (values[self.pos] == "("):
+                overrides = self.overrideList()
+            else: # single value without parentheses
+                overrides = [(None,  values[self.pos])]
+                self.pos = self.pos + 1
+        while (self.pos < self.count):
+            name = values[self.pos]
+            if (not isIdentifier(name) or name in DECLARATIONS):
+                self.skipDeclaration()
+                return
+            self.pos = self.pos + 1
+            arrayRange = ""
+            if (values[self.pos] == "["):
+                arrayRange = self.parenText()
+            if (values[self.pos] != "("): # not an instantiation after all
+                self.skipDeclaration()
+                return
+            self.skipBalanced()
+            info.instances.append(Instance(module,  name,  overrides,  self.conditions + guards if self.conditions else guards,  arrayRange))
+            if (values[self.pos] != ","):
+                if (values[self.pos] == ";"):
+                    self.pos = self.pos + 1
+                return
+            self.pos = self.pos + 1
+
+    # scans the parameter values of an instantiation, #( .NAME(value), ... ) or #( value, ... )
+    def overrideList(self):
+        overrides = []
+        self.pos = self.pos + 1 # opening parenthesis
+        while (self.pos < self.count and self.peek() != ")"):
+            if (self.peek() == "." and isIdentifier(self.peek(1))):
+                name = self.peek(1)
+                self.pos = self.pos + 2
+                overrides.append((name,  self.parenText()[1:-1].strip()))
+            else:
+                overrides.append((None,  self.expressionText()))
+            if (self.peek() == ","):
+                self.pos = self.pos + 1
+            elif (self.peek() != ")"): # malformed, give up on the rest of the list
+                self.skipUntilClosing()
+        self.pos = self.pos + 1
+        return overrides
+
+    # returns the text of an expression, up to the next "," ";" or unmatched closing bracket
+    def expressionText(self):
+        values = self.values
+        start = self.pos
+        depth = 0
+        while (self.pos < self.count):
+            tok = values[self.pos]
+            if (depth == 0 and (tok == "," or tok == ";")):
+                break
+            depth = depth + DEPTH.get(tok,  0)
+            if (depth < 0):
+                break
+            self.pos = self.pos + 1
+        if (self.pos == start):
+            return ""
+        return self.text[self.start(start):self.ends[self.pos - 1]].strip()
+
+    # returns the text from the opening bracket at the current token to its match, inclusive
+    def parenText(self):
+        if (not self.peek() in DEPTH):
+            return ""
+        start = self.pos
+        self.skipBalanced()
+        return self.text[self.start(start):self.ends[self.pos - 1]]
+
+    # skips from an opening bracket to just past its match
+    def skipBalanced(self):
+        values = self.values
+        get = DEPTH.get
+        pos = self.pos
+        count = self.count
+        depth = 0
+        while (pos < count):
+            depth = depth + get(values[pos],  0)
+            pos = pos + 1
+            if (depth <= 0):
+                break
+        self.pos = pos
+
+    # skips up to (not including) the closing bracket of the enclosing list
+    def skipUntilClosing(self):
+        depth = 0
+        while (self.pos < self.count):
+            depth = depth + DEPTH.get(self.values[self.pos],  0)
+            if (depth < 0):
+                return
+            self.pos = self.pos + 1
+
+    # skips a declaration or unknown item up to and including its semicolon
+    def skipDeclaration(self):
+        values = self.values
+        get = DEPTH.get
+        pos = self.pos
+        count = self.count
+        depth = 0
+        while (pos < count):
+            tok = values[pos]
+            if (depth <= 0 and (tok == ";" or tok in BLOCK_ENDS)):
+                if (tok == ";"):
+                    pos = pos + 1
+                break
+            depth = depth + get(tok,  0)
+            pos = pos + 1
+        self.pos = pos
+
+    # skips from a keyword to just past its closing keyword
+    def skipBlock(self,  closing):
+        values = self.values
+        opening = values[self.pos]
+        depth = 0
+        while (self.pos < self.count):
+            tok = values[self.pos]
+            self.pos = self.pos + 1
+            if (tok == opening):
+                depth = depth + 1
+            elif (tok == closing):
+                depth = depth - 1
+                if (depth == 0):
+                    return
+            elif (tok == "endmodule"): # unterminated block
+                self.pos = self.pos - 1
+                return
+
+    # skips a procedural statement, including any nested blocks and else branches
+    def skipStatement(self):
+        tok = self.peek()
+        if (tok == "@" or tok == "#"): # event or delay control in front of the statement
+            self.pos = self.pos + 1
+            if (self.peek() == "("):
+                self.skipBalanced()
+            else:
+                self.pos = self.pos + 1
+            self.skipStatement()
+        elif (tok == "begin" or tok == "fork"):
+            values = self.values
+            depth = 0
+            while (self.pos < self.count):
+                tok = values[self.pos]
+                self.pos = self.pos + 1
+                if (tok == "begin" or tok == "fork"):
+                    depth = depth + 1
+                elif (tok == "end" or tok == "join" or tok == "join_any" or tok == "join_none"):
+                    depth = depth - 1
+                    if (depth == 0):
+                        break
+                elif (tok == "endmodule"):
+                    self.pos = self.pos - 1
+                    return
+            if (self.peek() == ":"):
+                self.pos = self.pos + 2
+        elif (tok == "if"):
+            self.pos = self.pos + 1
+            self.skipBalanced()
+            self.skipStatement()
+            if (self.peek() == "else"):
+                self.pos = self.pos + 1
+                self.skipStatement()
+        elif (tok == "case" or tok == "casex" or tok == "casez" or tok == "randcase"):
+            self.skipBlock("endcase")
+        elif (tok == "for" or tok == "while" or tok == "repeat" or tok == "foreach"):
+            self.pos = self.pos + 1
+            self.skipBalanced()
+            self.skipStatement()
+        elif (tok == "forever"):
+            self.pos = self.pos + 1
+            self.skipStatement()
+        else:
+            self.skipDeclaration()
+
+# scans text and returns its Scanner, holding the modules and defines found
+def scanText(text):
+    return Scanner(text).scan()
+
+if __name__ == "__main__":
+    # measures the throughput of the scanner on the files given on the command line
+    size = 0
+    modules = 0
+    instances = 0
+    elapsed = 0.0
+    for path in sys.argv[1:]:
+        with open(path,  'r') as f:
+            text = f.read()
+        start = time.perf_counter()
+        scanner = scanText(text)
+        elapsed = elapsed + time.perf_counter() - start
+        size = size + len(text)
+        modules = modules + len(scanner.modules)
+        instances = instances + sum(len(info.instances) for info in scanner.modules)
+    megabytes = size / (1024.0 * 1024.0)
+    print("%d modules, %d instances, %.1f MB in %.3f s: %.1f MB/s" % (modules,  instances,  megabytes,
+        elapsed,  megabytes / max(elapsed,  1e-9)))